@@ -16,10 +16,12 @@ class Microbes(object):
 
     _total_microbes_populations = 0  # int
 
-    def __init__(self, genus, color=None):
+    def __init__(self, genus, color=None, population=None):
 
         self._id = 'micr' + str(Microbes._total_microbes_populations)  # str
         self._genus = genus  # str
+        # (strain, habitat) of a strains.StrainModel, None for totals
+        self._population = population  # (str, str)
         if color is None:
             self._line_color = hsv_to_rgb(
                 *NewColor.new_color(genus))  # (R,G,B)
@@ -50,3 +52,7 @@ class Microbes(object):
     def get_plot(self):
 
         return self._plot
+
+    def get_population(self):
+
+        return self._population
@@ -9,6 +9,8 @@
 
 from kivy.clock import Clock
 from bin.deps.kivy_graph import Graph
+from bin.engine import model
+from bin.engine.strains import StrainModel
 from bin.functions.graphs import xy_max_resize
 
 
@@ -94,3 +96,38 @@ class Microbiome(object):
     def get_clocks(self):
 
         return self._clocks
+
+    def get_populations(self):
+
+        # (strain, habitat) of every Microbes that plots one population
+        return [
+            _microbes.get_population()
+            for _microbes in self._microbes.values()
+            if _microbes.get_population() is not None
+        ]
+
+    def get_strain_model(self, parameters, strains, habitats, growth,
+                         inhibition, capacity, transitions=()):
+
+        # StrainModel over the given strains and habitats, every population
+        # plotted by this microbiome must be one of them
+        strain_model = StrainModel(parameters, strains, habitats, growth,
+                                   inhibition, capacity, transitions)
+        for population in self.get_populations():
+            strain_model.index(*population)
+        return strain_model
+
+    def add_points(self, time, strain_model, state):
+
+        # one point per Microbes, the ones without a population plot the
+        # total. densities below the extinction density are shown as 1e-9,
+        # like the four populations of the simulation screen
+        for _microbes in self._microbes.values():
+            population = _microbes.get_population()
+            if population is None:
+                density = strain_model.total_microbes(state)
+            else:
+                density = state[strain_model.index(*population)]
+            if density < model.EXTINCTION_DENSITY:
+                density = 0.000000001
+            _microbes.get_plot().points.append((time, float(density)))
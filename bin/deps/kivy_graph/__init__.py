@@ -51,7 +51,8 @@ The current availables plots are:
 '''
 
 __all__ = ('Graph', 'Plot', 'MeshLinePlot', 'MeshStemPlot', 'LinePlot',
-           'SmoothLinePlot', 'ContourPlot', 'ScatterPlot', 'PointPlot')
+           'SmoothLinePlot', 'ContourPlot', 'ScatterPlot', 'PointPlot',
+           'PointBuffer')
 __version__ = '0.4.1.dev0'
 
 from kivy.uix.widget import Widget
@@ -1158,6 +1159,27 @@ class Plot(EventDispatcher):
         for x, y in self.points:
             yield x_px(x), y_px(y)
 
+    def project(self, points):
+        '''(n, 2) array of points in the graph's units to the (n, 2) pixel
+        coordinates of :meth:`iterate_points`.
+        '''
+        params = self.params
+        size = params['size']
+        vertices = np.empty_like(points)
+        for column, log, low, high, start, end in (
+                (0, params['xlog'], params['xmin'], params['xmax'], size[0],
+                 size[2]),
+                (1, params['ylog'], params['ymin'], params['ymax'], size[1],
+                 size[3])):
+            values = points[:, column]
+            if log:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values = np.log10(values)
+                low, high = log10(low), log10(high)
+            vertices[:, column] = ((values - low) *
+                                   ((end - start) / float(high - low)) + start)
+        return vertices
+
     def on_clear_plot(self, *largs):
         pass
 
@@ -1236,10 +1258,27 @@ class MeshStemPlot(MeshLinePlot):
 
 class LinePlot(Plot):
     """LinePlot draws using a standard Line object.
+
+    Its :attr:`points` are a :class:`PointBuffer`, drawn as
+    :class:`LineChunks`, see :class:`SmoothLinePlot`.
     """
 
     line_width = NumericProperty(1)
 
+    def _get_points(self):
+        try:
+            return self._point_buffer
+        except AttributeError:
+            self._point_buffer = PointBuffer(
+                on_change=lambda: self.property('points').dispatch(self))
+            return self._point_buffer
+
+    def _set_points(self, points):
+        self._get_points().set(points)
+        return True
+
+    points = AliasProperty(_get_points, _set_points, bind=[])
+
     def create_drawings(self):
         from kivy.graphics import Line, RenderContext
 
@@ -1247,31 +1286,184 @@ class LinePlot(Plot):
                                   use_parent_projection=True)
         with self._grc:
             self._gcolor = Color(*self.color)
-            self._gline = Line(points=[],
-                               cap='none',
-                               width=self.line_width,
-                               joint='round')
+        self._chunks = LineChunks(
+            self._grc, lambda: Line(points=[],
+                                    cap='none',
+                                    width=self.line_width,
+                                    joint='round'))
 
         return [self._grc]
 
     def draw(self, *args):
         super(LinePlot, self).draw(*args)
-        # flatten the list
-        points = []
-        for x, y in self.iterate_points():
-            points += [x, y]
-        self._gline.points = points
+        self._chunks.draw(self)
 
     def on_line_width(self, *largs):
-        if hasattr(self, "_gline"):
-            self._gline.width = self.line_width
+        if hasattr(self, "_chunks"):
+            for line in self._chunks.lines:
+                line.width = self.line_width
+
+
+class PointBuffer(object):
+    '''(x, y) points stored in a growable (capacity, 2) float64 array, 16
+    bytes per point, that doubles its capacity when full so appending is
+    amortised O(1). Requires numpy.
+
+    It behaves like the list of (x, y) tuples it replaces: len, iteration,
+    indexing and slicing give tuples. :attr:`data` is an (n, 2) view of the
+    stored points, without copying. It is a snapshot: it does not see
+    points appended later, and once an append grows the array it no longer
+    shares memory with the buffer, so read it again after every change.
+
+    `on_change` is called once per :meth:`append` or :meth:`extend`, so a
+    batch of points notifies its observers once. :attr:`generation` only
+    changes when the points are replaced with :meth:`set`, so points up to
+    an earlier length are known to be unchanged while it stays the same.
+    '''
+
+    def __init__(self, points=(), on_change=None):
+        self._array = np.empty((16, 2))
+        self._size = 0
+        self.generation = 0
+        self.on_change = on_change
+        self.set(points)
+
+    @property
+    def data(self):
+        return self._array[:self._size]
+
+    def _reserve(self, size):
+        if size > len(self._array):
+            array = np.empty((max(size, 2 * len(self._array)), 2))
+            array[:self._size] = self._array[:self._size]
+            self._array = array
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def set(self, points):
+        '''Replaces every point, without notifying.
+        '''
+        if isinstance(points, PointBuffer):
+            points = points.data.copy()
+        self._size = 0
+        self.generation += 1
+        self._extend(points)
+
+    def _extend(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self._reserve(self._size + len(points))
+        self._array[self._size:self._size + len(points)] = points
+        self._size += len(points)
+
+    def append(self, point):
+        self._reserve(self._size + 1)
+        self._array[self._size] = point
+        self._size += 1
+        self._changed()
+
+    def extend(self, points):
+        self._extend(points)
+        self._changed()
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return map(tuple, self.data.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(map(tuple, self.data[index].tolist()))
+        return tuple(self.data[index].tolist())
+
+    def __repr__(self):
+        return 'PointBuffer(%r)' % (list(self), )
+
+
+class LineChunks(object):
+    '''The line of a plot with :class:`PointBuffer` points, split over
+    :class:`~kivy.graphics.Line` instructions of at most `size` points
+    each, every chunk starting at the last point of the previous one.
+
+    kivy tessellates and uploads a Line again whenever its points are set,
+    so :meth:`draw` only sets the points of the last chunk: while the axes,
+    the plot size and the points' generation stay the same, the points
+    appended since the previous draw are projected and added to it, and a
+    new chunk is started when it is full. Anything else redraws the whole
+    line. `make_line` returns a new, empty Line, which is added to
+    `canvas`.
+    '''
+
+    def __init__(self, canvas, make_line, size=1024):
+        self.canvas = canvas
+        self.make_line = make_line
+        self.size = size
+        self.lines = []
+        # flat vertices of the last chunk, axes, plot size and points
+        # generation of the line drawn and its number of points
+        self._vertices = []
+        self._drawn_key = None
+        self._drawn_count = 0
+
+    def clear(self):
+        for line in self.lines:
+            self.canvas.remove(line)
+        self.lines = []
+        self._vertices = []
+        self._drawn_key = None
+        self._drawn_count = 0
+
+    def extend(self, vertices):
+        '''Adds a flat list of vertices to the end of the line.
+        '''
+        start = 0
+        while start < len(vertices):
+            if not self.lines or len(self._vertices) >= 2 * self.size:
+                self._vertices = self._vertices[-2:]
+                self.lines.append(self.make_line())
+                self.canvas.add(self.lines[-1])
+            end = start + 2 * self.size - len(self._vertices)
+            self._vertices.extend(vertices[start:end])
+            self.lines[-1].points = self._vertices
+            start = end
+
+    def draw(self, plot):
+        points = plot.points
+        params = plot.params
+        key = (params['xlog'], params['xmin'], params['xmax'], params['ylog'],
+               params['ymin'], params['ymax'], tuple(params['size']),
+               points.generation)
+
+        if key == self._drawn_key and len(points) >= self._drawn_count:
+            # same axes and the points drawn are unchanged, only the new
+            # points are projected
+            new = points.data[self._drawn_count:]
+        else:
+            self.clear()
+            new = points.data
+        self.extend(plot.project(new).ravel().tolist())
+
+        self._drawn_key = key
+        self._drawn_count = len(points)
 
 
 class SmoothLinePlot(Plot):
     '''Smooth Plot class, see module documentation for more information.
     This plot use a specific Fragment shader for a custom anti aliasing.
+
+    Its :attr:`points` are a :class:`PointBuffer`. Assigning a list of
+    points replaces them, and appending or extending it in place redraws
+    the plot once per call. While the axes and the plot size stay the same,
+    a redraw only projects the points added since the last one and sets
+    the vertices of the last of the :class:`LineChunks` the line is split
+    into, the whole line is drawn again after a rescale.
     '''
 
+    points = AliasProperty(LinePlot._get_points, LinePlot._set_points,
+                           bind=[])
+
     SMOOTH_FS = '''
     $HEADER$
 
@@ -1312,10 +1504,11 @@ class SmoothLinePlot(Plot):
                                   use_parent_projection=True)
         with self._grc:
             self._gcolor = Color(*self.color)
-            self._gline = Line(points=[],
-                               cap='none',
-                               width=2.,
-                               texture=SmoothLinePlot._texture)
+        self._chunks = LineChunks(
+            self._grc, lambda: Line(points=[],
+                                    cap='none',
+                                    width=2.,
+                                    texture=SmoothLinePlot._texture))
 
         return [self._grc]
 
@@ -1325,11 +1518,7 @@ class SmoothLinePlot(Plot):
 
     def draw(self, *args):
         super(SmoothLinePlot, self).draw(*args)
-        # flatten the list
-        points = []
-        for x, y in self.iterate_points():
-            points += [x, y]
-        self._gline.points = points
+        self._chunks.draw(self)
 
 
 class ContourPlot(Plot):
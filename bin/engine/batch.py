@@ -0,0 +1,229 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import csv
+import json
+import multiprocessing
+import os
+import numpy as np
+from bin.engine import model, simulation
+from bin.engine.parameters import from_screen_values
+
+# scenario file keys that are not Parameters fields
+RUN_OPTIONS = ("name", "backend", "max_time")
+
+# same columns as the csv saved from the scenario screen
+TRAJECTORY_HEADER = [
+    "Time", "Total Microbes Density",
+    "Sensitive Microbes Density (Planktonic)",
+    "Sensitive Microbes Density (Biofilm)",
+    "Resistant Microbes Density (Planktonic)",
+    "Resistant Microbes Density (Biofilm)", "Immune System Density",
+    "Antimicrobial Concentration"
+]
+
+SUMMARY_HEADER = [
+    "name", "backend", "treatment_type", "outcome", "final_time", "n_steps",
+    "peak_total_microbes", "peak_time", "final_total_microbes",
+    "final_resistant_fraction", "final_immune_cells", "treatment_days"
+]
+
+
+def load_scenarios(path, default_name=None):
+
+    # a scenario file is a json object, or a list of them, holding any of the
+    # Parameters fields or DEFAULT_PARAMETERS keys plus the run options. missing fields take the
+    # scenario screen defaults
+    with open(path) as scenario_file:
+        content = json.load(scenario_file)
+
+    if default_name is None:
+        default_name = os.path.splitext(os.path.basename(path))[0]
+
+    if isinstance(content, dict):
+        content = [content]
+
+    scenarios = []
+    for i, scenario in enumerate(content):
+        scenario = dict(scenario)
+        scenario.setdefault(
+            "name", default_name if len(content) == 1 else default_name +
+            "_" + str(i))
+        scenarios.append(scenario)
+    return scenarios
+
+
+def split_scenario(scenario):
+
+    # (Parameters, run options) of a scenario dictionary
+    options = {
+        key: scenario[key]
+        for key in RUN_OPTIONS if key in scenario
+    }
+    values = {
+        key: value
+        for key, value in scenario.items() if key not in RUN_OPTIONS
+    }
+    return from_screen_values(**values), options
+
+
+def screen_rows(times, states, concentration):
+
+    # rows of TRAJECTORY_HEADER, as add_points shows the values: densities
+    # below the extinction density are 1e-9
+    microbes = np.where(states[:, model.MICROBES] >= model.EXTINCTION_DENSITY,
+                        states[:, model.MICROBES], 0.000000001)
+    immune = model.total_immune_cells(states)
+    immune = np.where(immune >= model.EXTINCTION_DENSITY, immune, 0.000000001)
+
+    return np.column_stack(
+        (times, np.sum(microbes, axis=-1), microbes[:, model.PS],
+         microbes[:, model.BS], microbes[:, model.PR], microbes[:, model.BR],
+         immune, concentration))
+
+
+def trajectory_rows(result):
+
+    # screen_rows of every sample of a SimulationResult
+    return screen_rows(
+        result.times, result.states,
+        result.uptake * result.parameters.antimicrobial_mean_concentration)
+
+
+def plot_rows(result, max_rows=2000):
+
+    # trajectory_rows thinned to about max_rows evenly spaced samples, for
+    # drawing a whole run at once. the first and last samples are kept, and
+    # those on both sides of every antimicrobial switch
+    rows = trajectory_rows(result)
+    keep = np.zeros(len(rows), dtype=bool)
+    keep[::max(1, int(np.ceil(len(rows) / float(max_rows))))] = True
+    keep[-1] = True
+    switches = np.flatnonzero(np.diff(rows[:, -1]) != 0)
+    keep[switches] = True
+    keep[switches + 1] = True
+    return rows[keep]
+
+
+def summary(name, backend, result):
+
+    states = result.states
+    total = model.total_microbes(states)
+    peak = int(np.argmax(total))
+
+    # densities below the extinction density count as none, so a cleared
+    # host has no resistant fraction
+    microbes = states[-1, model.MICROBES]
+    microbes = np.where(microbes >= model.EXTINCTION_DENSITY, microbes, 0.0)
+    resistant = microbes[model.PR] + microbes[model.BR]
+    final_microbes = np.sum(microbes)
+
+    return {
+        "name": name,
+        "backend": backend,
+        "treatment_type": result.parameters.treatment_type,
+        "outcome": result.outcome,
+        "final_time": float(result.final_time),
+        "n_steps": result.n_steps,
+        "peak_total_microbes": float(total[peak]),
+        "peak_time": float(result.times[peak]),
+        "final_total_microbes": float(total[-1]),
+        "final_resistant_fraction":
+        float(resistant / final_microbes) if final_microbes > 0 else 0.0,
+        "final_immune_cells": float(model.total_immune_cells(states[-1])),
+        "treatment_days": simulation.treatment_days(result),
+    }
+
+
+def write_trajectory(path, result):
+
+    with open(path, "w", newline='') as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(TRAJECTORY_HEADER)
+        csv_writer.writerows(trajectory_rows(result).tolist())
+
+
+def run_scenario(scenario,
+                 directory=None,
+                 backend="rk4",
+                 max_time=1000.0,
+                 write_trajectories=True,
+                 cache=None):
+
+    # runs one scenario dictionary to completion and returns its summary
+    # row. the trajectory is written to directory/<name>_trajectory.csv.
+    # cache is a cache.ResultCache shared with the other runs, or None
+    parameters, options = split_scenario(scenario)
+    name = options.get("name", "scenario")
+    backend = options.get("backend", backend)
+
+    result = simulation.run(parameters,
+                            backend=backend,
+                            max_time=options.get("max_time", max_time),
+                            cache=cache)
+
+    if directory is not None and write_trajectories:
+        write_trajectory(
+            os.path.join(directory, name + "_trajectory.csv"), result)
+
+    return summary(name, backend, result)
+
+
+def _run_scenario_star(arguments):
+
+    # Pool.imap passes a single argument
+    return run_scenario(*arguments)
+
+
+def run_batch(scenarios,
+              directory,
+              backend="rk4",
+              max_time=1000.0,
+              jobs=1,
+              write_trajectories=True,
+              progress=None,
+              cache=None):
+
+    # runs every scenario and writes directory/summary.csv, one row per
+    # scenario in input order. jobs > 1 spreads the scenarios over that many
+    # worker processes
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    names = [scenario.get("name") for scenario in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError("scenario names must be unique")
+
+    arguments = [(scenario, directory, backend, max_time, write_trajectories,
+                  cache) for scenario in scenarios]
+
+    rows = []
+    if jobs > 1 and len(scenarios) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(scenarios)))
+        try:
+            for row in pool.imap(_run_scenario_star, arguments):
+                rows.append(row)
+                if progress is not None:
+                    progress(len(rows), len(scenarios), row)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for argument in arguments:
+            rows.append(_run_scenario_star(argument))
+            if progress is not None:
+                progress(len(rows), len(scenarios), rows[-1])
+
+    with open(os.path.join(directory, "summary.csv"), "w",
+              newline='') as csv_file:
+        csv_writer = csv.DictWriter(csv_file, SUMMARY_HEADER)
+        csv_writer.writeheader()
+        csv_writer.writerows(rows)
+
+    return rows
@@ -0,0 +1,188 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+from bin.engine import ensemble, events
+from bin.engine.simulation_state import steps_to
+
+# part of every key, increase it whenever a change to the engine changes
+# the numbers it produces, so older results are no longer used
+ENGINE_VERSION = 4
+
+DEFAULT_DIRECTORY = os.environ.get(
+    "SIMULATOR_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "simulator"))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+FINISHED = (events.HOST_DEATH, events.CLEARANCE)
+
+
+def canonical(value):
+
+    # json-ready copy of value where equal parameter sets are written the
+    # same way: tuples become lists, numbers become floats
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in value.items()}
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        return [canonical(item) for item in value]
+    elif isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    elif isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    return value
+
+
+def result_key(parameters, backend="rk4", solver_options=None):
+
+    # sha256 of the full parameter set, which holds the treatment type and
+    # the time step, with the backend, its options and the engine version.
+    # max_time is not part of it, see ResultCache.get
+    description = {
+        "engine_version": ENGINE_VERSION,
+        "backend": backend,
+        "solver_options": canonical(solver_options or {}),
+        "parameters": canonical(parameters.to_dict()),
+    }
+    return hashlib.sha256(
+        json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _truncate(result, max_time):
+
+    # a fixed-step run up to max_time is the start of any longer one
+    last = min(steps_to(max_time, result.parameters.time_step),
+               len(result.times) - 1)
+    return result._replace(times=result.times[:last + 1],
+                           states=result.states[:last + 1],
+                           uptake=result.uptake[:last + 1],
+                           outcome=ensemble.OUTCOME_NAMES[ensemble.RUNNING],
+                           final_time=result.times[last],
+                           n_steps=last,
+                           switches=tuple(
+                               switch for switch in result.switches
+                               if switch[0] <= result.times[last]))
+
+
+class ResultCache(object):
+
+    # SimulationResults on local disk, one pickle per key, shared by the
+    # user interface, the batch runner and sweeps. the least recently used
+    # files are removed once the directory grows over max_bytes
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+
+        self.directory = directory or DEFAULT_DIRECTORY  # str
+        self.max_bytes = max_bytes  # int
+
+    def __repr__(self):
+
+        return "ResultCache(%r, max_bytes=%r)" % (self.directory,
+                                                  self.max_bytes)
+
+    def path(self, key):
+
+        return os.path.join(self.directory, key + ".pkl")
+
+    def _load(self, key):
+
+        path = self.path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                entry = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # marks the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def get(self, parameters, backend="rk4", max_time=None,
+            **solver_options):
+
+        # result of run(parameters, backend, max_time, **solver_options) or
+        # None. a run that ended in host death or clearance answers every
+        # longer max_time, and a fixed-step run also answers every shorter
+        # one. without max_time the stored result is returned as it is
+        result = self._load(result_key(parameters, backend, solver_options))
+        if result is None or max_time is None:
+            return result
+
+        if result.outcome in FINISHED and result.final_time <= max_time:
+            return result
+        if result.final_time == max_time:
+            return result
+        if backend == "rk4" and result.final_time > max_time:
+            return _truncate(result, max_time)
+        return None
+
+    def put(self, result, backend="rk4", **solver_options):
+
+        # keeps the longest result of a key: a finished one, or the one that
+        # reached the latest max_time
+        key = result_key(result.parameters, backend, solver_options)
+        stored = self._load(key)
+        if stored is not None and (stored.outcome in FINISHED or
+                                   stored.final_time >= result.final_time):
+            return
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+
+        # written to a temporary file of this process first, so readers and
+        # other writers never see a truncated entry
+        path = self.path(key)
+        temporary_path = path + "." + str(os.getpid()) + ".tmp"
+        with open(temporary_path, "wb") as cache_file:
+            pickle.dump(result, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+        self.evict()
+
+    def entries(self):
+
+        # (last use, size, path) of every entry, least recently used first
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.pkl")):
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,167 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+
+def hermite_coefficients(time_step, state, new_state, slope, new_slope):
+
+    # cubic Hermite interpolant between two accepted states, in the same
+    # polynomial form as the Runge-Kutta continuous extensions
+    difference = (new_state - state) / time_step
+    return np.stack((slope, 3 * difference - 2 * slope - new_slope,
+                     slope + new_slope - 2 * difference),
+                    axis=-1)
+
+
+class DenseOutput(object):
+
+    def __init__(self, initial_time, initial_state):
+
+        self._times = [initial_time]  # list[float]
+        self._states = [np.array(initial_state, dtype=np.float64)
+                        ]  # list[ndarray]
+
+        # each accepted step is y(t) = y_old + h * Q @ (x, x**2, ...) with
+        # x = (t - t_old) / h
+        self._coefficients = []  # list[ndarray]
+        self._stacked = None  # (t_old, h, y_old, Q) arrays, built on demand
+
+        self._n_evaluations = 0  # int
+        self._n_rejected = 0  # int
+        self._status = None  # anything the solver wants to report
+
+    def add_step(self, new_time, new_state, coefficients):
+
+        self._times.append(new_time)
+        self._states.append(new_state)
+        self._coefficients.append(coefficients)
+        self._stacked = None
+
+    def truncate(self, time):
+
+        # shortens the last step so that the output ends at time, used when an
+        # event is located inside it
+        new_state = self.sample_step(len(self._coefficients) - 1, time)
+        scale = ((time - self._times[-2]) /
+                 (self._times[-1] - self._times[-2]))**np.arange(
+                     self._coefficients[-1].shape[-1])
+
+        coefficients = self._coefficients.pop()
+        self._times.pop()
+        self._states.pop()
+        self.add_step(time, new_state, coefficients * scale)
+
+    def extend(self, other):
+
+        # appends a solution that starts where this one ends
+        for time, state, coefficients in zip(other._times[1:],
+                                             other._states[1:],
+                                             other._coefficients):
+            self.add_step(time, state, coefficients)
+        self._n_evaluations += other._n_evaluations
+        self._n_rejected += other._n_rejected
+
+    def sample_step(self, index, time):
+
+        # state at time inside step index, cheaper than sample for the
+        # repeated evaluations of a root search
+        coefficients = self._coefficients[index]
+        step_size = self._times[index + 1] - self._times[index]
+        x = (time - self._times[index]) / step_size
+        return self._states[index] + step_size * np.matmul(
+            coefficients, x**np.arange(1, coefficients.shape[-1] + 1))
+
+    def count_evaluations(self, n=1):
+
+        self._n_evaluations += n
+
+    def count_rejected(self, n=1):
+
+        self._n_rejected += n
+
+    def set_status(self, status):
+
+        self._status = status
+
+    def get_status(self):
+
+        return self._status
+
+    def get_times(self):
+
+        return np.array(self._times)
+
+    def get_states(self):
+
+        return np.array(self._states)
+
+    def get_final_time(self):
+
+        return self._times[-1]
+
+    def get_final_state(self):
+
+        return self._states[-1]
+
+    def get_number_of_steps(self):
+
+        return len(self._coefficients)
+
+    def get_number_of_evaluations(self):
+
+        return self._n_evaluations
+
+    def get_number_of_rejected_steps(self):
+
+        return self._n_rejected
+
+    def _stack(self):
+
+        if self._stacked is None:
+            order = max(q.shape[-1] for q in self._coefficients)
+            coefficients = np.zeros((len(self._coefficients), ) +
+                                    self._coefficients[0].shape[:-1] +
+                                    (order, ))
+            for i, q in enumerate(self._coefficients):
+                coefficients[i, ..., :q.shape[-1]] = q
+
+            times = np.array(self._times)
+            self._stacked = (times[:-1], np.diff(times),
+                             np.array(self._states[:-1]), coefficients)
+
+        return self._stacked
+
+    def sample(self, times):
+
+        # states at arbitrary times inside the integrated interval, e.g. a
+        # regular grid for the plots or the csv export. times outside of it
+        # get the first or last state
+        times = np.clip(np.asarray(times, dtype=np.float64), self._times[0],
+                        self._times[-1])
+        if not self._coefficients:
+            return np.broadcast_to(self._states[0],
+                                   times.shape + self._states[0].shape).copy()
+
+        step_start, step_size, step_state, coefficients = self._stack()
+        index = np.clip(
+            np.searchsorted(step_start, times.ravel(), side="right") - 1, 0,
+            step_start.size - 1)
+
+        h = step_size[index]
+        x = (times.ravel() - step_start[index]) / h
+        order = coefficients.shape[-1]
+        powers = np.cumprod(np.repeat(x[:, None], order, axis=1), axis=1)
+        powers = powers.reshape((x.size, ) + (1, ) *
+                                (coefficients.ndim - 2) + (order, ))
+        h = h.reshape((x.size, ) + (1, ) * (step_state.ndim - 1))
+
+        states = step_state[index] + h * np.sum(
+            coefficients[index] * powers, axis=-1)
+        return states.reshape(times.shape + step_state.shape[1:])
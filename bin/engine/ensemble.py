@@ -0,0 +1,129 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+from bin.engine import model
+
+# row outcomes, the only place they are defined
+RUNNING = 0
+HOST_DEATH = 1
+CLEARED = 2
+# candidates a regimen search stopped because a finished one beats them
+DOMINATED = 3
+# name of each outcome, as simulation.run and the events report it
+OUTCOME_NAMES = ("running", "host death", "clearance", "dominated")
+
+EnsembleResult = namedtuple(
+    "EnsembleResult",
+    ["final_time", "final_state", "outcome", "times", "states"])
+
+
+def termination(state, host_death_density):
+
+    # same checks as add_points: densities below the extinction density are
+    # plotted as 1e-9, all microbes at or below it means clearance and a total
+    # at or above host_death_density means host death
+    microbes = state[..., model.MICROBES]
+    shown = np.where(microbes >= model.EXTINCTION_DENSITY, microbes,
+                     0.000000001)
+
+    outcome = np.full(state.shape[:-1], RUNNING, dtype=np.int8)
+    outcome[np.all(shown <= model.EXTINCTION_DENSITY, axis=-1)] = CLEARED
+    outcome[(shown[..., 0] + shown[..., 1] + shown[..., 2] +
+             shown[..., 3]) >= host_death_density] = HOST_DEATH
+
+    return outcome
+
+
+def run_ensemble(parameters,
+                 initial_states,
+                 host_death_density,
+                 schedule,
+                 time_step=1 / (24 * 5.0),
+                 max_time=1000.0,
+                 record_every=None,
+                 panel=None):
+
+    # parameters is a (N, model.N_PARAMETERS) matrix and initial_states a
+    # (N, 7) matrix, one row per host. schedule is a treatment schedule
+    # shared by every row, e.g. Parameters.treatment_schedule(), or a
+    # treatment.RowSchedules with one per row. all rows advance in
+    # lock-step, a row stops as soon as its host dies or its microbes are
+    # cleared. with a pharmacokinetics.DrugPanel the states carry the drug
+    # concentrations after the seven compartments and schedule is not used
+    parameters = np.atleast_2d(np.asarray(parameters, dtype=np.float64))
+    n_rows = parameters.shape[0]
+
+    n_columns = model.N_COMPARTMENTS
+    if panel is not None:
+        n_columns += panel.n_drugs
+    state = np.array(np.broadcast_to(initial_states, (n_rows, n_columns)),
+                     dtype=np.float64)
+    death_density = np.array(np.broadcast_to(host_death_density, (n_rows, )),
+                             dtype=np.float64)
+
+    final_time = np.full(n_rows, max_time, dtype=np.float64)
+    final_state = state.copy()
+    outcome = termination(state, death_density)
+    final_time[outcome != RUNNING] = 0.0
+
+    times = [0.0] if record_every else None
+    states = [state.copy()] if record_every else None
+
+    # only the rows still running are integrated, compacted whenever some stop
+    rows = np.flatnonzero(outcome == RUNNING)
+    active_state = state[rows]
+    active_coeffs = model.coefficients(parameters[rows])
+    active_death = death_density[rows]
+    if panel is None:
+        active_schedule = schedule.select_rows(rows)
+
+    current_time_point = 0.0
+    step = 0
+    while rows.size and current_time_point < max_time:
+        if panel is None:
+            uptake = active_schedule.uptake(current_time_point, active_state)
+            active_state = model.rk4_step(active_state, active_coeffs, uptake,
+                                          time_step)
+        else:
+            active_state = panel.rk4_step(active_state, active_coeffs,
+                                          current_time_point, time_step)
+        step += 1
+        # counted in steps, a time summed step by step drifts off the grid
+        current_time_point = step * time_step
+
+        if record_every and step % record_every == 0:
+            state[rows] = active_state
+            times.append(current_time_point)
+            states.append(state.copy())
+
+        row_outcome = termination(active_state, active_death)
+        stopped = row_outcome != RUNNING
+        if stopped.any():
+            outcome[rows[stopped]] = row_outcome[stopped]
+            final_time[rows[stopped]] = current_time_point
+            final_state[rows[stopped]] = active_state[stopped]
+            state[rows[stopped]] = active_state[stopped]
+
+            running = ~stopped
+            rows = rows[running]
+            active_state = active_state[running]
+            active_coeffs = model.select_rows(active_coeffs, running)
+            active_death = active_death[running]
+            if panel is None:
+                active_schedule = active_schedule.select_rows(running)
+
+    final_state[rows] = active_state
+    final_time[rows] = current_time_point
+
+    if record_every:
+        return EnsembleResult(final_time, final_state, outcome,
+                              np.array(times), np.array(states))
+    return EnsembleResult(final_time, final_state, outcome, None, None)
@@ -0,0 +1,291 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+from bin.engine import model
+from bin.engine.jacobian import state_jacobian
+from bin.engine.parameters import MODEL_PARAMETER_OF
+from bin.engine.sensitivity import parameter_jacobian
+
+# stability of an equilibrium at constant antimicrobial uptake. the memory
+# pool only integrates effector cells and extinct microbes stay extinct, so
+# zero eigenvalues are common: such equilibria are neutral unless another
+# eigenvalue makes them unstable
+STABLE = "stable"
+NEUTRAL = "neutral"
+UNSTABLE = "unstable"
+
+# tipping points along a continued branch
+STABILITY_CHANGE = "stability change"
+FOLD = "fold"
+EXTINCTION = "extinction"
+INVASION = "invasion"
+
+Equilibrium = namedtuple(
+    "Equilibrium",
+    ["state", "eigenvalues", "stability", "residual", "converged"])
+Branch = namedtuple("Branch",
+                    ["values", "states", "stability", "tipping_points"])
+TippingPoint = namedtuple("TippingPoint", ["kind", "value", "state"])
+
+
+def classify(eigenvalues, tolerance=1e-9):
+
+    real = np.real(eigenvalues)
+    scale = max(1.0, np.max(np.abs(eigenvalues)))
+    if np.any(real > tolerance * scale):
+        return UNSTABLE
+    elif np.all(real < -tolerance * scale):
+        return STABLE
+    return NEUTRAL
+
+
+def _residual(derivative, state, atol):
+
+    # rates relative to the densities, per day
+    return np.max(np.abs(derivative) / (atol + np.abs(state)))
+
+
+def _frozen(state, derivative):
+
+    # extinct microbes without inflow stay extinct, Newton must not use their
+    # densities to balance the equations of the others
+    frozen = np.zeros(state.shape, dtype=bool)
+    frozen[model.MICROBES] = ((state[model.MICROBES] <
+                               model.EXTINCTION_DENSITY) &
+                              (derivative[model.MICROBES] == 0))
+    return frozen
+
+
+def _newton(fun, jac, state, tolerance, max_iterations, atol):
+
+    # damped Newton on fun(state) = 0 with least squares steps, the Jacobian
+    # is singular along the neutral directions
+    value = fun(state)
+    residual = _residual(value, state, atol)
+    for _ in range(max_iterations):
+        if residual < tolerance:
+            return state, residual, True
+
+        # relative to the densities, which span many orders of magnitude
+        scale = atol + np.abs(state)
+        jacobian = jac(state) * scale / scale[:, None]
+        jacobian[:, _frozen(state, value)] = 0
+        relative_step = np.linalg.lstsq(jacobian, -value / scale,
+                                        rcond=None)[0]
+
+        # a density loses at most 90% per iteration, so the trivial zero
+        # solution does not swallow every other
+        damping = min(1.0, 0.9 / max(0.9, -np.min(relative_step)))
+        while damping > 1e-6:
+            new_state = np.maximum(state + damping * scale * relative_step,
+                                   0.0)
+            new_value = fun(new_state)
+            new_residual = _residual(new_value, new_state, atol)
+            if new_residual < residual:
+                break
+            damping /= 2
+        else:
+            return state, residual, False
+
+        state, value, residual = new_state, new_value, new_residual
+
+    return state, residual, residual < tolerance
+
+
+def find_equilibrium(parameters,
+                     guess,
+                     uptake=0.0,
+                     tolerance=1e-10,
+                     max_iterations=100,
+                     atol=model.EXTINCTION_DENSITY):
+
+    # fixed point of model.derivative, the right-hand side of
+    # calculate_next_time_step, near guess with the antimicrobial uptake held
+    # at uptake (0 untreated, 1 under continuous treatment)
+    coeffs = model.coefficients(parameters.model_parameters())
+    state, residual, converged = _newton(
+        lambda y: model.derivative(y, coeffs, uptake),
+        lambda y: state_jacobian(y, coeffs, uptake),
+        np.array(guess, dtype=np.float64), tolerance, max_iterations, atol)
+
+    eigenvalues = np.linalg.eigvals(state_jacobian(state, coeffs, uptake))
+    return Equilibrium(state, eigenvalues, classify(eigenvalues), residual,
+                       converged)
+
+
+def guesses(parameters):
+
+    # one starting point per combination of surviving microbes: none,
+    # sensitive only, resistant only and both, filling up the growth limit
+    # of each environment, where Newton heads for the crowded solution.
+    # with microbes present naive precursors are used up and effectors have
+    # to vanish, otherwise the memory pool keeps growing
+    present = {
+        "none": (),
+        "sensitive": (model.PS, model.BS),
+        "resistant": (model.PR, model.BR),
+        "both": (model.PS, model.BS, model.PR, model.BR)
+    }
+    capacity = {
+        model.PS: parameters.growth_limitation_density,
+        model.PR: parameters.growth_limitation_density,
+        model.BS: parameters.growth_limitation_density_BF,
+        model.BR: parameters.growth_limitation_density_BF
+    }
+
+    result = {}
+    for name, compartments in present.items():
+        state = np.zeros(model.N_COMPARTMENTS)
+        for compartment in compartments:
+            state[compartment] = capacity[compartment] / (len(compartments) //
+                                                          2)
+        if not compartments:
+            state[model.NAIVE] = parameters.initial_precursor_cell_density
+        result[name] = state
+    return result
+
+
+def equilibria(parameters, uptake=0.0, **newton_options):
+
+    # distinct converged equilibria reached from guesses()
+    found = []
+    for guess in guesses(parameters).values():
+        candidate = find_equilibrium(parameters, guess, uptake,
+                                     **newton_options)
+        if candidate.converged and not any(
+                np.allclose(candidate.state,
+                            other.state,
+                            rtol=1e-6,
+                            atol=model.EXTINCTION_DENSITY)
+                for other in found):
+            found.append(candidate)
+    return found
+
+
+def continue_equilibrium(parameters,
+                         field,
+                         stop,
+                         state,
+                         uptake=0.0,
+                         step=0.01,
+                         min_step=1e-6,
+                         max_step=0.1,
+                         max_points=2000,
+                         tolerance=1e-10,
+                         atol=model.EXTINCTION_DENSITY):
+
+    # pseudo-arclength continuation of the equilibrium near state while the
+    # Parameters field (e.g. antimicrobial_mean_concentration) goes from its
+    # value in parameters to stop. densities are scaled by the starting
+    # state and the field by the distance to stop, step sizes are in these
+    # units. tipping points are reported at the first point past them
+    index = model.PARAMETER_INDEX[MODEL_PARAMETER_OF[field]]
+    vector = parameters.model_parameters()
+    start = vector[index]
+    if stop == start:
+        raise ValueError("stop must differ from the current " + field)
+
+    def coefficients_at(value):
+        p = vector.copy()
+        p[index] = value
+        return model.coefficients(p)
+
+    # first point, converged at the starting value
+    equilibrium = find_equilibrium(parameters, state, uptake, tolerance,
+                                   atol=atol)
+    if not equilibrium.converged:
+        raise ValueError("no equilibrium near the given state")
+
+    x_scale = np.maximum(np.abs(equilibrium.state), 1.0)
+    p_scale = stop - start
+
+    def unpack(y):
+        return np.maximum(y[:-1] * x_scale, 0.0), start + y[-1] * p_scale
+
+    def system(y):
+        x, value = unpack(y)
+        coeffs = coefficients_at(value)
+        derivative = model.derivative(x, coeffs, uptake)
+        f = derivative / x_scale
+        jacobian = np.empty((model.N_COMPARTMENTS, model.N_COMPARTMENTS + 1))
+        jacobian[:, :-1] = (state_jacobian(x, coeffs, uptake) * x_scale /
+                            x_scale[:, None])
+        jacobian[:, :-1][:, _frozen(x, derivative)] = 0
+        jacobian[:, -1] = (parameter_jacobian(x, coeffs, uptake)[:, index] *
+                           p_scale / x_scale)
+        return f, jacobian, x, coeffs
+
+    def forward_tangent(y):
+        # branch direction towards stop, used again whenever a microbe
+        # compartment crosses the extinction density and the branch kinks
+        _, jacobian, _, _ = system(y)
+        tangent = np.append(
+            np.linalg.lstsq(jacobian[:, :-1], -jacobian[:, -1],
+                            rcond=None)[0], 1.0)
+        return tangent / np.linalg.norm(tangent)
+
+    y = np.append(equilibrium.state / x_scale, 0.0)
+    tangent = forward_tangent(y)
+
+    values = [start]
+    states = [equilibrium.state]
+    stability = [equilibrium.stability]
+    tipping_points = []
+    alive = equilibrium.state[model.MICROBES] >= model.EXTINCTION_DENSITY
+
+    while len(values) < max_points and 0.0 <= y[-1] < 1.0:
+        predicted = y + step * tangent
+
+        # Newton on the equilibrium equations plus the arclength condition
+        corrected = predicted.copy()
+        converged = False
+        for _ in range(20):
+            f, jacobian, x, coeffs = system(corrected)
+            residual = np.append(f, np.dot(tangent, corrected - predicted))
+            if _residual(f * x_scale, x, atol) < tolerance:
+                converged = True
+                break
+            corrected = corrected + np.linalg.lstsq(
+                np.vstack((jacobian, tangent)), -residual, rcond=None)[0]
+            corrected[:-1] = np.maximum(corrected[:-1], 0.0)
+
+        if not converged:
+            step /= 2
+            if step < min_step:
+                break
+            continue
+
+        new_tangent = corrected - y
+        new_tangent /= np.linalg.norm(new_tangent)
+        x, value = unpack(corrected)
+        eigenvalues = np.linalg.eigvals(state_jacobian(x, coeffs, uptake))
+        new_stability = classify(eigenvalues)
+
+        new_alive = x[model.MICROBES] >= model.EXTINCTION_DENSITY
+        if np.any(alive & ~new_alive):
+            tipping_points.append(TippingPoint(EXTINCTION, value, x))
+        if np.any(new_alive & ~alive):
+            tipping_points.append(TippingPoint(INVASION, value, x))
+        if np.any(new_alive != alive):
+            new_tangent = forward_tangent(corrected)
+        elif new_tangent[-1] * tangent[-1] < 0:
+            tipping_points.append(TippingPoint(FOLD, value, x))
+        if new_stability != stability[-1]:
+            tipping_points.append(TippingPoint(STABILITY_CHANGE, value, x))
+
+        y, tangent, alive = corrected, new_tangent, new_alive
+        values.append(value)
+        states.append(x)
+        stability.append(new_stability)
+        step = min(step * 1.5, max_step)
+
+    return Branch(np.array(values), np.array(states), stability,
+                  tipping_points)
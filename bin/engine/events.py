@@ -0,0 +1,228 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+from bin.engine import ensemble, model
+from bin.engine.dense_output import DenseOutput
+from bin.engine.jacobian import state_jacobian
+from bin.engine.rk45 import solve_rk45
+from bin.engine.stiff import solve_rosenbrock
+from bin.engine.treatment import ThresholdSchedule
+
+# an event happens when function(time, state) crosses zero in direction
+# (+1 rising, -1 falling). terminal events end the run, the others switch
+# the antimicrobial uptake to the given value
+Event = namedtuple("Event",
+                   ["name", "function", "direction", "terminal", "uptake"])
+
+HOST_DEATH = ensemble.OUTCOME_NAMES[ensemble.HOST_DEATH]
+CLEARANCE = ensemble.OUTCOME_NAMES[ensemble.CLEARED]
+TREATMENT_START = "treatment start"
+TREATMENT_END = "treatment end"
+SYMPTOMS = "symptoms"
+REMISSION = "remission"
+DOSE_CHANGE = "dose change"
+
+
+def host_death_event(host_death_density):
+
+    return Event(HOST_DEATH,
+                 lambda time, state: model.total_microbes(state) -
+                 host_death_density, 1, True, None)
+
+
+def clearance_event():
+
+    # every microbe compartment at or below the extinction density
+    return Event(CLEARANCE,
+                 lambda time, state: np.max(state[..., model.MICROBES],
+                                            axis=-1) -
+                 model.EXTINCTION_DENSITY, -1, True, None)
+
+
+def treatment_events(schedule):
+
+    # switches of a state dependent schedule, located as events. schedules
+    # that only depend on time announce their switches with next_switch
+    if isinstance(schedule, ThresholdSchedule):
+        threshold = schedule.threshold
+        function = lambda time, state: model.total_microbes(state) - threshold
+        return [
+            Event(SYMPTOMS, function, 1, False, 1.0),
+            Event(REMISSION, function, -1, False, 0.0)
+        ]
+
+    return []
+
+
+def switch_name(old_uptake, new_uptake):
+
+    if old_uptake == 0:
+        return TREATMENT_START
+    elif new_uptake == 0:
+        return TREATMENT_END
+    return DOSE_CHANGE
+
+
+def crossed(event, old_value, new_value):
+
+    if event.direction > 0:
+        return old_value < 0 <= new_value
+    return old_value > 0 >= new_value
+
+
+def locate(event, solution, tolerance):
+
+    # Illinois variant of regula falsi on the dense output of the last step
+    index = solution.get_number_of_steps() - 1
+    times = solution.get_times()
+    a, b = times[-2], times[-1]
+    fa = event.function(a, solution.sample_step(index, a))
+    fb = event.function(b, solution.sample_step(index, b))
+
+    side = 0
+    while b - a > tolerance:
+        c = (a * fb - b * fa) / (fb - fa)
+        if not a < c < b:
+            c = (a + b) / 2
+        fc = event.function(c, solution.sample_step(index, c))
+
+        if crossed(event, fa, fc):
+            b, fb = c, fc
+            if side == -1:
+                fa /= 2
+            side = -1
+        else:
+            a, fa = c, fc
+            if side == 1:
+                fb /= 2
+            side = 1
+
+    return b
+
+
+def solve_with_events(coeffs,
+                      schedule,
+                      initial_state,
+                      final_time,
+                      host_death_density,
+                      solver="rk45",
+                      min_segment=1 / (24 * 5.0),
+                      event_tolerance=1e-9,
+                      **solver_options):
+
+    # integrates a single host with the treatment uptake held constant
+    # between switches. a time schedule's switches end the segments exactly,
+    # so whole constant intervals are crossed in as few steps as the
+    # tolerances allow. every step that crosses an event is cut back to the
+    # located root and the integration restarts there, so the adaptive
+    # solvers never step across a treatment switch. after a state dependent
+    # switch the uptake is held for at least min_segment, like the fixed
+    # step does, so an adaptive threshold the drug pushes straight back
+    # cannot chatter
+    terminal_events = [host_death_event(host_death_density), clearance_event()]
+    switch_events = treatment_events(schedule)
+
+    time = 0.0
+    state = np.array(initial_state, dtype=np.float64)
+    if schedule.state_dependent:
+        uptake = float(schedule.uptake(time, state))
+    else:
+        uptake = schedule.level_after(time)
+
+    solution = DenseOutput(time, state)
+    solution.set_status("finished")
+    history = []  # list[(time, event name, uptake from then on or None)]
+    last_switch = -np.inf
+
+    # host already dead or microbes already cleared
+    for event in terminal_events:
+        if event.direction * event.function(time, state) >= 0:
+            history.append((time, event.name, None))
+            solution.set_status(event.name)
+            return solution, history
+
+    while time < final_time:
+        segment_uptake = uptake
+        holding = time < last_switch + min_segment
+        switch_time = schedule.next_switch(time)
+        if holding:
+            horizon = min(final_time, last_switch + min_segment)
+            events = terminal_events
+        else:
+            horizon = min(final_time, switch_time)
+            events = terminal_events + [
+                event for event in switch_events
+                if event.uptake != segment_uptake
+            ]
+
+        values = [event.function(time, state) for event in events]
+        found = []
+
+        def stop(t, y):
+            for i, event in enumerate(events):
+                value = event.function(t, y)
+                if crossed(event, values[i], value):
+                    found.append(event)
+                values[i] = value
+            return bool(found)
+
+        fun = lambda t, y: model.derivative(y, coeffs, segment_uptake)
+        if solver == "rosenbrock":
+            jac = lambda t, y: state_jacobian(y, coeffs, segment_uptake)
+            segment = solve_rosenbrock(fun, jac, time, state, horizon,
+                                       stop=stop, **solver_options)
+        else:
+            segment = solve_rk45(fun, time, state, horizon, stop=stop,
+                                 **solver_options)
+
+        event = None
+        if found and segment.get_number_of_steps():
+            # earliest of the events crossed in the last step
+            event_time, event = min(
+                ((locate(event, segment, event_tolerance), event)
+                 for event in found),
+                key=lambda pair: pair[0])
+            segment.truncate(event_time)
+            history.append((event_time, event.name, event.uptake))
+
+        solution.extend(segment)
+        time = solution.get_final_time()
+        state = solution.get_final_state()
+
+        if event is not None and event.terminal:
+            solution.set_status(event.name)
+            break
+        if segment.get_status() == "step size too small":
+            solution.set_status(segment.get_status())
+            break
+
+        if event is not None:
+            uptake = event.uptake
+            last_switch = time
+        elif not schedule.state_dependent:
+            if horizon == switch_time and segment.get_status() == "finished":
+                new_uptake = schedule.level_after(switch_time)
+                if new_uptake != uptake:
+                    history.append(
+                        (time, switch_name(uptake, new_uptake), new_uptake))
+                    uptake = new_uptake
+        elif holding:
+            # end of the holding period, switch if the regime changed
+            regime = float(schedule.uptake(time, state))
+            if regime != uptake:
+                history.append((time, [
+                    event.name for event in switch_events
+                    if event.uptake == regime
+                ][0], regime))
+                uptake = regime
+                last_switch = time
+
+    return solution, history
@@ -0,0 +1,224 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import multiprocessing
+import numpy as np
+from bin.engine import ensemble, model, treatment
+from bin.engine.parameters import Parameters
+
+# outputs of evaluate, one value per sample
+RESISTANT_FRACTION = "resistant_fraction"
+TIME_TO_CLEARANCE = "time_to_clearance"
+HOST_DEATH = ensemble.OUTCOME_NAMES[ensemble.HOST_DEATH]
+OUTPUTS = (RESISTANT_FRACTION, TIME_TO_CLEARANCE, HOST_DEATH)
+
+# fields shared by every row of an ensemble run
+_NOT_SAMPLED = ("treatment_type", "time_step")
+
+SobolIndices = namedtuple("SobolIndices",
+                          ["names", "first_order", "total_order", "variance"])
+
+
+def around_defaults(names, spread=0.5, base=None):
+
+    # bounds from (1 - spread) to (1 + spread) times the base value of each
+    # field, e.g. the growth, attachment, mutation and immune rates
+    base = base or Parameters()
+    return {
+        name: ((1 - spread) * getattr(base, name),
+               (1 + spread) * getattr(base, name))
+        for name in names
+    }
+
+
+def scale_samples(unit_samples, bounds):
+
+    # unit hypercube samples (n, k) to parameter values, columns in bounds
+    # order. a bound (low, high, "log") is sampled uniformly in log10
+    samples = np.empty_like(unit_samples)
+    for i, bound in enumerate(bounds.values()):
+        low, high = bound[0], bound[1]
+        if len(bound) > 2 and bound[2] == "log":
+            samples[:, i] = 10**(np.log10(low) + unit_samples[:, i] *
+                                 (np.log10(high) - np.log10(low)))
+        else:
+            samples[:, i] = low + unit_samples[:, i] * (high - low)
+    return samples
+
+
+def latin_hypercube(n, k, seed=None):
+
+    # n points in [0, 1)^k, exactly one in each of the n strata of every
+    # dimension
+    rng = np.random.default_rng(seed)
+    strata = np.argsort(rng.random((k, n)), axis=1).T
+    return (strata + rng.random((n, k))) / n
+
+
+def _unit_base_samples(n, k, seed):
+
+    # the two independent base matrices of the Saltelli design, scrambled
+    # Sobol points when scipy is installed, Latin hypercubes otherwise
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        points = latin_hypercube(n, 2 * k, seed)
+    else:
+        points = qmc.Sobol(2 * k, scramble=True, seed=seed).random(n)
+    return points[:, :k], points[:, k:]
+
+
+def saltelli_samples(n, bounds, seed=None):
+
+    # (n * (k + 2), k) design: n rows of A, n rows of B, then for every
+    # parameter i the n rows of A with column i taken from B
+    k = len(bounds)
+    a, b = _unit_base_samples(n, k, seed)
+
+    blocks = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+
+    return scale_samples(np.concatenate(blocks), bounds)
+
+
+def _ensemble_inputs(samples, names, base):
+
+    rows = []
+    for sample in samples:
+        parameters = base.copy(**dict(zip(names, sample.tolist())))
+        rows.append((parameters.model_parameters(),
+                     parameters.initial_state(),
+                     parameters.host_death_density,
+                     parameters.treatment_schedule()))
+
+    return (np.array([row[0] for row in rows]),
+            np.array([row[1] for row in rows]),
+            np.array([row[2] for row in rows]),
+            treatment.RowSchedules([row[3] for row in rows]))
+
+
+def _evaluate_chunk(arguments):
+
+    samples, names, base, at_time, max_time = arguments
+    parameters, initial_states, death_density, schedules = (
+        _ensemble_inputs(samples, names, base))
+
+    record_every = max(1, int(round(at_time / base.time_step)))
+    result = ensemble.run_ensemble(parameters,
+                                   initial_states,
+                                   death_density,
+                                   schedules,
+                                   time_step=base.time_step,
+                                   max_time=max_time,
+                                   record_every=record_every)
+
+    # hosts that stopped earlier keep their last state in the recording. if
+    # every host stopped before at_time, nothing was recorded
+    if at_time < max_time and len(result.times) > 1:
+        state = result.states[1]
+    else:
+        state = result.final_state
+
+    # densities below the extinction density count as none, so cleared
+    # hosts have no resistant fraction
+    microbes = state[:, model.MICROBES]
+    microbes = np.where(microbes >= model.EXTINCTION_DENSITY, microbes, 0.0)
+    total = model.total_microbes(microbes)
+    resistant = microbes[:, model.PR] + microbes[:, model.BR]
+
+    return {
+        RESISTANT_FRACTION:
+        np.where(total > 0, resistant / np.where(total > 0, total, 1), 0.0),
+        # runs that are not cleared by max_time count as cleared at max_time
+        TIME_TO_CLEARANCE:
+        np.where(result.outcome == ensemble.CLEARED, result.final_time,
+                 max_time),
+        HOST_DEATH:
+        (result.outcome == ensemble.HOST_DEATH).astype(np.float64),
+    }
+
+
+def evaluate(samples,
+             names,
+             base=None,
+             at_time=30.0,
+             max_time=365.0,
+             chunk_size=4096,
+             jobs=1):
+
+    # every row of samples, a value for each of names, replaces those fields
+    # of base. rows are integrated together by the lock-step ensemble, chunk
+    # by chunk, and the chunks can be spread over jobs processes. treatment
+    # type and time step are those of base
+    base = base or Parameters()
+    names = list(names)
+    for name in names:
+        if name in _NOT_SAMPLED:
+            raise ValueError(name + " cannot be sampled, it is shared by "
+                             "every run of the ensemble")
+
+    samples = np.atleast_2d(np.asarray(samples, dtype=np.float64))
+    arguments = [(samples[start:start + chunk_size], names, base, at_time,
+                  max_time)
+                 for start in range(0, samples.shape[0], chunk_size)]
+
+    if jobs > 1 and len(arguments) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(arguments)))
+        try:
+            chunks = pool.map(_evaluate_chunk, arguments)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        chunks = [_evaluate_chunk(argument) for argument in arguments]
+
+    return {
+        output: np.concatenate([chunk[output] for chunk in chunks])
+        for output in OUTPUTS
+    }
+
+
+def sobol_indices(values, names):
+
+    # first order (Saltelli 2010) and total order (Jansen) estimators from
+    # the output of a saltelli_samples design
+    values = np.asarray(values, dtype=np.float64)
+    k = len(names)
+    n = values.size // (k + 2)
+    f_a = values[:n]
+    f_b = values[n:2 * n]
+    f_ab = values[2 * n:].reshape(k, n)
+
+    variance = np.var(np.concatenate((f_a, f_b)))
+    if variance == 0:
+        return SobolIndices(list(names), np.zeros(k), np.zeros(k), 0.0)
+
+    first_order = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+    total_order = 0.5 * np.mean((f_a - f_ab)**2, axis=1) / variance
+    return SobolIndices(list(names), first_order, total_order, variance)
+
+
+def sobol_analysis(bounds,
+                   n=1024,
+                   base=None,
+                   outputs=OUTPUTS,
+                   seed=None,
+                   **evaluate_options):
+
+    # first and total order indices of every output for the parameters in
+    # bounds ({field: (low, high)} or (low, high, "log")), from
+    # n * (len(bounds) + 2) runs
+    names = list(bounds)
+    samples = saltelli_samples(n, bounds, seed)
+    values = evaluate(samples, names, base, **evaluate_options)
+    return {output: sobol_indices(values[output], names) for output in outputs}
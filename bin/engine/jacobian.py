@@ -0,0 +1,88 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+from bin.engine import model
+
+_MICROBE_ROWS = np.arange(model.PS, model.BR + 1)
+_PARTNER = np.array(model._PARTNER)
+_INFLOW_SOURCE = np.array(model._INFLOW_SOURCE)
+_MUTATION_SOURCE = np.array(model._MUTATION_SOURCE)
+_IMMUNE_ROWS = np.arange(model.NAIVE, model.MEMORY + 1)
+
+
+def state_jacobian(state, coeffs, antimicrobial_uptake):
+
+    # d derivative / d state of model.derivative, shape (..., 7, 7). the
+    # extinction masks and the adaptive treatment threshold are piecewise
+    # constant, their derivatives are zero almost everywhere
+    state = np.asarray(state, dtype=np.float64)
+    uptake = np.asarray(antimicrobial_uptake, dtype=np.float64)[..., None]
+    jacobian = np.zeros(state.shape + (model.N_COMPARTMENTS, ))
+
+    microbes = state[..., model.MICROBES]
+    partner = state[..., _PARTNER]
+    inflow_density = state[..., _INFLOW_SOURCE]
+    mutation_density = state[..., _MUTATION_SOURCE]
+    alive = microbes >= model.EXTINCTION_DENSITY
+
+    drug = uptake * coeffs.inhibition * coeffs.concentration
+    immune_kill = coeffs.lymphocyte_inhibition * model.total_immune_cells(
+        state)[..., None]
+    crowding = microbes * coeffs.growth / coeffs.capacity
+
+    own = (coeffs.growth * (1 - (microbes + partner) / coeffs.capacity) -
+           coeffs.death - coeffs.loss - coeffs.mutation_loss - drug -
+           immune_kill - crowding)
+    inflow_rate = np.where(
+        alive, coeffs.inflow_rate,
+        (inflow_density >= model.EXTINCTION_DENSITY) * coeffs.inflow_rate)
+    mutation_rate = np.where(
+        alive, coeffs.mutation_inflow_rate,
+        (mutation_density >= model.EXTINCTION_DENSITY) *
+        coeffs.mutation_inflow_rate)
+
+    # partner and mutation source can be the same compartment, so entries
+    # are accumulated instead of assigned
+    jacobian[..., _MICROBE_ROWS, _MICROBE_ROWS] += np.where(alive, own, 0)
+    jacobian[..., _MICROBE_ROWS, _PARTNER] += np.where(alive, -crowding, 0)
+    jacobian[..., _MICROBE_ROWS, _INFLOW_SOURCE] += inflow_rate
+    jacobian[..., _MICROBE_ROWS, _MUTATION_SOURCE] += mutation_rate
+    jacobian[..., model.MICROBES, model.IMMUNE] = np.where(
+        alive, -coeffs.lymphocyte_inhibition * microbes, 0)[..., None]
+
+    immune = state[..., model.IMMUNE]
+    total = model.total_microbes(state)[..., None]
+    stimulation = total / (coeffs.half_max_growth + total)
+    rest = 1 - stimulation
+    d_stimulation = coeffs.half_max_growth / (coeffs.half_max_growth +
+                                              total)**2
+
+    jacobian[..., _IMMUNE_ROWS, _IMMUNE_ROWS] += (
+        coeffs.immune_slope * stimulation - coeffs.immune_decay * rest)
+    jacobian[..., model.IMMUNE, model.NAIVE] += (coeffs.immune_offset_rate *
+                                                 stimulation)
+    jacobian[..., model.IMMUNE, model.EFFECTOR] += (coeffs.memory_conversion *
+                                                    coeffs.memory_decay * rest)
+    jacobian[..., model.IMMUNE, model.MICROBES] = (
+        (coeffs.immune_offset_rate * state[..., model.NAIVE, None] +
+         coeffs.immune_slope * immune + coeffs.immune_decay * immune -
+         coeffs.memory_conversion * state[..., model.EFFECTOR, None] *
+         coeffs.memory_decay) * d_stimulation)[..., None]
+
+    return jacobian
+
+
+def jacobian_field(coeffs, schedule):
+
+    # jac(time, state) matching model.vector_field
+    def jac(time, state):
+        return state_jacobian(state, coeffs, schedule.uptake(time, state))
+
+    return jac
@@ -0,0 +1,325 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+
+# state vector layout, the last axis of every state array
+PS, PR, BS, BR, NAIVE, EFFECTOR, MEMORY = range(7)
+COMPARTMENTS = ("PS", "PR", "BS", "BR", "naive", "effector", "memory")
+N_COMPARTMENTS = len(COMPARTMENTS)
+MICROBES = slice(PS, BR + 1)
+IMMUNE = slice(NAIVE, MEMORY + 1)
+
+# densities below this value are treated as extinct by the equations
+EXTINCTION_DENSITY = 0.001
+
+# parameter vector layout, the last axis of every parameter array.
+# scalar arguments come first, in the order calculate_next_time_step receives
+# them, followed by bs_variables, br_variables, bs_variablesBF,
+# br_variablesBF and limitation_variables, and finally the natural death rate
+PARAMETERS = (
+    "immune_cells_proliferation_rate",
+    "lymphocyte_inhibition",
+    "converted_effectors",
+    "effector_cells_decay",
+    "antimicrobial_concentration",
+    "immune_response_half_max_growth",
+    "growth_rate_PS",
+    "antimicrobial_inhibition_PS",
+    "attachment_rate_PS",
+    "mutation_rate_PS",
+    "growth_rate_PR",
+    "antimicrobial_inhibition_PR",
+    "attachment_rate_PR",
+    "growth_rate_BS",
+    "antimicrobial_inhibition_BS",
+    "detachment_rate_BS",
+    "mutation_rate_BS",
+    "growth_rate_BR",
+    "antimicrobial_inhibition_BR",
+    "detachment_rate_BR",
+    "maximum_density_P",
+    "maximum_density_B",
+    "microbes_natural_death",
+)
+N_PARAMETERS = len(PARAMETERS)
+PARAMETER_INDEX = {name: i for i, name in enumerate(PARAMETERS)}
+
+# per-compartment coefficients, broadcast against the (..., 7) state arrays.
+# microbe coefficients are ordered (PS, PR, BS, BR), immune coefficients
+# (naive, effector, memory)
+Coefficients = namedtuple("Coefficients", [
+    "growth", "capacity", "loss", "mutation_loss", "inhibition",
+    "inflow_rate", "mutation_inflow_rate", "death", "lymphocyte_inhibition",
+    "half_max_growth", "concentration", "immune_offset_rate", "immune_slope",
+    "immune_decay", "memory_conversion", "memory_decay"
+])
+
+# logistic competitor, inflow source and mutation source of each microbe
+_PARTNER = [PR, PS, BR, BS]
+_INFLOW_SOURCE = [BS, BR, PS, PR]
+_MUTATION_SOURCE = [PS, PS, BS, BS]
+
+
+def pack_parameters(immune_cells_proliferation_rate, lymphocyte_inhibition,
+                    converted_effectors, effector_cells_decay,
+                    antimicrobial_concentration,
+                    immune_response_half_max_growth, bs_variables,
+                    br_variables, bs_variablesBF, br_variablesBF,
+                    limitation_variables, microbes_natural_death):
+
+    # same arguments as calculate_next_time_step, packed into one vector
+    return np.array(
+        (immune_cells_proliferation_rate, lymphocyte_inhibition,
+         converted_effectors, effector_cells_decay,
+         antimicrobial_concentration, immune_response_half_max_growth) +
+        tuple(bs_variables) + tuple(br_variables) + tuple(bs_variablesBF) +
+        tuple(br_variablesBF) + tuple(limitation_variables) +
+        (microbes_natural_death, ),
+        dtype=np.float64)
+
+
+def coefficients(parameters):
+
+    p = np.asarray(parameters, dtype=np.float64)
+    zero = np.zeros(p.shape[:-1])
+
+    def column(name):
+        return p[..., PARAMETER_INDEX[name]] if name is not None else zero
+
+    def stack(*names):
+        return np.stack([column(name) for name in names], axis=-1)
+
+    return Coefficients(
+        growth=stack("growth_rate_PS", "growth_rate_PR", "growth_rate_BS",
+                     "growth_rate_BR"),
+        capacity=stack("maximum_density_P", "maximum_density_P",
+                       "maximum_density_B", "maximum_density_B"),
+        loss=stack("attachment_rate_PS", "attachment_rate_PR",
+                   "detachment_rate_BS", "detachment_rate_BR"),
+        # only sensitive microbes lose density through mutation
+        mutation_loss=stack("mutation_rate_PS", None, "mutation_rate_BS",
+                            None),
+        inhibition=stack("antimicrobial_inhibition_PS",
+                         "antimicrobial_inhibition_PR",
+                         "antimicrobial_inhibition_BS",
+                         "antimicrobial_inhibition_BR"),
+        inflow_rate=stack("detachment_rate_BS", "detachment_rate_BR",
+                          "attachment_rate_PS", "attachment_rate_PR"),
+        # only resistant microbes gain density through mutation
+        mutation_inflow_rate=stack(None, "mutation_rate_PS", None,
+                                   "mutation_rate_BS"),
+        death=stack("microbes_natural_death"),
+        lymphocyte_inhibition=stack("lymphocyte_inhibition"),
+        half_max_growth=stack("immune_response_half_max_growth"),
+        concentration=stack("antimicrobial_concentration"),
+        # naive precursors feed effectors at twice the proliferation rate
+        immune_offset_rate=np.stack(
+            (zero, 2 * column("immune_cells_proliferation_rate"), zero),
+            axis=-1),
+        immune_slope=np.stack(
+            (-1 * column("immune_cells_proliferation_rate"),
+             column("immune_cells_proliferation_rate"), zero),
+            axis=-1),
+        immune_decay=stack(None, "effector_cells_decay", None),
+        memory_conversion=stack(None, None, "converted_effectors"),
+        memory_decay=stack(None, None, "effector_cells_decay"))
+
+
+def total_microbes(state):
+
+    return state[..., PS] + state[..., PR] + state[..., BS] + state[..., BR]
+
+
+def total_immune_cells(state):
+
+    return state[..., NAIVE] + state[..., EFFECTOR] + state[..., MEMORY]
+
+
+def frozen_terms(frozen, coeffs, antimicrobial_uptake, drug=None):
+
+    # everything a compartment's derivative takes from the other compartments.
+    # calculate_next_time_step holds these at the start of the step for all
+    # four Runge-Kutta stages, only the compartment's own density moves.
+    # drug, the antimicrobial kill rate of each microbe compartment, replaces
+    # uptake * inhibition * concentration when given
+
+    partner = frozen[..., _PARTNER]
+    inflow_density = frozen[..., _INFLOW_SOURCE]
+    mutation_density = frozen[..., _MUTATION_SOURCE]
+    inflow = (coeffs.inflow_rate * inflow_density +
+              coeffs.mutation_inflow_rate * mutation_density)
+
+    # inflow when the compartment itself is extinct, each source only counts
+    # if it is not extinct either
+    extinct_inflow = (
+        (inflow_density >= EXTINCTION_DENSITY) * coeffs.inflow_rate *
+        inflow_density + (mutation_density >= EXTINCTION_DENSITY) *
+        coeffs.mutation_inflow_rate * mutation_density)
+
+    if drug is None:
+        uptake = np.asarray(antimicrobial_uptake, dtype=np.float64)[..., None]
+        drug = uptake * coeffs.inhibition * coeffs.concentration
+    immune_kill = coeffs.lymphocyte_inhibition * total_immune_cells(
+        frozen)[..., None]
+
+    total = total_microbes(frozen)[..., None]
+    stimulation = total / (coeffs.half_max_growth + total)
+    rest = 1 - stimulation
+
+    # immune derivative is (offset + slope * own) * stimulation -
+    # decay * own * rest + constant
+    offset = coeffs.immune_offset_rate * frozen[..., NAIVE, None]
+    constant = (coeffs.memory_conversion * frozen[..., EFFECTOR, None] *
+                coeffs.memory_decay * rest)
+
+    return (partner, inflow, extinct_inflow, drug, immune_kill, stimulation,
+            rest, offset, constant)
+
+
+def stage_derivative(own, coeffs, terms):
+
+    (partner, inflow, extinct_inflow, drug, immune_kill, stimulation, rest,
+     offset, constant) = terms
+
+    microbes = own[..., MICROBES]
+    immune = own[..., IMMUNE]
+
+    result = np.empty_like(own)
+    result[..., MICROBES] = np.where(
+        microbes >= EXTINCTION_DENSITY, microbes *
+        (coeffs.growth * (1 - (microbes + partner) / coeffs.capacity) -
+         coeffs.death - coeffs.loss - coeffs.mutation_loss - drug -
+         immune_kill) + inflow, extinct_inflow)
+    result[..., IMMUNE] = ((offset + coeffs.immune_slope * immune) *
+                           stimulation - coeffs.immune_decay * immune * rest +
+                           constant)
+
+    return result
+
+
+def derivative(state, coeffs, antimicrobial_uptake):
+
+    # right-hand side of the coupled system, every compartment sees the
+    # current densities of all the others
+    return stage_derivative(state, coeffs,
+                            frozen_terms(state, coeffs, antimicrobial_uptake))
+
+
+def rk4_step(state, coeffs, antimicrobial_uptake, time_step, drug=None):
+
+    # same scheme as calculate_next_time_step, for any number of leading axes
+    terms = frozen_terms(state, coeffs, antimicrobial_uptake, drug)
+
+    k1 = stage_derivative(state, coeffs, terms)
+    k2 = stage_derivative(state + (time_step / 2) * k1, coeffs, terms)
+    k3 = stage_derivative(state + (time_step / 2) * k2, coeffs, terms)
+    k4 = stage_derivative(state + time_step * k3, coeffs, terms)
+
+    return state + (time_step / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+def scalar_coefficients(parameters):
+
+    # coefficients of a single host as tuples of floats, for rk4_step_scalar
+    return Coefficients(*(tuple(coefficient.tolist())
+                          for coefficient in coefficients(parameters)))
+
+
+def rk4_step_scalar(state, coeffs, antimicrobial_uptake, time_step):
+
+    # rk4_step of a single host on plain floats, the same operations in the
+    # same order, so the results are identical. numpy's per call overhead
+    # dominates arrays of seven values, so single hosts step here. state is
+    # a sequence of seven floats, coeffs comes from scalar_coefficients, a
+    # list is returned
+    (growth, capacity, loss, mutation_loss, inhibition, inflow_rate,
+     mutation_inflow_rate, death, lymphocyte_inhibition, half_max_growth,
+     concentration, immune_offset_rate, immune_slope, immune_decay,
+     memory_conversion, memory_decay) = coeffs
+    death = death[0]
+    half_step = time_step / 2
+    sixth_step = time_step / 6
+
+    total = state[PS] + state[PR] + state[BS] + state[BR]
+    immune_kill = lymphocyte_inhibition[0] * (state[NAIVE] + state[EFFECTOR] +
+                                              state[MEMORY])
+    stimulation = total / (half_max_growth[0] + total)
+    rest = 1 - stimulation
+
+    result = []
+    for i in range(4):
+        own = state[i]
+        partner = state[_PARTNER[i]]
+        inflow_density = state[_INFLOW_SOURCE[i]]
+        mutation_density = state[_MUTATION_SOURCE[i]]
+        inflow = (inflow_rate[i] * inflow_density +
+                  mutation_inflow_rate[i] * mutation_density)
+        extinct_inflow = (
+            (inflow_rate[i] * inflow_density
+             if inflow_density >= EXTINCTION_DENSITY else 0.0) +
+            (mutation_inflow_rate[i] * mutation_density
+             if mutation_density >= EXTINCTION_DENSITY else 0.0))
+        drug = antimicrobial_uptake * inhibition[i] * concentration[0]
+        own_growth = growth[i]
+        own_capacity = capacity[i]
+        own_loss = loss[i]
+        own_mutation_loss = mutation_loss[i]
+
+        def derivative_of(density):
+            if density >= EXTINCTION_DENSITY:
+                return density * (own_growth *
+                                  (1 - (density + partner) / own_capacity) -
+                                  death - own_loss - own_mutation_loss -
+                                  drug - immune_kill) + inflow
+            return extinct_inflow
+
+        k1 = derivative_of(own)
+        k2 = derivative_of(own + half_step * k1)
+        k3 = derivative_of(own + half_step * k2)
+        k4 = derivative_of(own + time_step * k3)
+        result.append(own + sixth_step * (k1 + 2 * k2 + 2 * k3 + k4))
+
+    for i in range(3):
+        own = state[NAIVE + i]
+        offset = immune_offset_rate[i] * state[NAIVE]
+        slope = immune_slope[i]
+        decay = immune_decay[i]
+        constant = (memory_conversion[i] * state[EFFECTOR] * memory_decay[i] *
+                    rest)
+
+        def derivative_of(density):
+            return ((offset + slope * density) * stimulation -
+                    decay * density * rest + constant)
+
+        k1 = derivative_of(own)
+        k2 = derivative_of(own + half_step * k1)
+        k3 = derivative_of(own + half_step * k2)
+        k4 = derivative_of(own + time_step * k3)
+        result.append(own + sixth_step * (k1 + 2 * k2 + 2 * k3 + k4))
+
+    return result
+
+
+def select_rows(coeffs, rows):
+
+    # coefficients of a subset of the rows of a (N, ...) parameter matrix
+    return Coefficients(*(coefficient[rows] for coefficient in coeffs))
+
+
+def vector_field(coeffs, schedule):
+
+    # f(time, state) of the coupled system for the adaptive solvers, the
+    # antimicrobial uptake of the treatment schedule is re-evaluated at
+    # every stage
+    def fun(time, state):
+        return derivative(state, coeffs, schedule.uptake(time, state))
+
+    return fun
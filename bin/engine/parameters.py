@@ -0,0 +1,305 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+from bin.engine import model, treatment
+
+# scenario default parameters, as shown by the sliders and exponent buttons
+DEFAULT_PARAMETERS = {
+    "sensitive_initial_density_value": 10.0,
+    "sensitive_initial_density_exponent": ' e00',
+    "sensitive_initial_density_BF_exponent": ' e00',
+    "sensitive_initial_density_BF_value": 0.0,
+    "sensitive_growth_rate": 3.3,
+    "sensitive_growth_rate_BF": 1.5,
+    "sensitive_attachment_rate": 0.03,
+    "sensitive_detachment_rate": 0.0003,
+    "sensitive_antimicrobial_inhibition": 1.0,
+    "sensitive_antimicrobial_inhibition_BF": 0.8,
+    "sensitive_mutation_rate_value": 0.001,
+    "sensitive_mutation_rate_BF_value": 0.05,
+    "sensitive_mutation_rate_exponent": ' e00',
+    "sensitive_mutation_rate_BF_exponent": ' e00',
+    "resistant_initial_density": 0.0,
+    "resistant_initial_density_BF": 0.0,
+    "resistant_growth_rate": 1.1,
+    "resistant_growth_rate_BF": 0.5,
+    "resistant_attachment_rate": 0.03,
+    "resistant_detachment_rate": 0.0003,
+    "resistant_antimicrobial_inhibition": 0.1,
+    "resistant_antimicrobial_inhibition_BF": 0.08,
+    "lymphocyte_inhibition": 10**-5,
+    "natural_death": 0.03,
+    "host_death_density_value": 1.0,
+    "host_death_density_exponent": ' e10',
+    "growth_limitation_density_value": 1.0,
+    "growth_limitation_density_exponent": ' e10',
+    "growth_limitation_density_BF_value": 1.0,
+    "growth_limitation_density_BF_exponent": ' e10',
+    "initial_precursor_cell_density_value": 2.0,
+    "initial_precursor_cell_density_exponent": ' e02',
+    "immune_cell_proliferation_rate": 2.0,
+    "immune_cell_half_maximum_growth": 10**5,
+    "effector_decay_rate": 0.35,
+    "memory_cell_conversion_rate": 0.1,
+    "antimicrobial_mean_concentration_value": 10.0,
+    "antimicrobial_mean_concentration_exponent": ' e00',
+    "classic_delay": 3.5,
+    "classic_duration": 7.0,
+    "adaptive_symptoms_at_microbes_density_value": 1.0,
+    "adaptive_symptoms_at_microbes_density_exponent": ' e06',
+    "user_supp": False
+}
+
+# 24*5 steps per day
+DEFAULT_TIME_STEP = 1 / (24 * 5.0)
+
+# entry of model.PARAMETERS each field is packed into by model_parameters
+MODEL_PARAMETER_OF = {
+    "immune_cell_proliferation_rate": "immune_cells_proliferation_rate",
+    "lymphocyte_inhibition": "lymphocyte_inhibition",
+    "memory_cell_conversion_rate": "converted_effectors",
+    "effector_decay_rate": "effector_cells_decay",
+    "antimicrobial_mean_concentration": "antimicrobial_concentration",
+    "immune_cell_half_maximum_growth": "immune_response_half_max_growth",
+    "sensitive_growth_rate": "growth_rate_PS",
+    "sensitive_antimicrobial_inhibition": "antimicrobial_inhibition_PS",
+    "sensitive_attachment_rate": "attachment_rate_PS",
+    "sensitive_mutation_rate": "mutation_rate_PS",
+    "resistant_growth_rate": "growth_rate_PR",
+    "resistant_antimicrobial_inhibition": "antimicrobial_inhibition_PR",
+    "resistant_attachment_rate": "attachment_rate_PR",
+    "sensitive_growth_rate_BF": "growth_rate_BS",
+    "sensitive_antimicrobial_inhibition_BF": "antimicrobial_inhibition_BS",
+    "sensitive_detachment_rate": "detachment_rate_BS",
+    "sensitive_mutation_rate_BF": "mutation_rate_BS",
+    "resistant_growth_rate_BF": "growth_rate_BR",
+    "resistant_antimicrobial_inhibition_BF": "antimicrobial_inhibition_BR",
+    "resistant_detachment_rate": "detachment_rate_BR",
+    "growth_limitation_density": "maximum_density_P",
+    "growth_limitation_density_BF": "maximum_density_B",
+    "natural_death": "microbes_natural_death",
+}
+
+
+def with_exponent(value, exponent):
+
+    # slider value times the ' eXX' exponent button text
+    return value * 10**int(exponent[-2:])
+
+
+class Parameters(object):
+
+    # every value the scenario screen feeds the simulation, named like the
+    # Simulator properties
+    FIELDS = (
+        "sensitive_initial_density",
+        "sensitive_initial_density_BF",
+        "sensitive_growth_rate",
+        "sensitive_growth_rate_BF",
+        "sensitive_attachment_rate",
+        "sensitive_detachment_rate",
+        "sensitive_antimicrobial_inhibition",
+        "sensitive_antimicrobial_inhibition_BF",
+        "sensitive_mutation_rate",
+        "sensitive_mutation_rate_BF",
+        "resistant_initial_density",
+        "resistant_initial_density_BF",
+        "resistant_growth_rate",
+        "resistant_growth_rate_BF",
+        "resistant_attachment_rate",
+        "resistant_detachment_rate",
+        "resistant_antimicrobial_inhibition",
+        "resistant_antimicrobial_inhibition_BF",
+        "lymphocyte_inhibition",
+        "natural_death",
+        "host_death_density",
+        "growth_limitation_density",
+        "growth_limitation_density_BF",
+        "initial_precursor_cell_density",
+        "immune_cell_proliferation_rate",
+        "immune_cell_half_maximum_growth",
+        "effector_decay_rate",
+        "memory_cell_conversion_rate",
+        "antimicrobial_mean_concentration",
+        "treatment_type",
+        "classic_delay",
+        "classic_duration",
+        "adaptive_symptoms_at_microbes_density",
+        "user_supp",
+        "treatment_intervals",
+        "time_step",
+    )
+
+    def __init__(self, **kwargs):
+
+        d = DEFAULT_PARAMETERS
+        defaults = {
+            "sensitive_initial_density":
+            with_exponent(d["sensitive_initial_density_value"],
+                          d["sensitive_initial_density_exponent"]),
+            "sensitive_initial_density_BF":
+            with_exponent(d["sensitive_initial_density_BF_value"],
+                          d["sensitive_initial_density_BF_exponent"]),
+            "sensitive_mutation_rate":
+            with_exponent(d["sensitive_mutation_rate_value"],
+                          d["sensitive_mutation_rate_exponent"]),
+            "sensitive_mutation_rate_BF":
+            with_exponent(d["sensitive_mutation_rate_BF_value"],
+                          d["sensitive_mutation_rate_BF_exponent"]),
+            "host_death_density":
+            with_exponent(d["host_death_density_value"],
+                          d["host_death_density_exponent"]),
+            "growth_limitation_density":
+            with_exponent(d["growth_limitation_density_value"],
+                          d["growth_limitation_density_exponent"]),
+            "growth_limitation_density_BF":
+            with_exponent(d["growth_limitation_density_BF_value"],
+                          d["growth_limitation_density_BF_exponent"]),
+            "initial_precursor_cell_density":
+            with_exponent(d["initial_precursor_cell_density_value"],
+                          d["initial_precursor_cell_density_exponent"]),
+            "antimicrobial_mean_concentration":
+            with_exponent(d["antimicrobial_mean_concentration_value"],
+                          d["antimicrobial_mean_concentration_exponent"]),
+            "adaptive_symptoms_at_microbes_density":
+            with_exponent(
+                d["adaptive_symptoms_at_microbes_density_value"],
+                d["adaptive_symptoms_at_microbes_density_exponent"]),
+            # the scenario screen has no default treatment
+            "treatment_type": "Classic",
+            # (start, end, level) intervals of the "Schedule" treatment
+            "treatment_intervals": (),
+            "time_step": DEFAULT_TIME_STEP,
+        }
+
+        for name in Parameters.FIELDS:
+            if name in kwargs:
+                value = kwargs.pop(name)
+            elif name in defaults:
+                value = defaults[name]
+            else:
+                value = d[name]
+            setattr(self, name, value)
+
+        if kwargs:
+            raise TypeError("unknown parameters: " + ", ".join(sorted(kwargs)))
+
+    def to_dict(self):
+
+        return {name: getattr(self, name) for name in Parameters.FIELDS}
+
+    def copy(self, **changes):
+
+        values = self.to_dict()
+        values.update(changes)
+        return Parameters(**values)
+
+    def __eq__(self, other):
+
+        return isinstance(other, Parameters) and self.to_dict(
+        ) == other.to_dict()
+
+    def __repr__(self):
+
+        return "Parameters(" + ", ".join(
+            name + "=" + repr(getattr(self, name))
+            for name in Parameters.FIELDS) + ")"
+
+    def model_parameters(self):
+
+        # same tuples data_generator passes to calculate_next_time_step
+        return model.pack_parameters(
+            self.immune_cell_proliferation_rate, self.lymphocyte_inhibition,
+            self.memory_cell_conversion_rate, self.effector_decay_rate,
+            self.antimicrobial_mean_concentration,
+            self.immune_cell_half_maximum_growth,
+            (self.sensitive_growth_rate,
+             self.sensitive_antimicrobial_inhibition,
+             self.sensitive_attachment_rate, self.sensitive_mutation_rate),
+            (self.resistant_growth_rate,
+             self.resistant_antimicrobial_inhibition,
+             self.resistant_attachment_rate),
+            (self.sensitive_growth_rate_BF,
+             self.sensitive_antimicrobial_inhibition_BF,
+             self.sensitive_detachment_rate, self.sensitive_mutation_rate_BF),
+            (self.resistant_growth_rate_BF,
+             self.resistant_antimicrobial_inhibition_BF,
+             self.resistant_detachment_rate),
+            (self.growth_limitation_density,
+             self.growth_limitation_density_BF), self.natural_death)
+
+    def initial_state(self):
+
+        state = np.zeros(model.N_COMPARTMENTS)
+        state[model.PS] = self.sensitive_initial_density
+        state[model.PR] = self.resistant_initial_density
+        state[model.BS] = self.sensitive_initial_density_BF
+        state[model.BR] = self.resistant_initial_density_BF
+        state[model.NAIVE] = self.initial_precursor_cell_density
+        return state
+
+    def treatment_args(self):
+
+        # keyword arguments of antimicrobial_uptake_eq for the treatment type
+        if self.treatment_type == "Classic":
+            return {
+                "delay": self.classic_delay,
+                "duration": self.classic_duration
+            }
+        elif self.treatment_type == "Adaptive":
+            return {
+                "microbes_density_causing_symptoms":
+                self.adaptive_symptoms_at_microbes_density
+            }
+        elif self.treatment_type == "User":
+            return {"taking_antimicrobial": self.user_supp}
+        return {}
+
+    def treatment_schedule(self):
+
+        # the treatment compiled once into an object the solvers can query
+        # for the uptake and the next switching time
+        if self.treatment_type == "Classic":
+            return treatment.classic(self.classic_delay, self.classic_duration)
+        elif self.treatment_type == "Adaptive":
+            return treatment.ThresholdSchedule(
+                self.adaptive_symptoms_at_microbes_density)
+        elif self.treatment_type == "User":
+            return treatment.ConstantSchedule(float(self.user_supp))
+        elif self.treatment_type == "Schedule":
+            return treatment.IntervalSchedule(self.treatment_intervals)
+        raise ValueError("unknown treatment type " +
+                         repr(self.treatment_type) + ", expected one of " +
+                         ", ".join(treatment.TREATMENT_TYPES))
+
+
+def from_screen_values(**values):
+
+    # Parameters from any mix of Parameters fields and DEFAULT_PARAMETERS
+    # keys, where a density is set as slider value and ' eXX' exponent
+    # button. the half that is not given keeps its default
+    d = DEFAULT_PARAMETERS
+    fields = {}
+    for name in Parameters.FIELDS:
+        value_key = name + "_value"
+        exponent_key = name + "_exponent"
+        if value_key in values or exponent_key in values:
+            if name in values:
+                raise TypeError(name + " given both directly and as " +
+                                value_key + "/" + exponent_key)
+            fields[name] = with_exponent(values.pop(value_key, d[value_key]),
+                                         values.pop(exponent_key,
+                                                    d[exponent_key]))
+        elif name in values:
+            fields[name] = values.pop(name)
+
+    if values:
+        raise TypeError("unknown parameters: " + ", ".join(sorted(values)))
+    return Parameters(**fields)
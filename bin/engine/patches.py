@@ -0,0 +1,217 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+from bin.engine import ensemble, model
+
+PatchResult = namedtuple("PatchResult",
+                         ["times", "states", "outcome", "final_time"])
+
+
+def chain(n_patches, downstream, upstream=0.0):
+
+    # (source, target, rate) migrations between neighbouring patches of a
+    # line, e.g. segments of a gut with a flow towards the last one
+    migration = []
+    for patch in range(n_patches - 1):
+        migration.append((patch, patch + 1, downstream))
+        migration.append((patch + 1, patch, upstream))
+    return migration
+
+
+def linear_gradient(n_patches, first, last):
+
+    # one value per patch, e.g. drug concentrations falling along a tissue
+    return np.linspace(first, last, n_patches)
+
+
+class PatchModel(object):
+
+    # P connected patches, each with the seven compartments of the model and
+    # its own growth limitation densities and antimicrobial concentration,
+    # stored along an extra patch axis: states are (..., P, 7). microbes of
+    # the migrating compartments, planktonic by default, move between
+    # patches along the (source, target, rate) migrations, applied as a
+    # sparse product. every other parameter, and the treatment, are those of
+    # parameters. the treatment reacts to the microbes of all patches
+    # together, like host death and clearance
+    def __init__(self,
+                 parameters,
+                 n_patches,
+                 migration=(),
+                 growth_limitation_density=None,
+                 growth_limitation_density_BF=None,
+                 antimicrobial_concentration=None,
+                 migrating=(model.PS, model.PR)):
+
+        self.parameters = parameters  # Parameters
+        self.n_patches = n_patches  # int
+
+        def per_patch(values, default):
+            return np.array(np.broadcast_to(
+                default if values is None else values, (n_patches, )),
+                            dtype=np.float64)
+
+        matrix = np.tile(parameters.model_parameters(), (n_patches, 1))
+        for name, values, default in (
+            ("maximum_density_P", growth_limitation_density,
+             parameters.growth_limitation_density),
+            ("maximum_density_B", growth_limitation_density_BF,
+             parameters.growth_limitation_density_BF),
+            ("antimicrobial_concentration", antimicrobial_concentration,
+             parameters.antimicrobial_mean_concentration),
+        ):
+            matrix[:, model.PARAMETER_INDEX[name]] = per_patch(values, default)
+        self.patch_parameters = matrix  # (P, model.N_PARAMETERS)
+
+        # migrations sorted by target, each target's inflow is one reduceat
+        # segment
+        entries = sorted((target, source, rate)
+                         for source, target, rate in migration if rate != 0)
+        for target, source, _ in entries:
+            if not (0 <= source < n_patches and 0 <= target < n_patches):
+                raise ValueError("migration between unknown patches " +
+                                 repr((source, target)))
+            if target == source:
+                raise ValueError("migration from patch " + str(source) +
+                                 " to itself")
+        self._sources = np.array([e[1] for e in entries], dtype=np.intp)
+        self._rates = np.array([e[2] for e in entries], dtype=np.float64)
+        targets = np.array([e[0] for e in entries], dtype=np.intp)
+        self._targets, self._segments = np.unique(targets, return_index=True)
+
+        self._migrating = np.zeros(4)
+        self._migrating[list(migrating)] = 1.0
+
+        # emigration joins the attachment and detachment losses
+        emigration = np.zeros(n_patches)
+        np.add.at(emigration, self._sources, self._rates)
+        coeffs = model.coefficients(matrix)
+        self.coeffs = coeffs._replace(
+            loss=coeffs.loss +
+            emigration[:, None] * self._migrating)  # model.Coefficients
+
+    def __repr__(self):
+
+        return "PatchModel(n_patches=%d, migrations=%d)" % (self.n_patches,
+                                                            self._rates.size)
+
+    def initial_state(self, seeded=(0, )):
+
+        # the naive precursors of one host split evenly over the patches, so
+        # the host holds as many immune cells as without patches, and the
+        # initial microbe densities only in the seeded patches
+        state = np.zeros((self.n_patches, model.N_COMPARTMENTS))
+        state[:, model.NAIVE] = (self.parameters.initial_precursor_cell_density
+                                 / self.n_patches)
+        initial = self.parameters.initial_state()
+        state[list(seeded), model.MICROBES] = initial[model.MICROBES]
+        return state
+
+    def immigration(self, microbes):
+
+        # (..., P, 4) microbes arriving in every patch
+        result = np.zeros(np.shape(microbes))
+        if self._rates.size:
+            result[..., self._targets, :] = np.add.reduceat(
+                microbes[..., self._sources, :] *
+                (self._rates[:, None] * self._migrating),
+                self._segments,
+                axis=-2)
+        return result
+
+    def frozen_terms(self, frozen, antimicrobial_uptake):
+
+        # model.frozen_terms of every patch
+        return model.frozen_terms(
+            frozen, self.coeffs,
+            np.asarray(antimicrobial_uptake, dtype=np.float64)[..., None])
+
+    def stage_derivative(self, own, terms):
+
+        # model.stage_derivative of every patch plus the arrivals from the
+        # other patches. unlike the frozen inflows they follow the stages,
+        # so the microbes leaving a patch in a stage arrive in the others
+        # and migration conserves them. extinct microbes do not migrate
+        result = model.stage_derivative(own, self.coeffs, terms)
+        microbes = own[..., model.MICROBES]
+        result[..., model.MICROBES] += self.immigration(
+            np.where(microbes >= model.EXTINCTION_DENSITY, microbes, 0.0))
+        return result
+
+    def rk4_step(self, state, antimicrobial_uptake, time_step):
+
+        # model.rk4_step with the patch axis, antimicrobial_uptake has one
+        # value per host, shared by its patches
+        terms = self.frozen_terms(state, antimicrobial_uptake)
+
+        k1 = self.stage_derivative(state, terms)
+        k2 = self.stage_derivative(state + (time_step / 2) * k1, terms)
+        k3 = self.stage_derivative(state + (time_step / 2) * k2, terms)
+        k4 = self.stage_derivative(state + time_step * k3, terms)
+
+        return state + (time_step / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+    def host_state(self, state):
+
+        # (..., 7) densities summed over the patches
+        return np.sum(state, axis=-2)
+
+    def termination(self, state):
+
+        # ensemble.termination on each patch's microbes shown as in
+        # add_points, summed over the patches
+        microbes = state[..., model.MICROBES]
+        shown = np.where(microbes >= model.EXTINCTION_DENSITY, microbes,
+                         0.000000001)
+
+        outcome = np.full(np.shape(state)[:-2],
+                          ensemble.RUNNING,
+                          dtype=np.int8)
+        outcome[np.all(shown <= model.EXTINCTION_DENSITY,
+                       axis=(-2, -1))] = ensemble.CLEARED
+        outcome[np.sum(shown, axis=(-2, -1)) >=
+                self.parameters.host_death_density] = ensemble.HOST_DEATH
+        return outcome
+
+
+def run(patch_model, initial_state=None, max_time=1000.0, record_every=1):
+
+    # fixed-step run under the treatment of the model's parameters, to host
+    # death, clearance or max_time, recorded every record_every steps
+    parameters = patch_model.parameters
+    schedule = parameters.treatment_schedule()
+    time_step = parameters.time_step
+    if initial_state is None:
+        initial_state = patch_model.initial_state()
+    state = np.array(initial_state, dtype=np.float64)
+
+    current_time_point = 0.0
+    times = [current_time_point]
+    states = [state]
+    outcome = patch_model.termination(state)
+    step = 0
+    while outcome == ensemble.RUNNING and current_time_point < max_time:
+        uptake = schedule.uptake(current_time_point,
+                                 patch_model.host_state(state))
+        state = patch_model.rk4_step(state, uptake, time_step)
+        current_time_point += time_step
+        step += 1
+        outcome = patch_model.termination(state)
+        if step % record_every == 0 or outcome != ensemble.RUNNING:
+            times.append(current_time_point)
+            states.append(state)
+
+    if times[-1] != current_time_point:
+        times.append(current_time_point)
+        states.append(state)
+
+    return PatchResult(np.array(times), np.array(states), int(outcome),
+                       current_time_point)
@@ -0,0 +1,208 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+from bin.engine import ensemble, model
+
+PharmacokineticResult = namedtuple(
+    "PharmacokineticResult",
+    ["times", "states", "concentrations", "outcome", "final_time"])
+
+
+class Drug(object):
+
+    # one antimicrobial with first order elimination. doses are (time,
+    # amount) boluses that raise the concentration at once, infusion an
+    # IntervalSchedule whose levels are concentration added per day.
+    # inhibition is the kill rate per unit of concentration of the PS, PR,
+    # BS and BR microbes, like the antimicrobial inhibition parameters
+    def __init__(self, name, half_life, inhibition, doses=(), infusion=None):
+
+        if half_life <= 0:
+            raise ValueError("half life must be positive, got " +
+                             repr(half_life))
+        if len(inhibition) != 4:
+            raise ValueError("inhibition needs one value for each of PS, PR, "
+                             "BS and BR")
+
+        self.name = name  # str
+        self.half_life = float(half_life)  # float, days
+        self.inhibition = tuple(float(i) for i in inhibition)  # (PS,PR,BS,BR)
+        self.doses = sorted((float(time), float(amount))
+                            for time, amount in doses)  # list[(time, amount)]
+        self.infusion = infusion  # IntervalSchedule or None
+
+    def __repr__(self):
+
+        return "Drug(%r, half_life=%r, inhibition=%r, doses=%r, infusion=%r)" % (
+            self.name, self.half_life, self.inhibition, self.doses,
+            self.infusion)
+
+    def elimination_rate(self):
+
+        # per day, 0 for a drug that is never eliminated
+        return np.log(2) / self.half_life
+
+
+def drug_from_parameters(parameters, half_life, doses=(), infusion=None,
+                         name="Generic Antimicrobial"):
+
+    # the antimicrobial of a scenario, with the inhibition of each microbe
+    # compartment taken from its Parameters
+    return Drug(name, half_life,
+                (parameters.sensitive_antimicrobial_inhibition,
+                 parameters.resistant_antimicrobial_inhibition,
+                 parameters.sensitive_antimicrobial_inhibition_BF,
+                 parameters.resistant_antimicrobial_inhibition_BF), doses,
+                infusion)
+
+
+def repeated_doses(start, interval, count, amount):
+
+    # count boluses of amount, one every interval days
+    return [(start + i * interval, amount) for i in range(count)]
+
+
+class DrugPanel(object):
+
+    # several drugs compiled into arrays, so their concentrations advance as
+    # extra entries of the state vector, after the seven compartments of the
+    # model, with no loop over the drugs
+
+    def __init__(self, drugs):
+
+        if not drugs:
+            raise ValueError("a drug panel needs at least one drug")
+
+        self.drugs = list(drugs)  # list[Drug]
+        self.names = [drug.name for drug in self.drugs]  # list[str]
+        self.n_drugs = len(self.drugs)  # int
+        self.elimination = np.array(
+            [drug.elimination_rate() for drug in self.drugs])  # (n_drugs, )
+        self.inhibition = np.array(
+            [drug.inhibition for drug in self.drugs])  # (n_drugs, 4)
+
+        # boluses of every drug in one time-ordered list
+        boluses = sorted((time, index, amount)
+                         for index, drug in enumerate(self.drugs)
+                         for time, amount in drug.doses)
+        self._bolus_times = np.array([b[0] for b in boluses])
+        self._bolus_drugs = np.array([b[1] for b in boluses], dtype=np.intp)
+        self._bolus_amounts = np.array([b[2] for b in boluses])
+
+        # infusion rates of every drug between consecutive switches of any
+        switches = {-np.inf}
+        for drug in self.drugs:
+            if drug.infusion is not None:
+                for start, end, _ in drug.infusion.intervals:
+                    switches.update((start, end))
+        self._infusion_times = np.array(sorted(switches))
+        self._infusion_rates = np.array(
+            [[drug.infusion.level_after(time)
+              if drug.infusion is not None else 0.0
+              for drug in self.drugs]
+             for time in self._infusion_times])  # (n_switches, n_drugs)
+
+    def __repr__(self):
+
+        return "DrugPanel(" + repr(self.drugs) + ")"
+
+    def initial_concentrations(self):
+
+        return np.zeros(self.n_drugs)
+
+    def initial_state(self, parameters):
+
+        # the seven compartments of parameters followed by the concentrations
+        return np.concatenate(
+            (parameters.initial_state(), self.initial_concentrations()))
+
+    def boluses(self, time, time_step):
+
+        # concentration added to each drug by the doses in [time, time +
+        # time_step)
+        first, last = np.searchsorted(self._bolus_times,
+                                      (time, time + time_step))
+        added = np.zeros(self.n_drugs)
+        np.add.at(added, self._bolus_drugs[first:last],
+                  self._bolus_amounts[first:last])
+        return added
+
+    def infusion_rate(self, time):
+
+        index = np.searchsorted(self._infusion_times, time, side="right") - 1
+        return self._infusion_rates[index]
+
+    def advance(self, concentrations, time, time_step):
+
+        # exact solution of dC/dt = infusion - elimination * C over one step,
+        # the boluses of the step given at its start. returns the new
+        # concentrations and their average over the step
+        concentrations = concentrations + self.boluses(time, time_step)
+        rate = self.infusion_rate(time)
+
+        exponent = self.elimination * time_step
+        safe = np.where(exponent > 0, exponent, 1.0)
+        # (1 - exp(-kh)) / kh and (1 - that) / kh, both finite as kh -> 0
+        fraction = np.where(exponent > 1e-8, -np.expm1(-exponent) / safe,
+                            1.0 - exponent / 2)
+        average_fraction = np.where(exponent > 1e-8, (1 - fraction) / safe,
+                                    0.5 - exponent / 6)
+
+        new = (concentrations * np.exp(-exponent) +
+               rate * time_step * fraction)
+        average = concentrations * fraction + rate * time_step * average_fraction
+        return new, average
+
+    def kill(self, concentrations):
+
+        # antimicrobial kill rate of PS, PR, BS and BR, the effects of the
+        # drugs add up
+        return np.matmul(concentrations, self.inhibition)
+
+    def rk4_step(self, state, coeffs, time, time_step):
+
+        # one step of the model with the drug concentrations in the last
+        # n_drugs entries of state. the microbes see the average
+        # concentration of the step, held like every other frozen term, while
+        # the scenario's own antimicrobial uptake and concentration are unused
+        host = state[..., :model.N_COMPARTMENTS]
+        concentrations, exposure = self.advance(
+            state[..., model.N_COMPARTMENTS:], time, time_step)
+        host = model.rk4_step(host, coeffs, 0.0, time_step,
+                              drug=self.kill(exposure))
+        return np.concatenate((host, concentrations), axis=-1)
+
+
+def run(parameters, panel, max_time=1000.0, record_every=1):
+
+    # single host under the drugs of panel, to host death, clearance or
+    # max_time, recorded every record_every steps
+    result = ensemble.run_ensemble(parameters.model_parameters(),
+                                   panel.initial_state(parameters),
+                                   parameters.host_death_density,
+                                   None,
+                                   time_step=parameters.time_step,
+                                   max_time=max_time,
+                                   record_every=record_every,
+                                   panel=panel)
+
+    # the step that ended the run is kept even between recordings
+    times = result.times
+    states = result.states[:, 0]
+    if times[-1] < result.final_time[0]:
+        times = np.append(times, result.final_time[0])
+        states = np.vstack((states, result.final_state[:1]))
+
+    return PharmacokineticResult(times,
+                                 states[:, :model.N_COMPARTMENTS],
+                                 states[:, model.N_COMPARTMENTS:],
+                                 int(result.outcome[0]),
+                                 float(result.final_time[0]))
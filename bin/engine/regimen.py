@@ -0,0 +1,229 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import itertools
+import multiprocessing
+import numpy as np
+from bin.engine import ensemble, model, treatment
+
+# Parameters fields a regimen search can vary
+TREATMENT_FIELDS = ("classic_delay", "classic_duration",
+                    "adaptive_symptoms_at_microbes_density")
+CLASSIC_BOUNDS = {"classic_delay": (0.0, 14.0), "classic_duration": (1.0, 21.0)}
+ADAPTIVE_BOUNDS = {
+    "adaptive_symptoms_at_microbes_density": (1e2, 1e9, "log")
+}
+
+RegimenResult = namedtuple("RegimenResult", [
+    "names", "values", "exposure", "resistant", "outcome", "final_time"
+])
+
+
+def _evaluate_chunk(arguments):
+
+    # lock-step run of candidates that differ only in their treatment. a
+    # cleared candidate ends with no resistant microbes, so any candidate
+    # whose drug exposure is already higher is dominated and stopped
+    parameters, names, values, max_time = arguments
+    n_rows = values.shape[0]
+    concentration = parameters.antimicrobial_mean_concentration
+    time_step = parameters.time_step
+    coeffs = model.coefficients(parameters.model_parameters())
+    death_density = parameters.host_death_density
+
+    schedules = treatment.RowSchedules([
+        parameters.copy(**dict(zip(names, row))).treatment_schedule()
+        for row in values.tolist()
+    ])
+
+    state = np.tile(parameters.initial_state(), (n_rows, 1))
+    exposure = np.zeros(n_rows)
+    outcome = ensemble.termination(state, death_density)
+    final_time = np.zeros(n_rows)
+    final_state = state.copy()
+
+    rows = np.flatnonzero(outcome == ensemble.RUNNING)
+    active_state = state[rows]
+    active_schedule = schedules.select_rows(rows)
+    best_cleared = np.inf
+
+    current_time_point = 0.0
+    step = 0
+    while rows.size and current_time_point < max_time:
+        uptake = active_schedule.uptake(current_time_point, active_state)
+        exposure[rows] += uptake * concentration * time_step
+        active_state = model.rk4_step(active_state, coeffs, uptake, time_step)
+        step += 1
+        # counted in steps like the ensemble
+        current_time_point = step * time_step
+
+        row_outcome = ensemble.termination(active_state, death_density)
+        cleared = row_outcome == ensemble.CLEARED
+        if cleared.any():
+            best_cleared = min(best_cleared, np.min(exposure[rows[cleared]]))
+        row_outcome[(row_outcome == ensemble.RUNNING) &
+                    (exposure[rows] > best_cleared)] = ensemble.DOMINATED
+
+        stopped = row_outcome != ensemble.RUNNING
+        if stopped.any():
+            outcome[rows[stopped]] = row_outcome[stopped]
+            final_time[rows[stopped]] = current_time_point
+            final_state[rows[stopped]] = active_state[stopped]
+
+            running = ~stopped
+            rows = rows[running]
+            active_state = active_state[running]
+            active_schedule = active_schedule.select_rows(running)
+
+    final_state[rows] = active_state
+    final_time[rows] = current_time_point
+
+    # densities below the extinction density count as none
+    resistant = final_state[:, (model.PR, model.BR)]
+    resistant = np.sum(np.where(resistant >= model.EXTINCTION_DENSITY,
+                                resistant, 0.0),
+                       axis=1)
+    return exposure, resistant, outcome, final_time
+
+
+def evaluate(parameters,
+             names,
+             values,
+             max_time=365.0,
+             chunk_size=1024,
+             jobs=1):
+
+    # every row of values sets the fields in names, treatment parameters of
+    # parameters.treatment_type. rows are integrated in lock-step chunks,
+    # which can be spread over jobs processes. a candidate is only stopped
+    # as DOMINATED by a cleared candidate of its own chunk, so the chunks
+    # stay independent; which candidates run to the end depends on
+    # chunk_size, the Pareto front does not
+    if parameters.treatment_type not in ("Classic", "Adaptive"):
+        raise ValueError("regimens are searched for Classic or Adaptive "
+                         "treatments, not " + repr(parameters.treatment_type))
+    names = list(names)
+    for name in names:
+        if name not in TREATMENT_FIELDS:
+            raise ValueError(name + " is not a treatment parameter, expected "
+                             "one of " + ", ".join(TREATMENT_FIELDS))
+
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    arguments = [(parameters, names, values[start:start + chunk_size],
+                  max_time)
+                 for start in range(0, values.shape[0], chunk_size)]
+
+    if jobs > 1 and len(arguments) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(arguments)))
+        try:
+            chunks = pool.map(_evaluate_chunk, arguments)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        chunks = [_evaluate_chunk(argument) for argument in arguments]
+
+    exposure, resistant, outcome, final_time = (np.concatenate(arrays)
+                                                for arrays in zip(*chunks))
+    return RegimenResult(names, values, exposure, resistant, outcome,
+                         final_time)
+
+
+def pareto_front(result):
+
+    # indices of the candidates that avoid host death and that no other
+    # such candidate beats on both drug exposure and final resistant
+    # density, by increasing exposure
+    feasible = np.flatnonzero((result.outcome != ensemble.HOST_DEATH) &
+                              (result.outcome != ensemble.DOMINATED))
+    order = feasible[np.lexsort((result.resistant[feasible],
+                                 result.exposure[feasible]))]
+    front = []
+    for index in order:
+        if not front or result.resistant[index] < result.resistant[front[-1]]:
+            front.append(index)
+    return np.array(front, dtype=np.intp)
+
+
+def _to_unit(values, bounds):
+
+    unit = np.empty_like(values)
+    for i, bound in enumerate(bounds.values()):
+        low, high = bound[0], bound[1]
+        if len(bound) > 2 and bound[2] == "log":
+            unit[:, i] = ((np.log10(values[:, i]) - np.log10(low)) /
+                          (np.log10(high) - np.log10(low)))
+        else:
+            unit[:, i] = (values[:, i] - low) / (high - low)
+    return unit
+
+
+def _from_unit(unit, bounds):
+
+    values = np.empty_like(unit)
+    for i, bound in enumerate(bounds.values()):
+        low, high = bound[0], bound[1]
+        if len(bound) > 2 and bound[2] == "log":
+            values[:, i] = 10**(np.log10(low) + unit[:, i] *
+                                (np.log10(high) - np.log10(low)))
+        else:
+            values[:, i] = low + unit[:, i] * (high - low)
+    return values
+
+
+def optimise(parameters,
+             bounds=None,
+             points=9,
+             levels=3,
+             **evaluate_options):
+
+    # coarse-to-fine grid search of the treatment parameters in bounds
+    # ({field: (low, high)} or (low, high, "log")), by default the classic
+    # delay and duration or the adaptive threshold. a grid of points per
+    # axis is refined levels times around the current Pareto front, with
+    # half the spacing each time. returns every evaluated candidate, see
+    # pareto_front
+    if bounds is None:
+        bounds = (CLASSIC_BOUNDS if parameters.treatment_type == "Classic"
+                  else ADAPTIVE_BOUNDS)
+    names = list(bounds)
+
+    axis = np.linspace(0.0, 1.0, points)
+    unit = np.array(list(itertools.product(axis, repeat=len(names))))
+    result = evaluate(parameters, names, _from_unit(unit, bounds),
+                      **evaluate_options)
+    spacing = 1.0 / (points - 1)
+
+    for _ in range(levels - 1):
+        spacing /= 2
+        front = _to_unit(result.values[pareto_front(result)], bounds)
+        offsets = np.array(
+            list(itertools.product((-spacing, 0.0, spacing),
+                                   repeat=len(names))))
+        candidates = np.clip((front[:, None, :] + offsets).reshape(
+            -1, len(names)), 0.0, 1.0)
+
+        # only new candidates are evaluated
+        known = {tuple(row) for row in np.round(
+            _to_unit(result.values, bounds), 12)}
+        candidates = np.array([
+            row for row in np.unique(np.round(candidates, 12), axis=0)
+            if tuple(row) not in known
+        ])
+        if not candidates.size:
+            break
+
+        new = evaluate(parameters, names, _from_unit(candidates, bounds),
+                       **evaluate_options)
+        result = RegimenResult(
+            names, *(np.concatenate((old, added))
+                     for old, added in zip(result[1:], new[1:])))
+
+    return result
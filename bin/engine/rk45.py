@@ -0,0 +1,159 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+from bin.engine.dense_output import DenseOutput
+
+# Dormand-Prince 5(4) tableau
+C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1])
+A = [
+    np.array([]),
+    np.array([1 / 5]),
+    np.array([3 / 40, 9 / 40]),
+    np.array([44 / 45, -56 / 15, 32 / 9]),
+    np.array([19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729]),
+    np.array([
+        9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656
+    ]),
+]
+B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+# difference between the 5th and 4th order solutions, last entry is the
+# first-same-as-last stage
+E = np.array([
+    -71 / 57600, 0, 71 / 16695, -71 / 1920, 17253 / 339200, -22 / 525, 1 / 40
+])
+# continuous extension of order 4
+P = np.array([
+    [
+        1, -8048581381 / 2820520608, 8663915743 / 2820520608,
+        -12715105075 / 11282082432
+    ],
+    [0, 0, 0, 0],
+    [
+        0, 131558114200 / 32700410799, -68118460800 / 10900136933,
+        87487479700 / 32700410799
+    ],
+    [
+        0, -1754552775 / 470086768, 14199869525 / 1410260304,
+        -10690763975 / 1880347072
+    ],
+    [
+        0, 127303824393 / 49829197408, -318862633887 / 49829197408,
+        701980252875 / 199316789632
+    ],
+    [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10.0
+ERROR_EXPONENT = -1 / 5
+
+
+def error_norm(error, state, new_state, rtol, atol):
+
+    # rms over the compartments, worst row when several hosts share the step
+    scale = atol + rtol * np.maximum(np.abs(state), np.abs(new_state))
+    return np.max(np.sqrt(np.mean((error / scale)**2, axis=-1)))
+
+
+def initial_step(fun, time, state, slope, order, rtol, atol):
+
+    # Hairer, Norsett and Wanner, Solving ODEs I, section II.4
+    scale = atol + rtol * np.abs(state)
+    d0 = np.max(np.sqrt(np.mean((state / scale)**2, axis=-1)))
+    d1 = np.max(np.sqrt(np.mean((slope / scale)**2, axis=-1)))
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+
+    new_slope = fun(time + h0, state + h0 * slope)
+    d2 = np.max(np.sqrt(np.mean(((new_slope - slope) / scale)**2,
+                                axis=-1))) / h0
+    if d1 <= 1e-15 and d2 <= 1e-15:
+        h1 = max(1e-6, h0 * 1e-3)
+    else:
+        h1 = (0.01 / max(d1, d2))**(1 / (order + 1))
+
+    return min(100 * h0, h1)
+
+
+def rk45_step(fun, time, state, slope, time_step):
+
+    stages = [slope]
+    for c, a in zip(C[1:], A[1:]):
+        stage_state = state + time_step * sum(
+            coefficient * k for coefficient, k in zip(a, stages))
+        stages.append(fun(time + c * time_step, stage_state))
+
+    new_state = state + time_step * sum(
+        coefficient * k for coefficient, k in zip(B, stages))
+    new_slope = fun(time + time_step, new_state)
+    stages.append(new_slope)
+
+    return new_state, new_slope, np.stack(stages, axis=-1)
+
+
+def solve_rk45(fun,
+               initial_time,
+               initial_state,
+               final_time,
+               rtol=1e-6,
+               atol=1e-6,
+               first_step=None,
+               max_step=np.inf,
+               stop=None):
+
+    # embedded Dormand-Prince integration of y' = fun(t, y) from initial_time
+    # to final_time, or until stop(t, y) returns True after an accepted step.
+    # state arrays may have leading axes, all rows then share the step size
+    time = float(initial_time)
+    state = np.array(initial_state, dtype=np.float64)
+    solution = DenseOutput(time, state)
+
+    slope = fun(time, state)
+    solution.count_evaluations()
+    if first_step is None:
+        time_step = initial_step(fun, time, state, slope, 4, rtol, atol)
+        solution.count_evaluations()
+    else:
+        time_step = first_step
+
+    while time < final_time:
+        if stop is not None and stop(time, state):
+            solution.set_status("stopped")
+            return solution
+
+        time_step = min(time_step, max_step, final_time - time)
+        new_state, new_slope, stages = rk45_step(fun, time, state, slope,
+                                                 time_step)
+        solution.count_evaluations(6)
+
+        error = time_step * np.sum(stages * E, axis=-1)
+        norm = error_norm(error, state, new_state, rtol, atol)
+
+        if norm < 1:
+            factor = MAX_FACTOR if norm == 0 else min(
+                MAX_FACTOR, SAFETY * norm**ERROR_EXPONENT)
+            solution.add_step(time + time_step, new_state,
+                              np.matmul(stages, P))
+            time += time_step
+            state, slope = new_state, new_slope
+            time_step *= factor
+        else:
+            solution.count_rejected()
+            time_step *= max(MIN_FACTOR, SAFETY * norm**ERROR_EXPONENT)
+            if time_step < 1e-12 * max(1.0, abs(time)):
+                solution.set_status("step size too small")
+                return solution
+
+    if stop is not None and stop(time, state):
+        solution.set_status("stopped")
+    else:
+        solution.set_status("finished")
+    return solution
@@ -0,0 +1,214 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+from bin.engine import model
+from bin.engine.jacobian import state_jacobian
+from bin.engine.rk45 import solve_rk45
+
+_I = model.PARAMETER_INDEX
+
+# parameter of each per-microbe coefficient, in (PS, PR, BS, BR) order
+_GROWTH = [
+    _I["growth_rate_PS"], _I["growth_rate_PR"], _I["growth_rate_BS"],
+    _I["growth_rate_BR"]
+]
+_CAPACITY = [
+    _I["maximum_density_P"], _I["maximum_density_P"], _I["maximum_density_B"],
+    _I["maximum_density_B"]
+]
+_LOSS = [
+    _I["attachment_rate_PS"], _I["attachment_rate_PR"],
+    _I["detachment_rate_BS"], _I["detachment_rate_BR"]
+]
+_INHIBITION = [
+    _I["antimicrobial_inhibition_PS"], _I["antimicrobial_inhibition_PR"],
+    _I["antimicrobial_inhibition_BS"], _I["antimicrobial_inhibition_BR"]
+]
+_INFLOW = [
+    _I["detachment_rate_BS"], _I["detachment_rate_BR"],
+    _I["attachment_rate_PS"], _I["attachment_rate_PR"]
+]
+# only the sensitive microbes mutate, into the resistant ones
+_MUTATING = [model.PS, model.BS]
+_MUTATED = [model.PR, model.BR]
+_MUTATION = [_I["mutation_rate_PS"], _I["mutation_rate_BS"]]
+
+_MICROBE_ROWS = np.arange(model.PS, model.BR + 1)
+
+
+def parameter_jacobian(state, coeffs, antimicrobial_uptake):
+
+    # d derivative / d parameters of model.derivative, shape
+    # (..., 7, model.N_PARAMETERS), columns in model.PARAMETERS order
+    state = np.asarray(state, dtype=np.float64)
+    uptake = np.asarray(antimicrobial_uptake, dtype=np.float64)[..., None]
+    jacobian = np.zeros(state.shape + (model.N_PARAMETERS, ))
+
+    microbes = state[..., model.MICROBES]
+    partner = state[..., model._PARTNER]
+    inflow_density = state[..., model._INFLOW_SOURCE]
+    mutation_density = state[..., model._MUTATION_SOURCE]
+    alive = microbes >= model.EXTINCTION_DENSITY
+    grown = np.where(alive, microbes, 0)
+    immune_cells = model.total_immune_cells(state)[..., None]
+
+    occupied = (microbes + partner) / coeffs.capacity
+    jacobian[..., _MICROBE_ROWS, _GROWTH] += grown * (1 - occupied)
+    jacobian[..., _MICROBE_ROWS, _CAPACITY] += (grown * coeffs.growth *
+                                                occupied / coeffs.capacity)
+    jacobian[..., _MICROBE_ROWS, _LOSS] -= grown
+    jacobian[..., _MICROBE_ROWS, _INHIBITION] -= (grown * uptake *
+                                                  coeffs.concentration)
+    jacobian[..., model.MICROBES, _I["antimicrobial_concentration"]] -= (
+        grown * uptake * coeffs.inhibition)
+    jacobian[..., model.MICROBES, _I["lymphocyte_inhibition"]] -= (
+        grown * immune_cells)
+    jacobian[..., model.MICROBES, _I["microbes_natural_death"]] -= grown
+
+    # inflows count the source unless both ends are extinct
+    jacobian[..., _MICROBE_ROWS, _INFLOW] += np.where(
+        alive | (inflow_density >= model.EXTINCTION_DENSITY), inflow_density,
+        0)
+    mutated = mutation_density[..., [model.PR, model.BR]]
+    jacobian[..., _MUTATED, _MUTATION] += np.where(
+        alive[..., [model.PR, model.BR]] |
+        (mutated >= model.EXTINCTION_DENSITY), mutated, 0)
+    jacobian[..., _MUTATING, _MUTATION] -= grown[..., [model.PS, model.BS]]
+
+    naive = state[..., model.NAIVE]
+    effector = state[..., model.EFFECTOR]
+    half_max = coeffs.half_max_growth[..., 0]
+    decay = coeffs.memory_decay[..., 2]
+    conversion = coeffs.memory_conversion[..., 2]
+    proliferation = coeffs.immune_slope[..., 1]
+    total = model.total_microbes(state)
+    stimulation = total / (half_max + total)
+    rest = 1 - stimulation
+    d_stimulation = -total / (half_max + total)**2
+
+    p = _I["immune_cells_proliferation_rate"]
+    jacobian[..., model.NAIVE, p] = -naive * stimulation
+    jacobian[..., model.EFFECTOR, p] = (2 * naive + effector) * stimulation
+
+    k = _I["immune_response_half_max_growth"]
+    jacobian[..., model.NAIVE, k] = -proliferation * naive * d_stimulation
+    jacobian[..., model.EFFECTOR, k] = (
+        (2 * proliferation * naive + proliferation * effector) +
+        decay * effector) * d_stimulation
+    jacobian[..., model.MEMORY, k] = (-conversion * effector * decay *
+                                      d_stimulation)
+
+    d = _I["effector_cells_decay"]
+    jacobian[..., model.EFFECTOR, d] = -effector * rest
+    jacobian[..., model.MEMORY, d] = conversion * effector * rest
+
+    jacobian[..., model.MEMORY,
+             _I["converted_effectors"]] = effector * decay * rest
+
+    return jacobian
+
+
+def augmented_size(with_initial_state=True):
+
+    columns = model.N_PARAMETERS + (model.N_COMPARTMENTS
+                                    if with_initial_state else 0)
+    return model.N_COMPARTMENTS * (1 + columns)
+
+
+def split(augmented, with_initial_state=True):
+
+    # (state, sensitivities) from an augmented state, the sensitivities have
+    # shape (..., 7, n_columns): one column per parameter, followed by one per
+    # initial density when with_initial_state is set
+    state = augmented[..., :model.N_COMPARTMENTS]
+    sensitivities = augmented[..., model.N_COMPARTMENTS:].reshape(
+        augmented.shape[:-1] + (model.N_COMPARTMENTS, -1))
+    return state, sensitivities
+
+
+def sensitivity_field(coeffs, schedule, with_initial_state=True):
+
+    # forward sensitivity system S' = J S + dF/dp integrated alongside the
+    # state. the treatment schedule (delay, duration, threshold) is not
+    # differentiated
+    def fun(time, augmented):
+        state, sensitivities = split(augmented, with_initial_state)
+        uptake = schedule.uptake(time, state)
+
+        slope = np.matmul(state_jacobian(state, coeffs, uptake),
+                          sensitivities)
+        slope[..., :model.N_PARAMETERS] += parameter_jacobian(
+            state, coeffs, uptake)
+
+        return np.concatenate(
+            (model.derivative(state, coeffs, uptake),
+             slope.reshape(slope.shape[:-2] + (-1, ))),
+            axis=-1)
+
+    return fun
+
+
+def initial_augmented_state(initial_state, with_initial_state=True):
+
+    initial_state = np.asarray(initial_state, dtype=np.float64)
+    sensitivities = np.zeros(initial_state.shape +
+                             (model.N_PARAMETERS, ))
+    if with_initial_state:
+        sensitivities = np.concatenate(
+            (sensitivities,
+             np.broadcast_to(np.eye(model.N_COMPARTMENTS),
+                             initial_state.shape + (model.N_COMPARTMENTS, ))),
+            axis=-1)
+
+    return np.concatenate(
+        (initial_state,
+         sensitivities.reshape(initial_state.shape[:-1] + (-1, ))),
+        axis=-1)
+
+
+def solve_sensitivities(parameters,
+                        initial_state,
+                        schedule,
+                        final_time,
+                        with_initial_state=True,
+                        rtol=1e-6,
+                        atol=1e-6,
+                        stop=None):
+
+    # one RK45 run that also yields d state / d parameter for every
+    # parameter, use split() on the sampled augmented states. schedule is
+    # a treatment schedule, e.g. Parameters.treatment_schedule()
+    coeffs = model.coefficients(parameters)
+    fun = sensitivity_field(coeffs, schedule, with_initial_state)
+
+    wrapped_stop = None
+    if stop is not None:
+        wrapped_stop = lambda time, augmented: stop(
+            time, augmented[..., :model.N_COMPARTMENTS])
+
+    return solve_rk45(fun,
+                      0.0,
+                      initial_augmented_state(initial_state,
+                                              with_initial_state),
+                      final_time,
+                      rtol=rtol,
+                      atol=atol,
+                      stop=wrapped_stop)
+
+
+def event_time_sensitivity(event_gradient, sensitivities, slope):
+
+    # d t_event / d parameter for an event g(y(t)) = 0, e.g. the total
+    # microbes reaching the clearance or host death density:
+    # -(dg/dy . S) / (dg/dy . y')
+    event_gradient = np.asarray(event_gradient, dtype=np.float64)
+    return -np.einsum("...i,...ij->...j", event_gradient,
+                      sensitivities) / np.sum(event_gradient * slope,
+                                              axis=-1)[..., None]
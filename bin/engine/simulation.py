@@ -0,0 +1,254 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import os
+import numpy as np
+from bin.engine import ensemble, events, model
+from bin.engine.parameters import Parameters
+from bin.engine.simulation_state import (SimulationState, checkpoint_path,
+                                         steps_to)
+
+BACKENDS = ("rk4", "rk45", "rosenbrock")
+
+# outcomes
+RUNNING = ensemble.OUTCOME_NAMES[ensemble.RUNNING]
+HOST_DEATH = events.HOST_DEATH
+CLEARANCE = events.CLEARANCE
+
+# switches are (time, uptake from then on) of every change of the
+# antimicrobial uptake after the start, located exactly by the adaptive
+# backends and on the step grid by rk4
+SimulationResult = namedtuple("SimulationResult", [
+    "times", "states", "uptake", "outcome", "final_time", "n_steps",
+    "parameters", "switches"
+])
+
+
+def trajectory(simulation):
+
+    # endless (time, state) generator with the fixed step of
+    # calculate_next_time_step, the starting values are yielded first.
+    # simulation is a SimulationState, advanced in place, or Parameters to
+    # start from day 0. time step and treatment arguments are re-read every
+    # step, so they can change while the simulation runs
+    if isinstance(simulation, Parameters):
+        simulation = SimulationState(simulation)
+
+    while True:
+        yield simulation.time, simulation.state
+        simulation.step()
+
+
+def grid_switches(times, uptake):
+
+    # switches of a fixed-step run, the uptake of a step holds until the next
+    changed = np.flatnonzero(np.diff(uptake) != 0) + 1
+    return tuple((float(times[i]), float(uptake[i])) for i in changed)
+
+
+def treatment_days(result):
+
+    # days of full uptake from the start to final_time of a
+    # SimulationResult, the uptake is constant between its switches
+    starts = [float(result.times[0])] + [time for time, _ in result.switches]
+    ends = starts[1:] + [float(result.final_time)]
+    levels = [float(result.uptake[0])] + [level for _, level in result.switches]
+    return float(
+        sum(level * (end - start)
+            for start, end, level in zip(starts, ends, levels)))
+
+
+def outcome_of(state, host_death_density):
+
+    # same checks as ensemble.termination, on floats for a single host
+    if np.ndim(state) == 1:
+        shown = [
+            density if density >= model.EXTINCTION_DENSITY else 0.000000001
+            for density in np.asarray(state)[model.MICROBES].tolist()
+        ]
+        if shown[0] + shown[1] + shown[2] + shown[3] >= host_death_density:
+            return HOST_DEATH
+        elif max(shown) <= model.EXTINCTION_DENSITY:
+            return CLEARANCE
+        return RUNNING
+
+    return ensemble.OUTCOME_NAMES[ensemble.termination(
+        state, host_death_density)]
+
+
+def resume(simulation,
+           max_time=1000.0,
+           checkpoint_directory=None,
+           checkpoint_every=None):
+
+    # fixed-step run from a SimulationState, e.g. a loaded checkpoint or a
+    # fork of one, to host death, clearance or max_time. the given state is
+    # not changed. with a checkpoint directory the state is saved there every
+    # checkpoint_every steps and when the run ends
+    simulation = simulation.fork()
+    parameters = simulation.parameters
+    if checkpoint_directory is not None and not os.path.isdir(
+            checkpoint_directory):
+        os.makedirs(checkpoint_directory)
+
+    times = []
+    states = []
+    uptake = []
+    first_step = simulation.n_steps
+    # counted in steps, a time summed step by step can miss max_time
+    last_step = first_step + steps_to(max_time - simulation.time,
+                                      parameters.time_step)
+
+    for current_time_point, state in trajectory(simulation):
+        times.append(current_time_point)
+        states.append(state)
+        uptake.append(simulation.uptake())
+
+        outcome = outcome_of(state, parameters.host_death_density)
+        finished = outcome != RUNNING or simulation.n_steps >= last_step
+        if checkpoint_directory is not None and (
+                finished or checkpoint_every and
+                simulation.n_steps % checkpoint_every == 0):
+            simulation.save(checkpoint_path(checkpoint_directory, simulation))
+        if finished:
+            break
+
+    return SimulationResult(np.array(times), np.array(states),
+                            np.array(uptake), outcome, times[-1],
+                            simulation.n_steps - first_step, parameters,
+                            grid_switches(times, uptake))
+
+
+def _run_adaptive(parameters, backend, max_time, sample_step,
+                  solver_options):
+
+    schedule = parameters.treatment_schedule()
+    solution, history = events.solve_with_events(
+        model.coefficients(parameters.model_parameters()),
+        schedule,
+        parameters.initial_state(),
+        max_time,
+        parameters.host_death_density,
+        solver=backend,
+        **solver_options)
+
+    final_time = solution.get_final_time()
+    times = np.arange(0.0, final_time, sample_step)
+    times = np.append(times, final_time)
+    states = solution.sample(times)
+
+    # uptake between switches is constant, each switch sets it from then on
+    if schedule.state_dependent:
+        uptake = np.full(
+            times.shape,
+            float(schedule.uptake(0.0, parameters.initial_state())))
+        for event_time, name, level in history:
+            if level is not None:
+                uptake[times >= event_time] = level
+    else:
+        uptake = schedule.level(times)
+
+    status = solution.get_status()
+    outcome = status if status in (HOST_DEATH, CLEARANCE) else RUNNING
+
+    switches = tuple((float(event_time), float(level))
+                     for event_time, name, level in history
+                     if level is not None)
+
+    return SimulationResult(times, states, uptake, outcome, final_time,
+                            solution.get_number_of_steps(), parameters,
+                            switches)
+
+
+def cached_trajectory(simulation, cache, max_time=1000.0):
+
+    # trajectory of a SimulationState, replayed from a cache.ResultCache
+    # while its parameters stay those of a cached rk4 run and computed
+    # afterwards. a run from day 0 that reaches host death, clearance or
+    # max_time without any parameter change is added to the cache
+    parameters = simulation.parameters.copy()
+    cached = cache.get(parameters) if simulation.n_steps == 0 else None
+
+    replayed = False
+    if cached is not None:
+        for index, current_time_point in enumerate(cached.times):
+            if simulation.parameters != parameters:
+                break
+            # the time of later steps is counted from the start of the
+            # cached run, as when it was recorded
+            simulation.move_to(current_time_point, cached.states[index],
+                               index, (float(cached.times[0]), 0))
+            replayed = True
+            yield simulation.time, simulation.state
+
+    recording = cached is None and simulation.n_steps == 0
+    last_step = steps_to(max_time, parameters.time_step)
+    times = []
+    states = []
+    uptake = []
+
+    if not replayed:
+        if recording:
+            times.append(simulation.time)
+            states.append(simulation.state)
+            uptake.append(simulation.uptake())
+        yield simulation.time, simulation.state
+
+    while True:
+        simulation.step()
+        if recording:
+            if simulation.parameters != parameters:
+                recording = False
+                times, states, uptake = [], [], []
+            else:
+                times.append(simulation.time)
+                states.append(simulation.state)
+                uptake.append(simulation.uptake())
+                outcome = outcome_of(simulation.state,
+                                     parameters.host_death_density)
+                if outcome != RUNNING or simulation.n_steps >= last_step:
+                    cache.put(
+                        SimulationResult(np.array(times), np.array(states),
+                                         np.array(uptake), outcome,
+                                         times[-1], simulation.n_steps,
+                                         parameters,
+                                         grid_switches(times, uptake)))
+                    recording = False
+                    times, states, uptake = [], [], []
+        yield simulation.time, simulation.state
+
+
+def run(parameters,
+        backend="rk4",
+        max_time=1000.0,
+        cache=None,
+        **solver_options):
+
+    # runs a scenario to host death, clearance or max_time without any of the
+    # user interface. "rk4" reproduces the animated simulation step by step,
+    # "rk45" and "rosenbrock" take adaptive steps between treatment events
+    # and are sampled back onto the parameters.time_step grid. with a
+    # cache.ResultCache a stored result is returned instead of integrating,
+    # and new results are stored
+    if cache is not None:
+        result = cache.get(parameters, backend, max_time, **solver_options)
+        if result is None:
+            result = run(parameters, backend, max_time, **solver_options)
+            cache.put(result, backend, **solver_options)
+        return result
+
+    if backend == "rk4":
+        return resume(SimulationState(parameters), max_time)
+    elif backend in ("rk45", "rosenbrock"):
+        return _run_adaptive(parameters, backend, max_time,
+                             parameters.time_step, solver_options)
+
+    raise ValueError("unknown backend " + repr(backend) + ", expected one of " +
+                     ", ".join(BACKENDS))
@@ -0,0 +1,170 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import glob
+import os
+import pickle
+import numpy as np
+from bin.engine import model
+
+CHECKPOINT_PATTERN = "checkpoint_%09d.pkl"
+
+
+def steps_to(duration, time_step):
+
+    # whole steps of time_step that reach duration, rounded so that a step
+    # count like 60 / (1 / 120) is not pushed one step further by the
+    # floating point error of the division
+    return max(0, int(np.ceil(round(duration / time_step, 9))))
+
+
+class SimulationState(object):
+
+    # everything needed to continue a fixed-step simulation: time, the seven
+    # densities, the number of steps taken and the parameters, which include
+    # the treatment. unlike a running generator it can be pickled, saved and
+    # copied into branches
+
+    def __init__(self, parameters, time=0.0, state=None, n_steps=0):
+
+        self.parameters = parameters  # Parameters
+        self.time = float(time)  # float
+        self.state = parameters.initial_state() if state is None else np.array(
+            state, dtype=np.float64)  # ndarray
+        self.n_steps = n_steps  # int
+        # time and step the current time step was taken from. time is
+        # counted in whole steps from there rather than summed, so it lands
+        # on the grid instead of drifting past it
+        self._origin = (self.time, n_steps)  # (float, int)
+        # built on demand from the parameters
+        self._coefficients = None  # model.Coefficients
+        self._scalar_coefficients = None  # model.Coefficients of tuples
+        self._schedule = None  # treatment schedule
+
+    def __getstate__(self):
+
+        values = dict(self.__dict__)
+        values["_coefficients"] = None
+        values["_scalar_coefficients"] = None
+        values["_schedule"] = None
+        return values
+
+    def __repr__(self):
+
+        return "SimulationState(time=%r, n_steps=%r, state=%r)" % (
+            self.time, self.n_steps, self.state)
+
+    def coefficients(self):
+
+        if self._coefficients is None:
+            self._coefficients = model.coefficients(
+                self.parameters.model_parameters())
+        return self._coefficients
+
+    def scalar_coefficients(self):
+
+        if self._scalar_coefficients is None:
+            self._scalar_coefficients = model.scalar_coefficients(
+                self.parameters.model_parameters())
+        return self._scalar_coefficients
+
+    def schedule(self):
+
+        if self._schedule is None:
+            self._schedule = self.parameters.treatment_schedule()
+        return self._schedule
+
+    def update(self, **changes):
+
+        # changes parameters of the running simulation, e.g. the time step
+        # or the user treatment switch of the scenario screen
+        for name, value in changes.items():
+            if name not in self.parameters.FIELDS:
+                raise TypeError("unknown parameter: " + name)
+            setattr(self.parameters, name, value)
+        self._origin = (self.time, self.n_steps)
+        self._coefficients = None
+        self._scalar_coefficients = None
+        self._schedule = None
+
+    def move_to(self, time, state, n_steps, origin=None):
+
+        # sets the simulation to a point computed elsewhere, e.g. a cached
+        # run. later steps count their time from origin, a (time, n_steps)
+        # pair, or from the point itself
+        self.time = float(time)
+        self.state = np.array(state, dtype=np.float64)
+        self.n_steps = n_steps
+        self._origin = (self.time, n_steps) if origin is None else origin
+
+    def uptake(self):
+
+        # antimicrobial uptake of the current treatment
+        return float(self.schedule().host_uptake(self.time, self.state))
+
+    def step(self):
+
+        # one step of calculate_next_time_step, on floats like it
+        self.state = np.array(
+            model.rk4_step_scalar(self.state.tolist(),
+                                  self.scalar_coefficients(), self.uptake(),
+                                  self.parameters.time_step))
+        self.n_steps += 1
+        origin_time, origin_steps = self._origin
+        self.time = origin_time + (self.n_steps -
+                                   origin_steps) * self.parameters.time_step
+
+    def fork(self, **changes):
+
+        # independent copy, with some parameters changed, e.g.
+        # fork(classic_delay=state.time) to start a classic treatment now or
+        # fork(treatment_type="User", user_supp=True)
+        forked = SimulationState(self.parameters.copy(**changes), self.time,
+                                 self.state, self.n_steps)
+        if not changes:
+            forked._origin = self._origin
+            forked._coefficients = self._coefficients
+            forked._scalar_coefficients = self._scalar_coefficients
+            forked._schedule = self._schedule
+        return forked
+
+    def save(self, path):
+
+        # written to a temporary file first, so an interrupted save never
+        # leaves a truncated checkpoint behind
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as checkpoint_file:
+            pickle.dump(self, checkpoint_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path):
+
+        with open(path, "rb") as checkpoint_file:
+            return pickle.load(checkpoint_file)
+
+
+def checkpoint_path(directory, simulation_state):
+
+    return os.path.join(directory, CHECKPOINT_PATTERN % simulation_state.n_steps)
+
+
+def checkpoints(directory):
+
+    # checkpoint files of a directory, oldest first
+    return sorted(glob.glob(os.path.join(directory, "checkpoint_*.pkl")))
+
+
+def latest_checkpoint(directory):
+
+    # most advanced saved state of a directory, None if there is none
+    paths = checkpoints(directory)
+    if not paths:
+        return None
+    return SimulationState.load(paths[-1])
@@ -0,0 +1,113 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+from bin.engine.dense_output import DenseOutput
+from bin.engine.rk45 import error_norm
+
+# modified Rosenbrock pair of order 2(3), L-stable (Shampine and Reichelt,
+# The MATLAB ODE Suite, 1997)
+D = 1 / (2 + np.sqrt(2))
+E32 = 6 + np.sqrt(2)
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 5.0
+ERROR_EXPONENT = -1 / 3
+
+
+def rosenbrock_step(fun, jacobian, time, state, slope, time_step):
+
+    identity = np.eye(state.shape[-1])
+    w = identity - (time_step * D) * jacobian
+    inverse = np.linalg.inv(w)
+
+    def solve(rhs):
+        return np.matmul(inverse, rhs[..., None])[..., 0]
+
+    k1 = solve(slope)
+    f1 = fun(time + time_step / 2, state + (time_step / 2) * k1)
+    k2 = solve(f1 - k1) + k1
+    new_state = state + time_step * k2
+    new_slope = fun(time + time_step, new_state)
+    k3 = solve(new_slope - E32 * (k2 - f1) - 2 * (k1 - slope))
+
+    error = (time_step / 6) * (k1 - 2 * k2 + k3)
+    # quadratic continuous extension of the 2nd order solution
+    coefficients = np.stack(
+        ((k1 - 2 * D * k2) / (1 - 2 * D), (k2 - k1) / (1 - 2 * D)), axis=-1)
+
+    return new_state, new_slope, error, coefficients
+
+
+def solve_rosenbrock(fun,
+                     jac,
+                     initial_time,
+                     initial_state,
+                     final_time,
+                     rtol=1e-3,
+                     atol=1e-6,
+                     first_step=None,
+                     max_step=np.inf,
+                     stop=None):
+
+    # linearly implicit integration of y' = fun(t, y) with the analytic
+    # jacobian jac(t, y), for the stiff regimes where the explicit solvers
+    # are limited by stability rather than accuracy. same interface and
+    # DenseOutput as solve_rk45. atol is well below the density the model
+    # treats as zero, a looser one lets compartments that go extinct
+    # overshoot into negative densities
+    time = float(initial_time)
+    state = np.array(initial_state, dtype=np.float64)
+    solution = DenseOutput(time, state)
+
+    slope = fun(time, state)
+    solution.count_evaluations()
+    if first_step is None:
+        scale = atol + rtol * np.abs(state)
+        d1 = np.max(np.sqrt(np.mean((slope / scale)**2, axis=-1)))
+        time_step = 0.01 / max(d1, 1e-2)
+    else:
+        time_step = first_step
+
+    jacobian = None
+    while time < final_time:
+        if stop is not None and stop(time, state):
+            solution.set_status("stopped")
+            return solution
+
+        time_step = min(time_step, max_step, final_time - time)
+        if jacobian is None:
+            jacobian = jac(time, state)
+
+        new_state, new_slope, error, coefficients = rosenbrock_step(
+            fun, jacobian, time, state, slope, time_step)
+        solution.count_evaluations(2)
+
+        norm = error_norm(error, state, new_state, rtol, atol)
+        if norm < 1:
+            factor = MAX_FACTOR if norm == 0 else min(
+                MAX_FACTOR, SAFETY * norm**ERROR_EXPONENT)
+            solution.add_step(time + time_step, new_state, coefficients)
+            time += time_step
+            state, slope = new_state, new_slope
+            time_step *= factor
+            jacobian = None
+        else:
+            solution.count_rejected()
+            time_step *= max(MIN_FACTOR, SAFETY * norm**ERROR_EXPONENT)
+            if time_step < 1e-12 * max(1.0, abs(time)):
+                solution.set_status("step size too small")
+                return solution
+
+    if stop is not None and stop(time, state):
+        solution.set_status("stopped")
+    else:
+        solution.set_status("finished")
+    return solution
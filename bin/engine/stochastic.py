@@ -0,0 +1,176 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import multiprocessing
+import numpy as np
+from bin.engine import ensemble, model
+
+# the extinction density of the equations is one cell
+CELLS_PER_UNIT = 1 / model.EXTINCTION_DENSITY
+
+StochasticResult = namedtuple(
+    "StochasticResult",
+    ["final_time", "final_state", "outcome", "emergence_time"])
+OutcomeDistribution = namedtuple("OutcomeDistribution", [
+    "n_replicates", "clearance", "host_death", "running", "emergence",
+    "host_death_times", "emergence_times"
+])
+
+# partner habitat and resistant mutant of each microbe compartment, -1 when
+# there is none
+_MOVES_TO = np.array([model.BS, model.BR, model.PS, model.PR])
+_MUTATES_TO = np.array([model.PR, -1, model.BR, -1])
+
+
+def leap(counts, immune, coeffs, uptake, tau, rng, cells_per_unit):
+
+    # one tau-leap of the microbe cells, (n, 4) integer counts. the per cell
+    # rates are those of calculate_next_time_step: births at the growth
+    # rate, deaths from crowding, natural death, antimicrobial and immune
+    # kill, and moves to the other habitat or the resistant strain. losses
+    # are binomial, so counts never go negative, births are Poisson.
+    # immune is the (n, 3) naive, effector and memory densities
+    density = counts / cells_per_unit
+    partner = density[:, [model.PR, model.PS, model.BR, model.BS]]
+    uptake = np.asarray(uptake, dtype=np.float64)[..., None]
+
+    crowding = coeffs.growth * (density + partner) / coeffs.capacity
+    kill = (coeffs.death + uptake * coeffs.inhibition * coeffs.concentration +
+            coeffs.lymphocyte_inhibition * np.sum(immune, axis=-1)[:, None])
+    loss = crowding + kill + coeffs.loss + coeffs.mutation_loss
+
+    births = rng.poisson(coeffs.growth * counts * tau)
+    leaving = rng.binomial(counts, -np.expm1(-loss * tau))
+
+    # leavers split over moving, mutating and dying in proportion to rates
+    safe_loss = np.where(loss > 0, loss, 1.0)
+    moved = rng.binomial(leaving, np.minimum(coeffs.loss / safe_loss, 1.0))
+    other = loss - coeffs.loss
+    mutated = rng.binomial(
+        leaving - moved,
+        np.minimum(coeffs.mutation_loss / np.where(other > 0, other, 1.0),
+                   1.0))
+
+    counts = counts + births - leaving
+    np.add.at(counts.T, _MOVES_TO, moved.T)
+    mutates = _MUTATES_TO >= 0
+    np.add.at(counts.T, _MUTATES_TO[mutates], mutated.T[mutates])
+    return counts
+
+
+def _run_block(arguments):
+
+    (parameters, n_replicates, seed, block, max_time, tau, cells_per_unit,
+     emergence_density) = arguments
+
+    # a block always draws for all of its replicates, finished ones are
+    # masked, so every replicate depends on the seed and its block only
+    rng = np.random.Generator(
+        np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(block, ))))
+    coeffs = model.coefficients(parameters.model_parameters())
+    schedule = parameters.treatment_schedule()
+    death_density = parameters.host_death_density
+
+    state = np.tile(parameters.initial_state(), (n_replicates, 1))
+    counts = np.round(state[:, model.MICROBES] * cells_per_unit).astype(
+        np.int64)
+    state[:, model.MICROBES] = counts / cells_per_unit
+
+    outcome = np.full(n_replicates, ensemble.RUNNING, dtype=np.int8)
+    final_time = np.full(n_replicates, max_time)
+    emergence_time = np.full(n_replicates, np.inf)
+    running = np.ones(n_replicates, dtype=bool)
+
+    current_time_point = 0.0
+    while running.any() and current_time_point < max_time:
+        uptake = schedule.uptake(current_time_point, state)
+
+        # the immune system is deterministic, as in calculate_next_time_step
+        immune = model.rk4_step(state, coeffs, uptake, tau)[:, model.IMMUNE]
+        new_counts = leap(counts, state[:, model.IMMUNE], coeffs, uptake, tau,
+                          rng, cells_per_unit)
+        current_time_point += tau
+
+        counts[running] = new_counts[running]
+        state[running, model.IMMUNE] = immune[running]
+        state[:, model.MICROBES] = counts / cells_per_unit
+
+        resistant = state[:, model.PR] + state[:, model.BR]
+        emerged = running & np.isinf(emergence_time) & (resistant >=
+                                                        emergence_density)
+        emergence_time[emerged] = current_time_point
+
+        total = model.total_microbes(state)
+        cleared = running & (total == 0)
+        died = running & (total >= death_density)
+        outcome[cleared] = ensemble.CLEARED
+        outcome[died] = ensemble.HOST_DEATH
+        final_time[cleared | died] = current_time_point
+        running &= ~(cleared | died)
+
+    final_time[running] = current_time_point
+    return final_time, state, outcome, emergence_time
+
+
+def run_replicates(parameters,
+                   n_replicates=10000,
+                   seed=None,
+                   max_time=365.0,
+                   tau=None,
+                   cells_per_unit=CELLS_PER_UNIT,
+                   emergence_density=1.0,
+                   block_size=1024,
+                   jobs=1):
+
+    # n_replicates stochastic runs of a scenario, integrated as arrays of
+    # block_size replicates. block b draws from the stream
+    # SeedSequence(seed, spawn_key=(b,)), so a replicate's result depends on
+    # the seed, its index and block_size only, not on jobs. tau defaults to
+    # the time step of parameters. resistance has emerged once the resistant
+    # density reaches emergence_density
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    if tau is None:
+        tau = parameters.time_step
+
+    arguments = [(parameters, min(block_size, n_replicates - start), seed,
+                  block, max_time, tau, cells_per_unit, emergence_density)
+                 for block, start in enumerate(
+                     range(0, n_replicates, block_size))]
+
+    if jobs > 1 and len(arguments) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(arguments)))
+        try:
+            blocks = pool.map(_run_block, arguments)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        blocks = [_run_block(argument) for argument in arguments]
+
+    return StochasticResult(*(np.concatenate(arrays)
+                              for arrays in zip(*blocks)))
+
+
+def outcome_distribution(result):
+
+    # fractions of replicates per outcome and with resistance emergence,
+    # with the sorted times of host death and of emergence
+    n_replicates = result.outcome.size
+    died = result.outcome == ensemble.HOST_DEATH
+    emerged = np.isfinite(result.emergence_time)
+    return OutcomeDistribution(
+        n_replicates,
+        np.mean(result.outcome == ensemble.CLEARED),
+        np.mean(died),
+        np.mean(result.outcome == ensemble.RUNNING),
+        np.mean(emerged),
+        np.sort(result.final_time[died]),
+        np.sort(result.emergence_time[emerged]))
@@ -0,0 +1,355 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+from bin.engine import ensemble, model
+
+PLANKTONIC = "planktonic"
+BIOFILM = "biofilm"
+
+StrainResult = namedtuple("StrainResult",
+                          ["times", "states", "outcome", "final_time"])
+
+
+class StrainModel(object):
+
+    # the microbe equations of model.py for K strains in M habitats. a
+    # population is a (strain, habitat) pair, stored strain by strain at the
+    # start of the state vector and followed by the naive, effector and
+    # memory cells. populations of a habitat compete for its capacity, and
+    # mutation, attachment and detachment are (source, target, rate)
+    # transitions, applied as a sparse product, so the cost of a step grows
+    # with the number of populations plus the number of transitions.
+    # immune system, natural death, antimicrobial concentration and
+    # treatment come from parameters
+    def __init__(self, parameters, strains, habitats, growth, inhibition,
+                 capacity, transitions=()):
+
+        self.parameters = parameters  # Parameters
+        self.strains = list(strains)  # list[str]
+        self.habitats = list(habitats)  # list[str]
+        n_strains, n_habitats = len(self.strains), len(self.habitats)
+
+        growth = np.asarray(growth, dtype=np.float64)
+        inhibition = np.asarray(inhibition, dtype=np.float64)
+        for name, array in (("growth", growth), ("inhibition", inhibition)):
+            if array.shape != (n_strains, n_habitats):
+                raise ValueError(name + " must have one row per strain and one "
+                                 "column per habitat, got shape " +
+                                 repr(array.shape))
+        capacity = np.asarray(capacity, dtype=np.float64)
+        if capacity.shape != (n_habitats, ):
+            raise ValueError("capacity needs one value per habitat")
+
+        self.populations = [(strain, habitat) for strain in self.strains
+                            for habitat in self.habitats]  # list[(str, str)]
+        self.population_index = {
+            population: i
+            for i, population in enumerate(self.populations)
+        }  # dict[(str, str), int]
+        self.n_populations = len(self.populations)  # int
+        self.n_columns = self.n_populations + 3  # int
+
+        self._growth = growth.ravel()
+        self._inhibition = inhibition.ravel()
+        self._capacity = np.tile(capacity, n_strains)
+        self._shape = (n_strains, n_habitats)
+        self._habitat = np.tile(np.arange(n_habitats), n_strains)
+
+        # transitions sorted by target, so the inflow of each target is one
+        # contiguous reduceat segment
+        entries = sorted((self.index(*target), self.index(*source), rate)
+                         for source, target, rate in transitions
+                         if rate != 0)
+        for target, source, _ in entries:
+            if target == source:
+                raise ValueError("transition from " +
+                                 repr(self.populations[source]) + " to itself")
+        self._sources = np.array([e[1] for e in entries], dtype=np.intp)
+        self._rates = np.array([e[2] for e in entries], dtype=np.float64)
+        targets = np.array([e[0] for e in entries], dtype=np.intp)
+        self._targets, self._segments = np.unique(targets, return_index=True)
+
+        # everything that leaves a population
+        self._outflow = np.zeros(self.n_populations)
+        np.add.at(self._outflow, self._sources, self._rates)
+
+        self.coeffs = model.coefficients(parameters.model_parameters())
+
+    def __repr__(self):
+
+        return "StrainModel(strains=%r, habitats=%r, transitions=%d)" % (
+            self.strains, self.habitats, self._rates.size)
+
+    def index(self, strain, habitat):
+
+        if (strain, habitat) not in self.population_index:
+            raise ValueError("unknown population " + repr((strain, habitat)))
+        return self.population_index[(strain, habitat)]
+
+    def initial_state(self, densities=None):
+
+        # densities is {(strain, habitat): density}, the immune system starts
+        # from the naive precursors of parameters
+        state = np.zeros(self.n_columns)
+        for population, density in (densities or {}).items():
+            state[self.index(*population)] = density
+        state[self.n_populations] = (
+            self.parameters.initial_precursor_cell_density)
+        return state
+
+    def microbes(self, state):
+
+        return state[..., :self.n_populations]
+
+    def total_microbes(self, state):
+
+        return np.sum(self.microbes(state), axis=-1)
+
+    def habitat_totals(self, state):
+
+        # (..., M) densities of every habitat
+        shape = np.shape(state)[:-1] + self._shape
+        return np.sum(self.microbes(state).reshape(shape), axis=-2)
+
+    def inflow(self, microbes):
+
+        # sparse product of the transitions with the microbe densities
+        result = np.zeros(np.shape(microbes))
+        if self._rates.size:
+            result[..., self._targets] = np.add.reduceat(
+                microbes[..., self._sources] * self._rates,
+                self._segments,
+                axis=-1)
+        return result
+
+    def frozen_terms(self, frozen, antimicrobial_uptake):
+
+        # model.frozen_terms for the populations: habitat competitors,
+        # inflow, antimicrobial and immune kill are held at the start of the
+        # step, only each population's own density moves
+        coeffs = self.coeffs
+        uptake = np.asarray(antimicrobial_uptake, dtype=np.float64)[..., None]
+        microbes = self.microbes(frozen)
+        immune = frozen[..., self.n_populations:]
+
+        competitors = (self.habitat_totals(frozen)[..., self._habitat] -
+                       microbes)
+        inflow = self.inflow(microbes)
+        extinct_inflow = self.inflow(
+            np.where(microbes >= model.EXTINCTION_DENSITY, microbes, 0.0))
+
+        drug = uptake * self._inhibition * coeffs.concentration
+        immune_kill = coeffs.lymphocyte_inhibition * np.sum(
+            immune, axis=-1)[..., None]
+
+        total = np.sum(microbes, axis=-1)[..., None]
+        stimulation = total / (coeffs.half_max_growth + total)
+        rest = 1 - stimulation
+
+        offset = coeffs.immune_offset_rate * immune[..., 0, None]
+        constant = (coeffs.memory_conversion * immune[..., 1, None] *
+                    coeffs.memory_decay * rest)
+
+        return (competitors, inflow, extinct_inflow, drug, immune_kill,
+                stimulation, rest, offset, constant)
+
+    def stage_derivative(self, own, terms):
+
+        coeffs = self.coeffs
+        (competitors, inflow, extinct_inflow, drug, immune_kill, stimulation,
+         rest, offset, constant) = terms
+
+        microbes = self.microbes(own)
+        immune = own[..., self.n_populations:]
+
+        result = np.empty_like(own)
+        result[..., :self.n_populations] = np.where(
+            microbes >= model.EXTINCTION_DENSITY, microbes *
+            (self._growth * (1 - (microbes + competitors) / self._capacity) -
+             coeffs.death - self._outflow - drug - immune_kill) + inflow,
+            extinct_inflow)
+        result[..., self.n_populations:] = (
+            (offset + coeffs.immune_slope * immune) * stimulation -
+            coeffs.immune_decay * immune * rest + constant)
+
+        return result
+
+    def derivative(self, state, antimicrobial_uptake):
+
+        return self.stage_derivative(
+            state, self.frozen_terms(state, antimicrobial_uptake))
+
+    def rk4_step(self, state, antimicrobial_uptake, time_step):
+
+        # same scheme as model.rk4_step, for any number of leading axes
+        terms = self.frozen_terms(state, antimicrobial_uptake)
+
+        k1 = self.stage_derivative(state, terms)
+        k2 = self.stage_derivative(state + (time_step / 2) * k1, terms)
+        k3 = self.stage_derivative(state + (time_step / 2) * k2, terms)
+        k4 = self.stage_derivative(state + time_step * k3, terms)
+
+        return state + (time_step / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+    def termination(self, state):
+
+        # ensemble.termination for any number of populations
+        microbes = self.microbes(state)
+        shown = np.where(microbes >= model.EXTINCTION_DENSITY, microbes,
+                         0.000000001)
+
+        outcome = np.full(np.shape(state)[:-1],
+                          ensemble.RUNNING,
+                          dtype=np.int8)
+        outcome[np.all(shown <= model.EXTINCTION_DENSITY,
+                       axis=-1)] = ensemble.CLEARED
+        outcome[np.sum(shown, axis=-1) >=
+                self.parameters.host_death_density] = ensemble.HOST_DEATH
+        return outcome
+
+
+def from_parameters(parameters):
+
+    # the four populations of model.py: sensitive and resistant strains,
+    # planktonic and biofilm habitats
+    p = parameters
+    sensitive, resistant = "sensitive", "resistant"
+    return StrainModel(
+        p, (sensitive, resistant), (PLANKTONIC, BIOFILM),
+        growth=((p.sensitive_growth_rate, p.sensitive_growth_rate_BF),
+                (p.resistant_growth_rate, p.resistant_growth_rate_BF)),
+        inhibition=((p.sensitive_antimicrobial_inhibition,
+                     p.sensitive_antimicrobial_inhibition_BF),
+                    (p.resistant_antimicrobial_inhibition,
+                     p.resistant_antimicrobial_inhibition_BF)),
+        capacity=(p.growth_limitation_density, p.growth_limitation_density_BF),
+        transitions=(
+            ((sensitive, PLANKTONIC), (sensitive, BIOFILM),
+             p.sensitive_attachment_rate),
+            ((resistant, PLANKTONIC), (resistant, BIOFILM),
+             p.resistant_attachment_rate),
+            ((sensitive, BIOFILM), (sensitive, PLANKTONIC),
+             p.sensitive_detachment_rate),
+            ((resistant, BIOFILM), (resistant, PLANKTONIC),
+             p.resistant_detachment_rate),
+            ((sensitive, PLANKTONIC), (resistant, PLANKTONIC),
+             p.sensitive_mutation_rate),
+            ((sensitive, BIOFILM), (resistant, BIOFILM),
+             p.sensitive_mutation_rate_BF),
+        ))
+
+
+def scenario_initial_state(strain_model):
+
+    # initial densities of the scenario for a model built by from_parameters
+    # or resistance_ladder, the last strain taking the resistant densities
+    p = strain_model.parameters
+    first, last = strain_model.strains[0], strain_model.strains[-1]
+    return strain_model.initial_state({
+        (first, PLANKTONIC): p.sensitive_initial_density,
+        (first, BIOFILM): p.sensitive_initial_density_BF,
+        (last, PLANKTONIC): p.resistant_initial_density,
+        (last, BIOFILM): p.resistant_initial_density_BF
+    })
+
+
+def resistance_ladder(parameters, n_strains, growth_cost=None):
+
+    # n_strains genotypes from the sensitive to the resistant strain of
+    # parameters, each one mutation away from the next. inhibition falls
+    # geometrically along the ladder and growth linearly, unless growth_cost
+    # gives the relative growth lost per step. every strain attaches and
+    # detaches at the sensitive rates
+    if n_strains < 2:
+        raise ValueError("a resistance ladder needs at least two strains")
+    p = parameters
+    strains = ["R" + str(i) for i in range(n_strains)]
+    position = np.linspace(0.0, 1.0, n_strains)[:, None]
+
+    def geometric(first, last):
+        first = np.array(first, dtype=np.float64)
+        last = np.array(last, dtype=np.float64)
+        positive = (first > 0) & (last > 0)
+        ratio = np.where(positive, last, 1.0) / np.where(positive, first, 1.0)
+        return np.where(positive, first * ratio**position,
+                        first + (last - first) * position)
+
+    inhibition = geometric((p.sensitive_antimicrobial_inhibition,
+                            p.sensitive_antimicrobial_inhibition_BF),
+                           (p.resistant_antimicrobial_inhibition,
+                            p.resistant_antimicrobial_inhibition_BF))
+    sensitive_growth = np.array(
+        (p.sensitive_growth_rate, p.sensitive_growth_rate_BF))
+    if growth_cost is None:
+        growth = sensitive_growth + position * (np.array(
+            (p.resistant_growth_rate, p.resistant_growth_rate_BF)) -
+                                                sensitive_growth)
+    else:
+        growth = sensitive_growth * (1 - growth_cost)**(position *
+                                                        (n_strains - 1))
+
+    transitions = []
+    for strain in strains:
+        transitions.append(((strain, PLANKTONIC), (strain, BIOFILM),
+                            p.sensitive_attachment_rate))
+        transitions.append(((strain, BIOFILM), (strain, PLANKTONIC),
+                            p.sensitive_detachment_rate))
+    for strain, mutant in zip(strains, strains[1:]):
+        transitions.append(((strain, PLANKTONIC), (mutant, PLANKTONIC),
+                            p.sensitive_mutation_rate))
+        transitions.append(((strain, BIOFILM), (mutant, BIOFILM),
+                            p.sensitive_mutation_rate_BF))
+
+    return StrainModel(
+        p, strains, (PLANKTONIC, BIOFILM), growth, inhibition,
+        (p.growth_limitation_density, p.growth_limitation_density_BF),
+        transitions)
+
+
+def run(strain_model, initial_state=None, max_time=1000.0, record_every=1):
+
+    # fixed-step run under the treatment of the model's parameters, to host
+    # death, clearance or max_time, recorded every record_every steps
+    parameters = strain_model.parameters
+    schedule = parameters.treatment_schedule()
+    time_step = parameters.time_step
+    if initial_state is None:
+        initial_state = scenario_initial_state(strain_model)
+    state = np.array(initial_state, dtype=np.float64)
+
+    current_time_point = 0.0
+    times = [current_time_point]
+    states = [state]
+    outcome = strain_model.termination(state)
+    step = 0
+    while outcome == ensemble.RUNNING and current_time_point < max_time:
+        if schedule.state_dependent:
+            # the symptoms threshold is on the microbes of every strain and
+            # habitat, model.total_microbes only knows the first four columns
+            uptake = (strain_model.total_microbes(state) >=
+                      schedule.threshold).astype(np.float64)
+        else:
+            uptake = schedule.uptake(current_time_point, state)
+        state = strain_model.rk4_step(state, uptake, time_step)
+        step += 1
+        # counted in steps like SimulationState, not summed
+        current_time_point = step * time_step
+        outcome = strain_model.termination(state)
+        if step % record_every == 0 or outcome != ensemble.RUNNING:
+            times.append(current_time_point)
+            states.append(state)
+
+    if times[-1] != current_time_point:
+        times.append(current_time_point)
+        states.append(state)
+
+    return StrainResult(np.array(times), np.array(states), int(outcome),
+                        current_time_point)
@@ -0,0 +1,183 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import numpy as np
+from bin.engine import batch
+
+RESULTS_FILE = "results.csv"
+# rows are appended here as runs finish, in completion order, and read back
+# when an interrupted sweep is started again
+PARTIAL_FILE = "results.partial.csv"
+
+
+def axis_values(spec):
+
+    # values of one sweep axis: a list, or a dictionary with start, stop and
+    # num (both ends included) and an optional "scale": "log"
+    if isinstance(spec, dict):
+        if spec.get("scale", "linear") == "log":
+            values = np.logspace(np.log10(spec["start"]),
+                                 np.log10(spec["stop"]), int(spec["num"]))
+        else:
+            values = np.linspace(spec["start"], spec["stop"], int(spec["num"]))
+        return [float(value) for value in values]
+    return list(spec)
+
+
+def grid(axes):
+
+    # cartesian product of the axes, a list of {key: value} points. the
+    # first axis varies slowest, like nested for loops in the given order
+    keys = list(axes)
+    return [
+        dict(zip(keys, values)) for values in itertools.product(
+            *(axis_values(axes[key]) for key in keys))
+    ]
+
+
+def load_sweep(path):
+
+    # a sweep file is a json object with "axes" ({key: list or range}) and
+    # optionally "base" (fixed parameters), "backend" and "max_time".
+    # keys are Parameters fields or DEFAULT_PARAMETERS keys
+    with open(path) as sweep_file:
+        return json.load(sweep_file)
+
+
+def _run_point(arguments):
+
+    index, scenario, backend, max_time, cache = arguments
+    row = batch.run_scenario(scenario,
+                             backend=backend,
+                             max_time=max_time,
+                             cache=cache)
+    row["index"] = index
+    return row
+
+
+def _read_partial(path, header):
+
+    rows = {}
+    if not os.path.isfile(path):
+        return rows
+
+    with open(path, newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        if reader.fieldnames != header:
+            raise ValueError(path + " belongs to a different sweep, remove it "
+                             "or use another directory")
+        for row in reader:
+            rows[int(row["index"])] = row
+    return rows
+
+
+def run_sweep(points,
+              directory,
+              base=None,
+              backend="rk4",
+              max_time=1000.0,
+              jobs=None,
+              chunksize=None,
+              progress=None,
+              cache=None):
+
+    # runs base updated with every point and writes directory/results.csv,
+    # one summary row per point in point order, with the swept values in
+    # front. rows are saved as soon as they arrive, so a crashed or killed
+    # sweep restarted on the same directory only runs the missing points.
+    # jobs defaults to every core. points already in cache, a
+    # cache.ResultCache, are read instead of integrated
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    base = dict(base or {})
+    keys = []
+    for point in points:
+        keys.extend(key for key in point if key not in keys)
+    header = (["index"] +
+              [key for key in keys if key not in batch.SUMMARY_HEADER] +
+              batch.SUMMARY_HEADER)
+
+    scenarios = []
+    for index, point in enumerate(points):
+        values = dict(base)
+        values.update(point)
+        # fails here, before any worker starts, on unknown keys
+        batch.split_scenario(values)
+        values["name"] = "run_" + str(index)
+        scenarios.append(values)
+
+    partial_path = os.path.join(directory, PARTIAL_FILE)
+    done = _read_partial(partial_path, header)
+    arguments = [(index, scenario, backend, max_time, cache)
+                 for index, scenario in enumerate(scenarios)
+                 if index not in done]
+
+    jobs = jobs or multiprocessing.cpu_count()
+    if chunksize is None:
+        # same heuristic as Pool.map, a few chunks per worker
+        chunksize = max(1, int(np.ceil(len(arguments) / (4.0 * jobs))))
+
+    new_file = not os.path.isfile(partial_path)
+    with open(partial_path, "a", newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, header)
+        if new_file:
+            writer.writeheader()
+            csv_file.flush()
+
+        def save(row):
+            row.update(points[row["index"]])
+            writer.writerow(row)
+            csv_file.flush()
+            done[row["index"]] = row
+            if progress is not None:
+                progress(len(done), len(points), row)
+
+        if jobs > 1 and len(arguments) > 1:
+            pool = multiprocessing.Pool(min(jobs, len(arguments)))
+            try:
+                for row in pool.imap_unordered(_run_point, arguments,
+                                               chunksize):
+                    save(row)
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            for argument in arguments:
+                save(_run_point(argument))
+
+    results_path = os.path.join(directory, RESULTS_FILE)
+    with open(results_path, "w", newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, header)
+        writer.writeheader()
+        for index in range(len(points)):
+            writer.writerow(done[index])
+    os.remove(partial_path)
+
+    return results_path
+
+
+def read_results(path):
+
+    # rows of a results table, numbers converted back to floats
+    def convert(value):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    with open(path, newline='') as csv_file:
+        return [{key: convert(value)
+                 for key, value in row.items()}
+                for row in csv.DictReader(csv_file)]
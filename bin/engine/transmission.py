@@ -0,0 +1,309 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+from collections import namedtuple
+import numpy as np
+from bin.engine import ensemble, model, treatment
+from bin.engine.parameters import MODEL_PARAMETER_OF
+
+# treatment policies a host can follow, with the fields they read
+POLICIES = ("Classic", "Adaptive", "User")
+TREATMENT_FIELDS = ("classic_delay", "classic_duration",
+                    "adaptive_symptoms_at_microbes_density", "user_supp")
+
+# directed contacts, a transmission from sources[i] to targets[i] happens
+# at rates[i] per day while the source is infectious
+Contacts = namedtuple("Contacts", ["sources", "targets", "rates"])
+PopulationResult = namedtuple("PopulationResult", [
+    "times", "infected", "resistant_carriers", "treated", "dead",
+    "transmissions", "final_state", "death_time", "infections"
+])
+
+
+def random_contacts(n_hosts, mean_degree, rate, seed=None):
+
+    # undirected Erdos-Renyi network with mean_degree contacts per host,
+    # both directions of every contact are listed
+    rng = np.random.default_rng(seed)
+    n_edges = rng.poisson(n_hosts * mean_degree / 2.0)
+    first = rng.integers(0, n_hosts, n_edges)
+    second = rng.integers(0, n_hosts, n_edges)
+    keep = first != second
+    first, second = first[keep], second[keep]
+    return Contacts(np.concatenate((first, second)),
+                    np.concatenate((second, first)),
+                    np.full(2 * first.size, float(rate)))
+
+
+def mixing_contacts(groups, mixing, contacts_per_host, rate, seed=None):
+
+    # every host of group g contacts contacts_per_host others, their groups
+    # drawn with probabilities proportional to mixing[g] and the host
+    # uniformly within the group, e.g. wards of a hospital
+    rng = np.random.default_rng(seed)
+    groups = np.asarray(groups)
+    mixing = np.asarray(mixing, dtype=np.float64)
+    members = [np.flatnonzero(groups == g) for g in range(mixing.shape[0])]
+
+    sources = np.repeat(np.arange(groups.size), contacts_per_host)
+    probabilities = mixing / np.sum(mixing, axis=1, keepdims=True)
+    cumulative = np.cumsum(probabilities, axis=1)[groups[sources]]
+    target_groups = np.sum(rng.random(sources.size)[:, None] > cumulative,
+                           axis=1)
+
+    targets = np.empty_like(sources)
+    for g, hosts in enumerate(members):
+        chosen = target_groups == g
+        if chosen.any():
+            if not hosts.size:
+                raise ValueError("group " + str(g) + " has no hosts")
+            targets[chosen] = hosts[rng.integers(0, hosts.size,
+                                                 np.count_nonzero(chosen))]
+
+    keep = sources != targets
+    return Contacts(sources[keep], targets[keep],
+                    np.full(np.count_nonzero(keep), float(rate)))
+
+
+class Population(object):
+
+    # n_hosts hosts, each running the equations of calculate_next_time_step,
+    # advanced together as one (n_hosts, 7) array. every host has the
+    # parameters of base, except the fields in overrides, given as one value
+    # per host. a host carries its treatment policy, Classic, Adaptive or
+    # User, and a Classic treatment starts classic_delay days after the host
+    # was infected. infectious hosts, with planktonic microbes at or above
+    # infectious_density, pass an inoculum of planktonic microbes to their
+    # contacts, sensitive and resistant in the proportion they carry
+    def __init__(self,
+                 base,
+                 n_hosts,
+                 contacts,
+                 overrides=None,
+                 inoculum=1.0,
+                 infectious_density=1000.0):
+
+        overrides = dict(overrides or {})
+        for name in overrides:
+            if name not in base.FIELDS:
+                raise TypeError("unknown parameter: " + name)
+            if name == "time_step":
+                raise ValueError("every host shares the time step of base")
+
+        def field(name):
+            if name in overrides:
+                return np.array(np.broadcast_to(overrides[name],
+                                                (n_hosts, )))
+            return np.full(n_hosts, getattr(base, name))
+
+        self.base = base  # Parameters
+        self.n_hosts = n_hosts  # int
+        self.contacts = Contacts(
+            np.asarray(contacts.sources, dtype=np.intp),
+            np.asarray(contacts.targets, dtype=np.intp),
+            np.asarray(contacts.rates, dtype=np.float64))  # Contacts
+        self.inoculum = inoculum  # float
+        self.infectious_density = infectious_density  # float
+
+        parameters = np.tile(base.model_parameters(), (n_hosts, 1))
+        for name in overrides:
+            if name in MODEL_PARAMETER_OF:
+                parameters[:, model.PARAMETER_INDEX[
+                    MODEL_PARAMETER_OF[name]]] = field(name)
+        self.coeffs = model.coefficients(parameters)  # model.Coefficients
+
+        self.policy = field("treatment_type")  # ndarray[str]
+        unknown = set(self.policy) - set(POLICIES)
+        if unknown:
+            raise ValueError("hosts can only follow the " + ", ".join(POLICIES) +
+                             " policies, got " + ", ".join(sorted(unknown)))
+
+        # the treatment of every host, compiled once for each distinct
+        # policy and treatment fields
+        compiled = {}
+        schedules = []
+        for values in zip(self.policy.tolist(),
+                          *(field(name).tolist() for name in TREATMENT_FIELDS)):
+            if values not in compiled:
+                compiled[values] = base.copy(
+                    treatment_type=values[0],
+                    **dict(zip(TREATMENT_FIELDS,
+                               values[1:]))).treatment_schedule()
+            schedules.append(compiled[values])
+        self.schedules = treatment.RowSchedules(
+            schedules)  # treatment.RowSchedules
+        self.host_death_density = field("host_death_density")
+
+        # uninfected hosts: naive precursors only
+        self.state = np.zeros((n_hosts, model.N_COMPARTMENTS))
+        self.state[:, model.NAIVE] = field("initial_precursor_cell_density")
+        self.time = 0.0
+        self.infection_time = np.full(n_hosts, np.inf)
+        self.dead = np.zeros(n_hosts, dtype=bool)
+        self.death_time = np.full(n_hosts, np.inf)
+        self.infections = np.zeros(n_hosts, dtype=np.int64)
+        self._infected = np.zeros(n_hosts, dtype=bool)
+
+        # one rk4_step of a host without microbes: effectors decay and are
+        # converted into memory cells
+        z = -self.coeffs.immune_decay[:, model.EFFECTOR - model.NAIVE] * (
+            base.time_step)
+        self._effector_factor = 1 + z + z**2 / 2 + z**3 / 6 + z**4 / 24
+        self._memory_gain = (base.time_step *
+                             self.coeffs.memory_conversion[:, -1] *
+                             self.coeffs.memory_decay[:, -1])
+
+        # contacts sorted by source, those of host i are
+        # _first_contact[i]:_first_contact[i + 1]
+        order = np.argsort(self.contacts.sources, kind="stable")
+        self.contacts = Contacts(*(array[order] for array in self.contacts))
+        self._first_contact = np.searchsorted(self.contacts.sources,
+                                              np.arange(n_hosts + 1))
+
+    def infect(self, hosts, sensitive=None, resistant=0.0):
+
+        # adds planktonic microbes to hosts, by default the initial
+        # sensitive and resistant densities of base
+        hosts = np.asarray(hosts, dtype=np.intp)
+        if sensitive is None:
+            sensitive = self.base.sensitive_initial_density
+        np.add.at(self.state[:, model.PS], hosts, sensitive)
+        np.add.at(self.state[:, model.PR], hosts, resistant)
+
+        hosts = np.unique(hosts)
+        now_infected = np.any(
+            self.state[hosts, model.MICROBES] >= model.EXTINCTION_DENSITY,
+            axis=1) & ~self.dead[hosts]
+        newly = hosts[now_infected & ~self._infected[hosts]]
+        self.infection_time[newly] = self.time
+        self.infections[newly] += 1
+        self._infected[hosts] = now_infected
+
+    def infected(self):
+
+        return self._infected.copy()
+
+    def uptake(self, hosts):
+
+        # antimicrobial uptake of hosts under their own policies, the
+        # classic clock starting at their infection
+        return self.schedules.select_rows(hosts).uptake(
+            self.time - self.infection_time[hosts], self.state[hosts])
+
+    def transmit(self, time_step, rng):
+
+        # one Bernoulli draw per contact of an infectious host, the contacts
+        # of each source read from the sorted contact list
+        planktonic = self.state[:, model.PS] + self.state[:, model.PR]
+        sources = np.flatnonzero((planktonic >= self.infectious_density) &
+                                 self._infected)
+        first = self._first_contact[sources]
+        n_contacts = self._first_contact[sources + 1] - first
+        offsets = np.cumsum(n_contacts) - n_contacts
+        contacts = (np.arange(np.sum(n_contacts)) +
+                    np.repeat(first - offsets, n_contacts))
+        contacts = contacts[~self.dead[self.contacts.targets[contacts]]]
+
+        happened = contacts[rng.random(contacts.size) < -np.expm1(
+            -self.contacts.rates[contacts] * time_step)]
+        if not happened.size:
+            return 0
+
+        sources = self.contacts.sources[happened]
+        fraction = self.state[sources, model.PR] / planktonic[sources]
+        self.infect(self.contacts.targets[happened],
+                    self.inoculum * (1 - fraction), self.inoculum * fraction)
+        return happened.size
+
+    def step(self, rng):
+
+        time_step = self.base.time_step
+
+        # hosts without microbes only have effectors decaying into memory,
+        # rk4_step for them in closed form
+        recovering = np.flatnonzero(~self._infected & ~self.dead &
+                                    (self.state[:, model.EFFECTOR] > 0))
+        effector = self.state[recovering, model.EFFECTOR]
+        self.state[recovering, model.MEMORY] += (
+            self._memory_gain[recovering] * effector)
+        self.state[recovering, model.EFFECTOR] = (
+            self._effector_factor[recovering] * effector)
+
+        # infected hosts take the full step
+        hosts = np.flatnonzero(self._infected)
+        state = model.rk4_step(self.state[hosts],
+                               model.select_rows(self.coeffs, hosts),
+                               self.uptake(hosts), time_step)
+        self.state[hosts] = state
+        self.time += time_step
+
+        died = ensemble.termination(
+            state, self.host_death_density[hosts]) == ensemble.HOST_DEATH
+        self.dead[hosts[died]] = True
+        self.death_time[hosts[died]] = self.time
+
+        # cleared hosts are susceptible again, their immune memory remains
+        cleared = hosts[~died & np.all(
+            state[:, model.MICROBES] < model.EXTINCTION_DENSITY, axis=1)]
+        self.state[cleared, model.MICROBES] = 0.0
+        self.infection_time[cleared] = np.inf
+        self._infected[hosts[died]] = False
+        self._infected[cleared] = False
+
+        return self.transmit(time_step, rng)
+
+
+def run_population(population, max_time=100.0, seed=None, record_every=None):
+
+    # advances population to max_time, or until no host is infected.
+    # counts of infected, resistant carrying, treated and dead hosts and of
+    # transmissions are recorded every record_every steps, by default daily
+    rng = np.random.default_rng(seed)
+    if record_every is None:
+        record_every = max(1, int(round(1.0 / population.base.time_step)))
+
+    def record():
+        infected = population.infected()
+        times.append(population.time)
+        counts["infected"].append(np.count_nonzero(infected))
+        counts["resistant_carriers"].append(
+            np.count_nonzero(infected & (
+                population.state[:, model.PR] +
+                population.state[:, model.BR] >= model.EXTINCTION_DENSITY)))
+        counts["treated"].append(
+            np.count_nonzero(population.uptake(np.flatnonzero(infected)) > 0))
+        counts["dead"].append(np.count_nonzero(population.dead))
+        counts["transmissions"].append(transmissions)
+
+    times = []
+    counts = {
+        name: []
+        for name in ("infected", "resistant_carriers", "treated", "dead",
+                     "transmissions")
+    }
+    transmissions = 0
+    record()
+
+    step = 0
+    while population.time < max_time and population.infected().any():
+        transmissions += population.step(rng)
+        step += 1
+        if step % record_every == 0:
+            record()
+    if times[-1] != population.time:
+        record()
+
+    return PopulationResult(
+        np.array(times),
+        *(np.array(counts[name])
+          for name in ("infected", "resistant_carriers", "treated", "dead",
+                       "transmissions")),
+        final_state=population.state.copy(),
+        death_time=population.death_time.copy(),
+        infections=population.infections.copy())
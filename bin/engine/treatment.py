@@ -0,0 +1,276 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import bisect
+import numpy as np
+from bin.engine import model
+
+# treatment types compiled by Parameters.treatment_schedule, "Schedule" takes
+# its intervals from Parameters.treatment_intervals
+TREATMENT_TYPES = ("Classic", "Adaptive", "User", "Schedule")
+
+
+class IntervalSchedule(object):
+
+    # antimicrobial uptake that only depends on time: level inside each of
+    # the closed intervals [start, end] and 0 outside of them, like
+    # antimicrobial_uptake_eq for "Classic". levels below 1 taper the dose
+    state_dependent = False
+
+    def __init__(self, intervals):
+
+        intervals = sorted((float(start), float(end), float(level))
+                           for start, end, level in intervals)
+        for (_, end, _), (start, _, _) in zip(intervals, intervals[1:]):
+            if start < end:
+                raise ValueError("treatment intervals overlap")
+        for start, end, level in intervals:
+            if end < start or level < 0:
+                raise ValueError("invalid treatment interval " +
+                                 repr((start, end, level)))
+
+        self.intervals = intervals  # list[(start, end, level)]
+        self._starts = np.array([i[0] for i in intervals])
+        self._ends = np.array([i[1] for i in intervals])
+        self._levels = np.array([i[2] for i in intervals])
+        self._switches = np.unique(np.concatenate(
+            (self._starts, self._ends)))
+        # plain lists for host_uptake
+        self._start_list = self._starts.tolist()
+        self._end_list = self._ends.tolist()
+        self._level_list = self._levels.tolist()
+
+    def __repr__(self):
+
+        return "IntervalSchedule(" + repr(self.intervals) + ")"
+
+    def __eq__(self, other):
+
+        return isinstance(other,
+                          IntervalSchedule) and self.intervals == other.intervals
+
+    def level(self, time):
+
+        # uptake at time, a scalar or an array of times
+        time = np.asarray(time, dtype=np.float64)
+        if not self.intervals:
+            return np.zeros(time.shape)
+        index = np.searchsorted(self._starts, time, side="right") - 1
+        inside = (index >= 0) & (time <= self._ends[np.maximum(index, 0)])
+        return np.where(inside, self._levels[np.maximum(index, 0)], 0.0)
+
+    def uptake(self, time, state):
+
+        # same signature as the state dependent schedules, one value per
+        # leading index of state
+        return np.broadcast_to(self.level(time), np.shape(state)[:-1])
+
+    def host_uptake(self, time, state):
+
+        # uptake of a single host as a float, level of a scalar time without
+        # the array overhead, for the step by step simulation
+        index = bisect.bisect_right(self._start_list, time) - 1
+        if index >= 0 and time <= self._end_list[index]:
+            return self._level_list[index]
+        return 0.0
+
+    def next_switch(self, time):
+
+        # first interval boundary after time, np.inf when there is none. the
+        # uptake is constant in between, so solvers can step across it
+        index = np.searchsorted(self._switches, time, side="right")
+        if index < self._switches.size:
+            return float(self._switches[index])
+        return np.inf
+
+    def level_after(self, time):
+
+        # uptake on the open interval from time to the next switch
+        following = self.next_switch(time)
+        if np.isinf(following):
+            return float(self.level(time + 1.0))
+        return float(self.level((time + following) / 2))
+
+    def total_dose(self):
+
+        # days of full uptake over the whole schedule
+        return float(np.sum((self._ends - self._starts) * self._levels))
+
+    def select_rows(self, rows):
+
+        # every row of an ensemble follows the same schedule
+        return self
+
+
+class ConstantSchedule(IntervalSchedule):
+
+    # "User" treatment: the switch of the scenario screen, on or off for the
+    # whole run
+    def __init__(self, level):
+
+        IntervalSchedule.__init__(self,
+                                  [(-np.inf, np.inf, level)] if level else [])
+        self.constant_level = float(level)
+
+    def __repr__(self):
+
+        return "ConstantSchedule(" + repr(self.constant_level) + ")"
+
+
+class ThresholdSchedule(object):
+
+    # "Adaptive" treatment: uptake 1 while the total microbes are at or above
+    # the symptoms density
+    state_dependent = True
+
+    def __init__(self, microbes_density_causing_symptoms):
+
+        self.threshold = float(microbes_density_causing_symptoms)
+
+    def __repr__(self):
+
+        return "ThresholdSchedule(" + repr(self.threshold) + ")"
+
+    def __eq__(self, other):
+
+        return isinstance(
+            other, ThresholdSchedule) and self.threshold == other.threshold
+
+    def uptake(self, time, state):
+
+        return (model.total_microbes(state) >= self.threshold).astype(
+            np.float64)
+
+    def host_uptake(self, time, state):
+
+        # state of a single host, a sequence of seven densities
+        total = (state[model.PS] + state[model.PR] + state[model.BS] +
+                 state[model.BR])
+        return 1.0 if total >= self.threshold else 0.0
+
+    def next_switch(self, time):
+
+        # switches are located as events of the state
+        return np.inf
+
+    def select_rows(self, rows):
+
+        # every row of an ensemble follows the same schedule
+        return self
+
+
+class RowSchedules(object):
+
+    # a schedule of its own for every row of an ensemble, e.g. sampled
+    # classic delays, evaluated together. interval rows take the level of
+    # their interval around time, threshold rows compare their total
+    # microbes with their threshold
+    state_dependent = True
+
+    def __init__(self, schedules):
+
+        n_rows = len(schedules)
+        n_intervals = max([1] + [
+            len(schedule.intervals)
+            for schedule in schedules if not schedule.state_dependent
+        ])
+
+        # unused intervals start after they end, so no time is inside them
+        self.starts = np.full((n_rows, n_intervals), np.inf)  # ndarray
+        self.ends = np.full((n_rows, n_intervals), -np.inf)  # ndarray
+        self.levels = np.zeros((n_rows, n_intervals))  # ndarray
+        self.thresholds = np.full(n_rows, np.nan)  # ndarray
+        for row, schedule in enumerate(schedules):
+            if isinstance(schedule, ThresholdSchedule):
+                self.thresholds[row] = schedule.threshold
+            elif isinstance(schedule, IntervalSchedule):
+                for i, (start, end, level) in enumerate(schedule.intervals):
+                    self.starts[row, i] = start
+                    self.ends[row, i] = end
+                    self.levels[row, i] = level
+            else:
+                raise TypeError("unknown treatment schedule " +
+                                repr(schedule))
+        self._threshold_rows = ~np.isnan(self.thresholds)  # ndarray[bool]
+
+    def __repr__(self):
+
+        return "RowSchedules(" + repr(len(self.thresholds)) + " rows)"
+
+    def select_rows(self, rows):
+
+        # schedules of a subset of the rows, like model.select_rows
+        selected = RowSchedules([])
+        selected.starts = self.starts[rows]
+        selected.ends = self.ends[rows]
+        selected.levels = self.levels[rows]
+        selected.thresholds = self.thresholds[rows]
+        selected._threshold_rows = self._threshold_rows[rows]
+        return selected
+
+    def uptake(self, time, state):
+
+        # one value per row of state. time is shared or, e.g. for clocks
+        # started at each host's infection, one value per row. where
+        # intervals touch, the later one holds like in IntervalSchedule
+        time = np.asarray(time, dtype=np.float64)[..., None]
+        inside = (self.starts <= time) & (time <= self.ends)
+        uptake = np.zeros(self.thresholds.shape)
+        for i in range(self.levels.shape[1]):
+            uptake = np.where(inside[:, i], self.levels[:, i], uptake)
+
+        if self._threshold_rows.any():
+            uptake = np.where(
+                self._threshold_rows,
+                model.total_microbes(state) >= np.where(
+                    self._threshold_rows, self.thresholds, np.inf), uptake)
+        return uptake
+
+    def next_switch(self, time):
+
+        # switches are located as events of the state
+        return np.inf
+
+
+def classic(delay, duration):
+
+    return IntervalSchedule([(delay, delay + duration, 1.0)])
+
+
+def courses(start, duration, pause, repeats, level=1.0):
+
+    # repeated courses of duration days, separated by pause days
+    return IntervalSchedule([(start + i * (duration + pause),
+                              start + i * (duration + pause) + duration, level)
+                             for i in range(repeats)])
+
+
+def doses(times, duration, level=1.0):
+
+    # one dose at each of times, each acting for duration days
+    return IntervalSchedule([(time, time + duration, level)
+                             for time in times])
+
+
+def taper(start, durations, levels):
+
+    # consecutive steps of decreasing uptake, e.g.
+    # taper(0, [3, 2, 2], [1, 0.5, 0.25])
+    bounds = start + np.concatenate(([0.0], np.cumsum(durations)))
+    return IntervalSchedule([
+        (bounds[i], bounds[i + 1], level) for i, level in enumerate(levels)
+    ])
+
+
+def concatenate(*schedules):
+
+    # one schedule with the intervals of all of them, e.g. a course followed
+    # by a taper
+    return IntervalSchedule(
+        [interval for schedule in schedules for interval in schedule.intervals])
@@ -0,0 +1,186 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import queue
+import threading
+import numpy as np
+from bin.engine import model, simulation
+
+# columns of a buffer row: time, the compartments of model and the
+# antimicrobial concentration
+TIME = 0
+DRUG = model.N_COMPARTMENTS + 1
+N_COLUMNS = model.N_COMPARTMENTS + 2
+
+
+class RingBuffer(object):
+
+    # first in, first out rows in a preallocated array, for one producer
+    # thread and one consumer thread. each side only moves its own counter,
+    # and a row is written before the counter that publishes it, so neither
+    # side needs a lock. a producer waiting for room waits on wake, which
+    # every pop sets
+    def __init__(self, capacity=8192, n_columns=N_COLUMNS):
+
+        self.rows = np.zeros((capacity, n_columns))  # (capacity, n_columns)
+        self.capacity = capacity  # int
+        self.n_written = 0  # int
+        self.n_read = 0  # int
+        self.wake = threading.Event()  # threading.Event
+
+    def __len__(self):
+
+        return self.n_written - self.n_read
+
+    def push(self, row):
+
+        # False, and nothing written, when the buffer is full
+        if self.n_written - self.n_read >= self.capacity:
+            return False
+        self.rows[self.n_written % self.capacity] = row
+        self.n_written += 1
+        return True
+
+    def pop(self, max_rows=None):
+
+        # (n, n_columns) copy of the rows ready, oldest first, at most
+        # max_rows of them
+        count = self.n_written - self.n_read
+        if max_rows is not None:
+            count = min(count, max_rows)
+        indices = np.arange(self.n_read, self.n_read + count) % self.capacity
+        rows = self.rows[indices]
+        self.n_read += count
+        if count:
+            self.wake.set()
+        return rows
+
+
+class SimulationWorker(threading.Thread):
+
+    # runs a SimulationState in a background thread and pushes a row per
+    # step into buffer, until host death or clearance. the thread is driven
+    # by control messages, pause, resume, update and stop, and stays at most
+    # lead rows ahead of the consumer, the whole buffer when lead is None.
+    # trajectory defaults to simulation.trajectory of the state
+    def __init__(self, simulation_state, trajectory=None, buffer=None,
+                 lead=None):
+
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.simulation_state = simulation_state  # SimulationState
+        self.trajectory = (simulation.trajectory(simulation_state)
+                           if trajectory is None else trajectory)  # generator
+        self.buffer = RingBuffer() if buffer is None else buffer  # RingBuffer
+        self._lead = lead  # int or None
+        # outcome of the last row pushed, see simulation.outcome_of
+        self.outcome = simulation.RUNNING  # str
+
+        self._messages = queue.Queue()
+
+    def __repr__(self):
+
+        return "SimulationWorker(time=%g, outcome=%r, ready=%d)" % (
+            self.simulation_state.time, self.outcome, len(self.buffer))
+
+    @property
+    def lead(self):
+
+        return self._lead
+
+    @lead.setter
+    def lead(self, lead):
+
+        # a longer lead can make room for a worker waiting on a full buffer
+        self._lead = lead
+        self.buffer.wake.set()
+
+    def _send(self, name, changes=None):
+
+        # a worker waiting for room in the buffer also reads its messages
+        self._messages.put((name, changes))
+        self.buffer.wake.set()
+
+    def pause(self):
+
+        self._send("pause")
+
+    def resume(self):
+
+        self._send("resume")
+
+    def update(self, **changes):
+
+        # SimulationState.update between two steps of the worker
+        self._send("update", changes)
+
+    def stop(self):
+
+        self._send("stop")
+
+    def finished(self):
+
+        # every row of a run that ended has been read
+        return self.outcome != simulation.RUNNING and not len(self.buffer)
+
+    def _full(self):
+
+        limit = self.buffer.capacity if self._lead is None else min(
+            self._lead, self.buffer.capacity)
+        return len(self.buffer) >= limit
+
+    def run(self):
+
+        row = np.empty(N_COLUMNS)
+        paused = False
+        while True:
+            if paused:
+                message = self._messages.get()
+            elif self._full():
+                # cleared before looking again, so a pop or a message that
+                # comes in between still wakes the wait
+                self.buffer.wake.clear()
+                if self._full() and self._messages.empty():
+                    self.buffer.wake.wait()
+                try:
+                    message = self._messages.get_nowait()
+                except queue.Empty:
+                    continue
+            else:
+                try:
+                    message = self._messages.get_nowait()
+                except queue.Empty:
+                    message = None
+
+            if message is not None:
+                name, changes = message
+                if name == "stop":
+                    return
+                elif name == "pause":
+                    paused = True
+                elif name == "resume":
+                    paused = False
+                elif name == "update":
+                    self.simulation_state.update(**changes)
+                continue
+
+            current_time_point, state = next(self.trajectory)
+            parameters = self.simulation_state.parameters
+            row[TIME] = current_time_point
+            row[TIME + 1:DRUG] = state
+            row[DRUG] = (self.simulation_state.uptake() *
+                         parameters.antimicrobial_mean_concentration)
+            self.buffer.push(row)
+
+            outcome = simulation.outcome_of(state,
+                                            parameters.host_death_density)
+            if outcome != simulation.RUNNING:
+                self.outcome = outcome
+                return
@@ -8,31 +8,49 @@
 # of the GNU General Public License, version 3.
 
 
-def xy_max_resize(plot, graph_widget, axis_type="linear"):
+def _resize_x(which_widget):
+    which_widget.xmax += 10
+    which_widget.x_ticks_major += 1
+
+
+def _resize_y_linear(which_widget):
+    which_widget.ymax += 20
+    which_widget.y_ticks_major += 4
+
+
+def _resize_y_log(which_widget):
+    which_widget.ymax *= 10
+
 
-    def resize_x(which_widget):
-        which_widget.xmax += 10
-        which_widget.x_ticks_major += 1
+def _resize(graph_widget, x, y, axis_type):
 
-    def resize_y_linear(which_widget):
-        which_widget.ymax += 20
-        which_widget.y_ticks_major += 4
+    # grows the axes in their usual steps until (x, y) fits
+    # x represents time, and, in this case, is always linear
+    while x > graph_widget.xmax:
+        _resize_x(graph_widget)
 
-    def resize_y_log(which_widget):
-        which_widget.ymax *= 10
+    # y-axis
+    if axis_type == "linear":
+        while y > graph_widget.ymax:
+            _resize_y_linear(graph_widget)
+    elif axis_type == "log":
+        while y > graph_widget.ymax:
+            _resize_y_log(graph_widget)
+
+
+def xy_max_resize(plot, graph_widget, axis_type="linear"):
 
     def lambda_func(_plot, _graph_widget, _axis_type):
-        # x-axis
-        # x represents time, and, in this case, is always linear
-        if _plot.points[-1][0] > _graph_widget.xmax:
-            resize_x(_graph_widget)
-
-        # y-axis
-        if _axis_type == "linear":
-            if _plot.points[-1][1] > _graph_widget.ymax:
-                resize_y_linear(_graph_widget)
-        elif _axis_type == "log":
-            if _plot.points[-1][1] > _graph_widget.ymax:
-                resize_y_log(_graph_widget)
+        _resize(_graph_widget, _plot.points[-1][0], _plot.points[-1][1],
+                _axis_type)
 
     return lambda _: lambda_func(plot, graph_widget, axis_type)
+
+
+def fit_axes(plot, graph_widget, axis_type="linear"):
+
+    # for points assigned all at once, every point is made to fit, not
+    # only the last one
+    if plot.points:
+        _resize(graph_widget, max(point[0] for point in plot.points),
+                max(point[1] for point in plot.points), axis_type)
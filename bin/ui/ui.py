@@ -24,6 +24,7 @@ Window.minimum_width = 720
 import csv
 import datetime
 import os
+import numpy as np
 import kivy
 from kivy.app import App
 from kivy.clock import Clock
@@ -38,7 +39,15 @@ from kivy.uix.spinner import Spinner
 from kivy.uix.togglebutton import ToggleButton
 from kivy.uix.widget import Widget
 import bin.global_variables as global_variables
-from bin.functions.equations import calculate_next_time_step
+from bin.engine.model import PS, PR, BS, BR, NAIVE, EFFECTOR, MEMORY
+from bin.engine.parameters import DEFAULT_PARAMETERS, Parameters
+from bin.engine.batch import (TRAJECTORY_HEADER, plot_rows, screen_rows,
+                              trajectory_rows)
+from bin.engine.cache import ResultCache
+from bin.engine.simulation import HOST_DEATH, RUNNING, cached_trajectory, run
+from bin.engine.simulation_state import SimulationState
+from bin.engine.worker import DRUG, TIME, SimulationWorker
+from bin.functions.graphs import fit_axes
 from bin.functions.helper_functions import XMLTextParser
 
 kivy.require('1.9.1')
@@ -376,6 +385,16 @@ class Simulator(App):
     current_microbiome = StringProperty("")
     # simulation speed
     simulation_speed = NumericProperty(1 / (24 * 5.0))  # 24*5 steps per day
+    # engine steps drawn per 1/60 s clock tick, 0 draws every step the
+    # simulation worker has ready
+    steps_per_frame = NumericProperty(1)
+    # days between the points plotted by add_points, whatever the frame
+    # rate. steps in between are only drawn at an antimicrobial switch, the
+    # csv saved keeps every step
+    plot_spacing = 1 / (24 * 5.0)
+    # engine and last day of instant_result
+    instant_backend = "rosenbrock"
+    instant_max_time = 1000.0
 
     ######################
     # Scenario variables
@@ -383,7 +402,13 @@ class Simulator(App):
 
     # function instances
     clock_add_points = None
-    data_generator_instance = None
+    simulation_worker = None
+    simulation_parameters = None
+    simulation_state = None
+    # results of earlier runs, shared with simulator_batch.py
+    result_cache = None
+    # screen_rows of every step of the run shown, for the csv
+    scenario_rows = []
 
     # plots
     sensitive_microbes_plot = global_variables.MICROBES_ASSORTMENT.get_microbes(
@@ -404,51 +429,7 @@ class Simulator(App):
     growth_limit_BF = global_variables.GROWTH_LIMIT_BF
 
     # scenario default parameters
-    default_parameters = {
-        "sensitive_initial_density_value": 10.0,
-        "sensitive_initial_density_exponent": ' e00',
-        "sensitive_initial_density_BF_exponent": ' e00',
-        "sensitive_initial_density_BF_value": 0.0,
-        "sensitive_growth_rate": 3.3,
-        "sensitive_growth_rate_BF": 1.5,
-        "sensitive_attachment_rate": 0.03,
-        "sensitive_detachment_rate": 0.0003,
-        "sensitive_antimicrobial_inhibition": 1.0,
-        "sensitive_antimicrobial_inhibition_BF": 0.8,
-        "sensitive_mutation_rate_value": 0.001,
-        "sensitive_mutation_rate_BF_value": 0.05,
-        "sensitive_mutation_rate_exponent": ' e00',
-        "sensitive_mutation_rate_BF_exponent": ' e00',
-        "resistant_initial_density": 0.0,
-        "resistant_initial_density_BF": 0.0,
-        "resistant_growth_rate": 1.1,
-        "resistant_growth_rate_BF": 0.5,
-        "resistant_attachment_rate": 0.03,
-        "resistant_detachment_rate": 0.0003,
-        "resistant_antimicrobial_inhibition": 0.1,
-        "resistant_antimicrobial_inhibition_BF": 0.08,
-        "lymphocyte_inhibition": 10**-5,
-        "natural_death": 0.03,
-        "host_death_density_value": 1.0,
-        "host_death_density_exponent": ' e10',
-        "growth_limitation_density_value": 1.0,
-        "growth_limitation_density_exponent": ' e10',
-        "growth_limitation_density_BF_value": 1.0,
-        "growth_limitation_density_BF_exponent": ' e10',
-        "initial_precursor_cell_density_value": 2.0,
-        "initial_precursor_cell_density_exponent": ' e02',
-        "immune_cell_proliferation_rate": 2.0,
-        "immune_cell_half_maximum_growth": 10**5,
-        "effector_decay_rate": 0.35,
-        "memory_cell_conversion_rate": 0.1,
-        "antimicrobial_mean_concentration_value": 10.0,
-        "antimicrobial_mean_concentration_exponent": ' e00',
-        "classic_delay": 3.5,
-        "classic_duration": 7.0,
-        "adaptive_symptoms_at_microbes_density_value": 1.0,
-        "adaptive_symptoms_at_microbes_density_exponent": ' e06',
-        "user_supp": False
-    }
+    default_parameters = DEFAULT_PARAMETERS
 
     # sensitive microbes options
     sensitive_initial_density_value = NumericProperty(
@@ -594,26 +575,15 @@ class Simulator(App):
                 restart_button.disabled = False
                 pause_button.disabled = False
 
-                # death limit
-                self.death_limit.points = [(0, self.host_death_density),
-                                           (10000, self.host_death_density)]
-
-                # growth limit
-                self.growth_limit.points = [
-                    (0, self.growth_limitation_density),
-                    (10000, self.growth_limitation_density)
-                ]
-                self.growth_limit_BF.points = [
-                    (0, self.growth_limitation_density_BF),
-                    (10000, self.growth_limitation_density_BF)
-                ]
+                self.draw_limits()
 
-                # data generator
-                self.data_generator_instance = self.data_generator()
+                # engine thread
+                self.scenario_rows = []
+                self.simulation_worker = self.start_worker()
 
                 # clock
                 self.clock_add_points = Clock.schedule_interval(
-                    self.add_points(self.data_generator_instance,
+                    self.add_points(self.simulation_worker,
                                     self.sensitive_microbes_plot,
                                     self.resistant_microbes_plot,
                                     self.antimicrobial_plot,
@@ -631,6 +601,81 @@ class Simulator(App):
                     global_variables.
                     LANGUAGE["popup_missing_treatment_message"])
 
+    def instant_result(self, graph_layout_instance, start_button,
+                       restart_button, popup_warning, root):
+
+        # the whole run at once, up to host death, clearance or
+        # instant_max_time, with the fastest engine and drawn in one go
+        if self.current_scenario == "scenario":
+            if self.treatment_type != "":
+                # buttons, restart clears the plots as after an animated run
+                start_button.state = "down"
+                start_button.disabled = True
+                start_button.sliders_toggles_enabled = self.enable_disable(
+                    "disable")
+                restart_button.disabled = False
+
+                self.draw_limits()
+
+                if self.result_cache is None:
+                    self.result_cache = ResultCache()
+                self.simulation_parameters = self.get_parameters()
+                result = run(self.simulation_parameters,
+                             backend=self.instant_backend,
+                             max_time=self.instant_max_time,
+                             cache=self.result_cache)
+                self.scenario_rows = [trajectory_rows(result)]
+                rows = plot_rows(result)
+
+                for plot, column in ((self.total_microbes_plot, 1),
+                                     (self.sensitive_microbes_plot, 2),
+                                     (self.sensitive_microbes_BF_plot, 3),
+                                     (self.resistant_microbes_plot, 4),
+                                     (self.resistant_microbes_BF_plot, 5),
+                                     (self.immune_system_plot, 6)):
+                    plot.points = rows[:, (0, column)]
+                    fit_axes(
+                        plot,
+                        global_variables.MICROBES_ASSORTMENT.get_graph_widget(),
+                        "log")
+                self.antimicrobial_plot.points = rows[:, (0, 7)]
+                fit_axes(
+                    self.antimicrobial_plot,
+                    global_variables.ANTIMICROBIAL_ASSORTMENT.get_graph_widget())
+
+                graph_layout_instance.restart_in_progress_scenario_property = False
+
+                if result.outcome != RUNNING:
+                    if result.outcome == HOST_DEATH:
+                        title = "popup_host_death_title"
+                        message = "popup_host_death_message"
+                    else:
+                        title = "popup_microbes_death_title"
+                        message = "popup_microbes_death_message"
+                    popup_warning.show_message(
+                        global_variables.LANGUAGE[title],
+                        global_variables.LANGUAGE[message])
+
+            else:
+                popup_warning.show_message(
+                    global_variables.LANGUAGE["popup_missing_treatment_title"],
+                    global_variables.
+                    LANGUAGE["popup_missing_treatment_message"])
+
+    def draw_limits(self):
+
+        # death limit
+        self.death_limit.points = [(0, self.host_death_density),
+                                   (10000, self.host_death_density)]
+
+        # growth limit
+        self.growth_limit.points = [(0, self.growth_limitation_density),
+                                    (10000, self.growth_limitation_density)]
+        self.growth_limit_BF.points = [
+            (0, self.growth_limitation_density_BF),
+            (10000, self.growth_limitation_density_BF)
+        ]
+
     def pause_simulation(self, graph_layout_instance, pause_button):
 
         if pause_button.was_pressed:
@@ -641,14 +686,16 @@ class Simulator(App):
                             and graph_layout_instance.
                             simulation_going_scenario_property):
                         self.clock_add_points.cancel()
+                        self.simulation_worker.pause()
                         graph_layout_instance.simulation_going_scenario_property = False
                         graph_layout_instance.pause_scenario_property = True
                     # if paused, restart add_points schedule
                     elif (graph_layout_instance.pause_scenario_property
                           and not graph_layout_instance.
                           simulation_going_scenario_property):
+                        self.simulation_worker.resume()
                         self.clock_add_points = Clock.schedule_interval(
-                            self.add_points(self.data_generator_instance,
+                            self.add_points(self.simulation_worker,
                                             self.sensitive_microbes_plot,
                                             self.resistant_microbes_plot,
                                             self.antimicrobial_plot,
@@ -680,10 +727,15 @@ class Simulator(App):
             start_button.sliders_toggles_enabled = self.enable_disable(
                 "enable")
 
-            # cancel add_points clock
-            self.clock_add_points.cancel()
+            # cancel add_points clock and the engine thread, none after an
+            # instant result
+            if self.clock_add_points is not None:
+                self.clock_add_points.cancel()
+            if self.simulation_worker is not None:
+                self.simulation_worker.stop()
 
             # reset (x,y) points
+            self.scenario_rows = []
             self.sensitive_microbes_plot.points = [(0, 0.001)]
             self.resistant_microbes_plot.points = [(0, 0.001)]
             self.sensitive_microbes_BF_plot.points = [(0, 0.001)]
@@ -742,35 +794,10 @@ class Simulator(App):
                       newline='') as csv_file:
                 csv_writer = csv.writer(csv_file)
 
-                # csv header
-                csv_writer.writerow([
-                    "Time", "Total Microbes Density",
-                    "Sensitive Microbes Density (Planktonic)",
-                    "Sensitive Microbes Density (Biofilm)",
-                    "Resistant Microbes Density (Planktonic)",
-                    "Resistant Microbes Density (Biofilm)",
-                    "Immune System Density", "Antimicrobial Concentration"
-                ])
-
-                # csv rows
-                # ignores first value, as it exists only to allow plot instantiation (first y value must not be zero)
-                for i in range(len(self.total_microbes_plot.points[1:])):
-                    # gets time from total_microbes_plot and y values for each plot
-                    csv_writer.writerow([
-                        self.total_microbes_plot.points[i +
-                                                        1][0],  # x value, time
-                        self.total_microbes_plot.points[i + 1][1],  # y value
-                        self.sensitive_microbes_plot.points[i +
-                                                            1][1],  # y value
-                        self.sensitive_microbes_BF_plot.points[
-                            i + 1][1],  # y value
-                        self.resistant_microbes_plot.points[i +
-                                                            1][1],  # y value
-                        self.resistant_microbes_BF_plot.points[i + 1]
-                        [1],  # y value                                         
-                        self.immune_system_plot.points[i + 1][1],  # y value
-                        self.antimicrobial_plot.points[i + 1][1]  # y value
-                    ])
+                # every step of the run, the plots may skip some
+                csv_writer.writerow(TRAJECTORY_HEADER)
+                for rows in self.scenario_rows:
+                    csv_writer.writerows(rows.tolist())
 
             # save options used
             with open(
@@ -931,188 +958,149 @@ class Simulator(App):
             # popup warning message
             popup_warning_id.show_message(*popup_warning_title_and_message)
 
-    def data_generator(self):
+    def get_parameters(self):
 
-        if self.current_scenario == "scenario":
-            # initial values
-            current_time_point = 0.0
-            sensitive_density = self.sensitive_initial_density
-            resistant_density = self.resistant_initial_density
-            sensitive_density_BF = self.sensitive_initial_density_BF
-            resistant_density_BF = self.resistant_initial_density_BF
-            precursor_density = self.initial_precursor_cell_density
-            effector_density = 0.0
-            memory_cells_density = 0.0
-
-            while True:
-                # initial values are yielded at first
-                yield (current_time_point, sensitive_density,
-                       resistant_density, precursor_density, effector_density,
-                       memory_cells_density, sensitive_density_BF,
-                       resistant_density_BF)
-
-                antimicrobial_uptake_args = {}
-                if self.treatment_type == "Classic":
-                    # time is added in calculate_next_time_step()
-                    antimicrobial_uptake_args = {
-                        "delay": self.classic_delay,
-                        "duration": self.classic_duration
-                    }
-                elif self.treatment_type == "Adaptive":
-                    # total_microbes_density is added in calculate_next_time_step()
-                    antimicrobial_uptake_args = {
-                        "microbes_density_causing_symptoms":
-                        self.adaptive_symptoms_at_microbes_density
-                    }
-                elif self.treatment_type == "User":
-                    antimicrobial_uptake_args = {
-                        "taking_antimicrobial": self.user_supp
-                    }
-
-                (current_time_point, sensitive_density, resistant_density,
-                 precursor_density, effector_density, memory_cells_density,
-                 sensitive_density_BF,
-                 resistant_density_BF) = calculate_next_time_step(
-                     current_time_point, sensitive_density, resistant_density,
-                     sensitive_density_BF, resistant_density_BF,
-                     precursor_density, effector_density, memory_cells_density,
-                     self.immune_cell_proliferation_rate,
-                     self.lymphocyte_inhibition,
-                     self.memory_cell_conversion_rate,
-                     self.effector_decay_rate,
-                     self.antimicrobial_mean_concentration,
-                     self.immune_cell_half_maximum_growth, self.treatment_type,
-                     antimicrobial_uptake_args,
-                     (self.sensitive_growth_rate,
-                      self.sensitive_antimicrobial_inhibition,
-                      self.sensitive_attachment_rate,
-                      self.sensitive_mutation_rate),
-                     (self.resistant_growth_rate,
-                      self.resistant_antimicrobial_inhibition,
-                      self.resistant_attachment_rate),
-                     (self.sensitive_growth_rate_BF,
-                      self.sensitive_antimicrobial_inhibition_BF,
-                      self.sensitive_detachment_rate,
-                      self.sensitive_mutation_rate_BF),
-                     (self.resistant_growth_rate_BF,
-                      self.resistant_antimicrobial_inhibition_BF,
-                      self.resistant_detachment_rate),
-                     (self.growth_limitation_density,
-                      self.growth_limitation_density_BF), self.natural_death,
-                     self.simulation_speed)
-
-    def add_points(self, data_yielder, sensitive_microbes_plot,
+        values = {
+            name: getattr(self, name)
+            for name in Parameters.FIELDS
+            if name not in ("time_step", "treatment_intervals")
+        }
+        return Parameters(time_step=self.simulation_speed, **values)
+
+    def start_worker(self):
+
+        # the engine runs in its own thread, add_points only draws what it
+        # has computed, so the interface keeps its frame rate
+        self.simulation_parameters = self.get_parameters()
+        # picklable state of the running scenario, can be saved or forked
+        self.simulation_state = SimulationState(self.simulation_parameters)
+        if self.result_cache is None:
+            self.result_cache = ResultCache()
+
+        # a scenario run before is read back until a parameter changes
+        simulation_worker = SimulationWorker(
+            self.simulation_state,
+            cached_trajectory(self.simulation_state, self.result_cache),
+            lead=self.worker_lead())
+        simulation_worker.start()
+        return simulation_worker
+
+    def worker_lead(self):
+
+        # rows the engine computes ahead of the plots, few enough that
+        # parameter changes show up within a couple of frames
+        return 2 * int(self.steps_per_frame) if self.steps_per_frame else None
+
+    def add_points(self, simulation_worker, sensitive_microbes_plot,
                    resistant_microbes_plot, antimicrobial_plot, immune_plot,
                    total_microbes_plot, sensitive_microbes_BF_plot,
                    resistant_microbes_BF_plot):
 
-        def add_points_function(_self, _data_yielder, _sensitive_microbes_plot,
+        # plot_spacing interval and antimicrobial concentration of the last
+        # row taken from the worker, and that row when it was not plotted
+        last_plotted = {"spacing": -np.inf, "drug": np.nan, "row": None}
+
+        def add_points_function(_self, _simulation_worker,
+                                _sensitive_microbes_plot,
                                 _resistant_microbes_plot, _antimicrobial_plot,
                                 _immune_plot, _total_microbes_plot,
                                 _sensitive_microbes_BF_plot,
                                 _resistant_microbes_BF_plot):
-            data = next(_data_yielder)
-
-            time = data[0]
-
-            # avoids zero division errors
-            sensitive_microbes_density = data[
-                1] if data[1] >= 0.001 else 0.000000001
-            resistant_microbes_density = data[
-                2] if data[2] >= 0.001 else 0.000000001
-            sensitive_microbes_density_BF = data[
-                6] if data[6] >= 0.001 else 0.000000001
-            resistant_microbes_density_BF = data[
-                7] if data[7] >= 0.001 else 0.000000001
-            immune_cells_density = data[3] + data[4] + data[
-                5] if data[3] + data[4] + data[5] >= 0.001 else 0.000000001
-            antimicrobial_concentration = _self.antimicrobial_mean_concentration
 
-            # if all microbes are dead or host death threshold is reached, stop generating values
-            if (
-                    not (sensitive_microbes_density <= 0.001
-                         and resistant_microbes_density <= 0.001
-                         and sensitive_microbes_density_BF <= 0.001
-                         and resistant_microbes_density_BF <= 0.001)
-            ) and (sensitive_microbes_density + resistant_microbes_density +
-                   sensitive_microbes_density_BF +
-                   resistant_microbes_density_BF < _self.host_death_density):
-                _sensitive_microbes_plot.points.append(
+            # points of this frame, each plot is extended once
+            new_points = {
+                plot: []
+                for plot in (_sensitive_microbes_plot,
+                             _resistant_microbes_plot,
+                             _sensitive_microbes_BF_plot,
+                             _resistant_microbes_BF_plot, _immune_plot,
+                             _total_microbes_plot, _antimicrobial_plot)
+            }
+
+            def plot_point(row):
+
+                row = row.tolist()
+                time = row[TIME]
+                state = row[TIME + 1:DRUG]
+
+                # avoids zero division errors
+                sensitive_microbes_density = state[
+                    PS] if state[PS] >= 0.001 else 0.000000001
+                resistant_microbes_density = state[
+                    PR] if state[PR] >= 0.001 else 0.000000001
+                sensitive_microbes_density_BF = state[
+                    BS] if state[BS] >= 0.001 else 0.000000001
+                resistant_microbes_density_BF = state[
+                    BR] if state[BR] >= 0.001 else 0.000000001
+                immune_cells_density = state[NAIVE] + state[EFFECTOR] + state[
+                    MEMORY] if state[NAIVE] + state[EFFECTOR] + state[
+                        MEMORY] >= 0.001 else 0.000000001
+
+                new_points[_sensitive_microbes_plot].append(
                     (time, sensitive_microbes_density))
-                _resistant_microbes_plot.points.append(
+                new_points[_resistant_microbes_plot].append(
                     (time, resistant_microbes_density))
-                _sensitive_microbes_BF_plot.points.append(
+                new_points[_sensitive_microbes_BF_plot].append(
                     (time, sensitive_microbes_density_BF))
-                _resistant_microbes_BF_plot.points.append(
+                new_points[_resistant_microbes_BF_plot].append(
                     (time, resistant_microbes_density_BF))
-                _immune_plot.points.append((time, immune_cells_density))
-                _total_microbes_plot.points.append(
+                new_points[_immune_plot].append((time, immune_cells_density))
+                new_points[_total_microbes_plot].append(
                     (time,
                      sensitive_microbes_density + resistant_microbes_density +
                      sensitive_microbes_density_BF +
                      resistant_microbes_density_BF))
+                new_points[_antimicrobial_plot].append((time, row[DRUG]))
+
+            # steps_per_frame of the steps the worker has ready, or all of
+            # them when it is 0. the first step of every plot_spacing days is
+            # plotted, the steps on both sides of an antimicrobial switch so
+            # the treatment plot keeps its edges, and the last step of the run
+            rows = _simulation_worker.buffer.pop(_self.steps_per_frame or None)
+            if len(rows):
+                _self.scenario_rows.append(
+                    screen_rows(rows[:, TIME], rows[:, TIME + 1:DRUG],
+                                rows[:, DRUG]))
+
+                # nudged so that steps on the spacing grid are not lost to
+                # rounding
+                spacing = np.floor(rows[:, TIME] / _self.plot_spacing + 1e-6)
+                keep = spacing != np.concatenate(
+                    ([last_plotted["spacing"]], spacing[:-1]))
+                # rows that start a new antimicrobial concentration, the
+                # row before the first one can be from the last frame
+                switches = np.flatnonzero(
+                    np.diff(
+                        np.concatenate(([last_plotted["drug"]],
+                                        rows[:, DRUG]))) != 0)
+                keep[switches] = True
+                keep[switches[switches > 0] - 1] = True
+                if (len(switches) and switches[0] == 0 and
+                        last_plotted["row"] is not None):
+                    plot_point(last_plotted["row"])
+
+                last_plotted["spacing"] = spacing[-1]
+                last_plotted["drug"] = rows[-1, DRUG]
+                last_plotted["row"] = None if keep[-1] else rows[-1]
+                for row in rows[keep]:
+                    plot_point(row)
+
+            if (_simulation_worker.finished() and
+                    last_plotted["row"] is not None):
+                plot_point(last_plotted["row"])
+                last_plotted["row"] = None
+
+            for plot, points in new_points.items():
+                if points:
+                    plot.points.extend(points)
 
-                # treatment type logic
-                if _self.treatment_type == "Classic":
-                    if _self.classic_delay < time < _self.classic_delay + _self.classic_duration:
-                        _antimicrobial_plot.points.append(
-                            (time, antimicrobial_concentration))
-                    else:
-                        _antimicrobial_plot.points.append((time, 0))
-                elif _self.treatment_type == "Adaptive":
-                    if _self.adaptive_symptoms_at_microbes_density <\
-                                    sensitive_microbes_density + resistant_microbes_density + sensitive_microbes_density_BF + resistant_microbes_density_BF:
-                        _antimicrobial_plot.points.append(
-                            (time, antimicrobial_concentration))
-                    else:
-                        _antimicrobial_plot.points.append((time, 0))
-                elif _self.treatment_type == "User":
-                    if _self.user_supp:
-                        _antimicrobial_plot.points.append(
-                            (time, antimicrobial_concentration))
-                    else:
-                        _antimicrobial_plot.points.append((time, 0))
-            else:
-                _sensitive_microbes_plot.points.append(
-                    (time, sensitive_microbes_density))
-                _resistant_microbes_plot.points.append(
-                    (time, resistant_microbes_density))
-                _sensitive_microbes_BF_plot.points.append(
-                    (time, sensitive_microbes_density_BF))
-                _resistant_microbes_BF_plot.points.append(
-                    (time, resistant_microbes_density_BF))
-                _immune_plot.points.append((time, immune_cells_density))
-                _total_microbes_plot.points.append(
-                    (time,
-                     sensitive_microbes_density + resistant_microbes_density +
-                     sensitive_microbes_density_BF +
-                     resistant_microbes_density_BF))
-
-                # treatment type logic
-                if _self.treatment_type == "Classic":
-                    if _self.classic_delay < time < _self.classic_delay + _self.classic_duration:
-                        _antimicrobial_plot.points.append(
-                            (time, antimicrobial_concentration))
-                    else:
-                        _antimicrobial_plot.points.append((time, 0))
-                elif _self.treatment_type == "Adaptive":
-                    if _self.adaptive_symptoms_at_microbes_density <\
-                                    sensitive_microbes_density + resistant_microbes_density + sensitive_microbes_density_BF + resistant_microbes_density_BF:
-                        _antimicrobial_plot.points.append(
-                            (time, antimicrobial_concentration))
-                    else:
-                        _antimicrobial_plot.points.append((time, 0))
-                elif _self.treatment_type == "User":
-                    if _self.user_supp:
-                        _antimicrobial_plot.points.append(
-                            (time, antimicrobial_concentration))
-                    else:
-                        _antimicrobial_plot.points.append((time, 0))
+            # if all microbes are dead or host death threshold is reached, stop generating values
+            if _simulation_worker.finished():
                 # cancel clock
                 _self.clock_add_points.cancel()
 
                 # checks whether host death or microbes death
-                if sensitive_microbes_density + resistant_microbes_density + sensitive_microbes_density_BF + resistant_microbes_density_BF >= _self.host_death_density:
+                if _simulation_worker.outcome == HOST_DEATH:
                     title = "popup_host_death_title"
                     message = "popup_host_death_message"
                 else:
@@ -1125,7 +1113,7 @@ class Simulator(App):
                     global_variables.LANGUAGE[message])
 
         return lambda _: add_points_function(
-            self, data_yielder, sensitive_microbes_plot,
+            self, simulation_worker, sensitive_microbes_plot,
             resistant_microbes_plot, antimicrobial_plot, immune_plot,
             total_microbes_plot, sensitive_microbes_BF_plot,
             resistant_microbes_BF_plot)
@@ -1149,6 +1137,22 @@ class Simulator(App):
 
         self.treatment_type = value
 
+    def on_simulation_speed(self, *args):
+
+        if self.simulation_worker is not None:
+            self.simulation_worker.update(time_step=self.simulation_speed)
+
+    def on_steps_per_frame(self, *args):
+
+        if self.simulation_worker is not None:
+            self.simulation_worker.lead = self.worker_lead()
+
+    def on_user_supp(self, *args):
+
+        if self.simulation_worker is not None:
+            # recompiles the treatment schedule
+            self.simulation_worker.update(user_supp=self.user_supp)
+
     def on_host_death_density_value(self, *args):
 
         self.host_death_density = self.host_death_density_value * self.host_death_density_exponent
@@ -14,7 +14,7 @@ import sys
 
 def install_dependencies(python_path, system):
 
-    dependencies = "kivy[base] kivy_examples --pre --extra-index-url https://kivy.org/downloads/simple/"
+    dependencies = "numpy kivy[base] kivy_examples --pre --extra-index-url https://kivy.org/downloads/simple/"
 
     print("Installing dependencies...")
 
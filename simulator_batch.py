@@ -0,0 +1,143 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+# runs scenario files to completion without opening a window, e.g.
+#   python simulator_batch.py scenarios/*.json --output results --jobs 8
+# or a parameter sweep over every core
+#   python simulator_batch.py --sweep treatment_grid.json --output grid
+
+import argparse
+import os
+import sys
+
+from bin.engine import cache, simulation
+from bin.engine.batch import load_scenarios, run_batch
+from bin.engine.sweep import grid, load_sweep, run_sweep
+
+
+def parse_arguments(arguments):
+
+    parser = argparse.ArgumentParser(
+        description="Run simulator scenarios at full speed, without the "
+        "user interface.")
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        help="json scenario files, each holding one scenario or a list of "
+        "them. keys are the scenario screen parameters, e.g. "
+        "treatment_type or sensitive_growth_rate, plus name, backend and "
+        "max_time")
+    parser.add_argument(
+        "-s",
+        "--sweep",
+        help="json sweep file with \"axes\", {key: list of values or "
+        "{start, stop, num, scale}}, and optionally \"base\", \"backend\" "
+        "and \"max_time\". runs the grid of every axis combination and "
+        "writes results.csv, an interrupted sweep resumes where it stopped")
+    parser.add_argument("-o",
+                        "--output",
+                        default="batch_results",
+                        help="directory for the trajectories and summary.csv "
+                        "(default: %(default)s)")
+    parser.add_argument("-j",
+                        "--jobs",
+                        type=int,
+                        help="number of scenarios run in parallel "
+                        "(default: 1, every core for a sweep)")
+    parser.add_argument("-b",
+                        "--backend",
+                        choices=simulation.BACKENDS,
+                        default="rk4",
+                        help="integrator for scenarios that do not set one "
+                        "(default: %(default)s)")
+    parser.add_argument("-t",
+                        "--max-time",
+                        type=float,
+                        default=1000.0,
+                        help="days simulated when neither host death nor "
+                        "clearance happens (default: %(default)s)")
+    parser.add_argument("--cache",
+                        default=cache.DEFAULT_DIRECTORY,
+                        help="directory of the result cache shared with the "
+                        "user interface, earlier runs of the same scenario "
+                        "are read from it (default: %(default)s)")
+    parser.add_argument("--cache-size",
+                        type=float,
+                        default=cache.DEFAULT_MAX_BYTES / 2.0**20,
+                        help="size of the result cache in MB, the least "
+                        "recently used results are removed above it "
+                        "(default: %(default)g)")
+    parser.add_argument("--no-cache",
+                        action="store_true",
+                        help="always integrate, do not read or write the "
+                        "result cache")
+    parser.add_argument("--summary-only",
+                        action="store_true",
+                        help="only write summary.csv")
+    parser.add_argument("-q",
+                        "--quiet",
+                        action="store_true",
+                        help="do not report progress")
+    options = parser.parse_args(arguments)
+    if not options.scenarios and options.sweep is None:
+        parser.error("give scenario files or --sweep")
+    return options
+
+
+def main(arguments=None):
+
+    options = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+    result_cache = None
+    if not options.no_cache:
+        result_cache = cache.ResultCache(options.cache,
+                                         int(options.cache_size * 2**20))
+
+    def progress(done, total, row):
+        if not options.quiet:
+            print("[%d/%d] %s: %s at day %g" %
+                  (done, total, row["name"], row["outcome"],
+                   row["final_time"]))
+
+    if options.sweep is not None:
+        sweep = load_sweep(options.sweep)
+        results_path = run_sweep(grid(sweep["axes"]),
+                                 options.output,
+                                 base=sweep.get("base"),
+                                 backend=sweep.get("backend",
+                                                   options.backend),
+                                 max_time=sweep.get("max_time",
+                                                    options.max_time),
+                                 jobs=options.jobs,
+                                 progress=progress,
+                                 cache=result_cache)
+        if not options.quiet:
+            print("results written to " + results_path)
+        return 0
+
+    scenarios = []
+    for path in options.scenarios:
+        scenarios.extend(load_scenarios(path))
+
+    run_batch(scenarios,
+              options.output,
+              backend=options.backend,
+              max_time=options.max_time,
+              jobs=options.jobs or 1,
+              write_trajectories=not options.summary_only,
+              progress=progress,
+              cache=result_cache)
+
+    if not options.quiet:
+        print("summary written to " +
+              os.path.join(options.output, "summary.csv"))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import os
+import sys
+
+import pytest
+
+# the engine is imported as bin.engine, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bin.engine import model
+from bin.engine.parameters import Parameters
+from bin.functions.equations import calculate_next_time_step
+
+TREATMENTS = (
+    {
+        "treatment_type": "Classic"
+    },
+    {
+        "treatment_type": "Adaptive"
+    },
+    {
+        "treatment_type": "User",
+        "user_supp": True
+    },
+)
+
+
+def baseline_steps(parameters, n_steps, on_grid=False):
+
+    # (times, states) of calculate_next_time_step, called the way the
+    # scenario screen called it before the engine existed. on_grid counts
+    # the time in whole steps like SimulationState instead of summing it,
+    # which moves a classic treatment that starts exactly on a step
+    # forward by that one step
+    p = parameters
+    time = 0.0
+    ps, pr, bs, br = (p.sensitive_initial_density, p.resistant_initial_density,
+                      p.sensitive_initial_density_BF,
+                      p.resistant_initial_density_BF)
+    naive, effector, memory = p.initial_precursor_cell_density, 0.0, 0.0
+
+    times = [time]
+    states = [[ps, pr, bs, br, naive, effector, memory]]
+    for step in range(n_steps):
+        if on_grid:
+            time = step * p.time_step
+        (time, ps, pr, naive, effector, memory, bs,
+         br) = calculate_next_time_step(
+             time, ps, pr, bs, br, naive, effector, memory,
+             p.immune_cell_proliferation_rate, p.lymphocyte_inhibition,
+             p.memory_cell_conversion_rate, p.effector_decay_rate,
+             p.antimicrobial_mean_concentration,
+             p.immune_cell_half_maximum_growth, p.treatment_type,
+             p.treatment_args(),
+             (p.sensitive_growth_rate, p.sensitive_antimicrobial_inhibition,
+              p.sensitive_attachment_rate, p.sensitive_mutation_rate),
+             (p.resistant_growth_rate, p.resistant_antimicrobial_inhibition,
+              p.resistant_attachment_rate),
+             (p.sensitive_growth_rate_BF,
+              p.sensitive_antimicrobial_inhibition_BF,
+              p.sensitive_detachment_rate, p.sensitive_mutation_rate_BF),
+             (p.resistant_growth_rate_BF,
+              p.resistant_antimicrobial_inhibition_BF,
+              p.resistant_detachment_rate),
+             (p.growth_limitation_density, p.growth_limitation_density_BF),
+             p.natural_death, p.time_step)
+        times.append(time)
+        states.append([ps, pr, bs, br, naive, effector, memory])
+    return times, states
+
+
+@pytest.fixture(params=TREATMENTS,
+                ids=[treatment["treatment_type"] for treatment in TREATMENTS])
+def parameters(request):
+
+    return Parameters(**request.param)
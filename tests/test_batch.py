@@ -0,0 +1,47 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+import pytest
+
+from bin.engine import batch, simulation
+from bin.engine.parameters import Parameters
+
+
+@pytest.mark.parametrize("backend", ["rk45", "rosenbrock"])
+def test_treatment_days_of_adaptive_backends_are_exact(backend):
+
+    parameters = Parameters(treatment_type="Classic", classic_duration=2.0)
+    result = simulation.run(parameters, backend=backend, max_time=30.0)
+    row = batch.summary("classic", backend, result)
+
+    assert row["treatment_days"] == pytest.approx(2.0, abs=1e-12)
+
+
+def test_treatment_days_of_rk4_follow_the_steps():
+
+    # the step at the end of the closed interval is still treated
+    parameters = Parameters(treatment_type="Classic", classic_duration=2.0)
+    result = simulation.run(parameters, max_time=30.0)
+    row = batch.summary("classic", "rk4", result)
+
+    assert row["treatment_days"] == pytest.approx(
+        np.sum(result.uptake[:-1] * np.diff(result.times)))
+    assert row["treatment_days"] == pytest.approx(2.0 + parameters.time_step)
+
+
+def test_cleared_hosts_have_no_resistant_fraction():
+
+    parameters = Parameters(treatment_type="Classic")
+    result = simulation.run(parameters, max_time=100.0)
+    row = batch.summary("classic", "rk4", result)
+
+    assert result.outcome == simulation.CLEARANCE
+    assert result.states[-1, 1] + result.states[-1, 3] > 0
+    assert row["final_resistant_fraction"] == 0.0
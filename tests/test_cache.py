@@ -0,0 +1,105 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import itertools
+
+import numpy as np
+
+from bin.engine import simulation
+from bin.engine.cache import ResultCache, result_key
+from bin.engine.parameters import Parameters
+from bin.engine.simulation_state import SimulationState
+
+
+def same_result(result, other):
+
+    return (np.array_equal(result.times, other.times) and
+            np.array_equal(result.states, other.states) and
+            np.array_equal(result.uptake, other.uptake) and
+            result.outcome == other.outcome and
+            result.final_time == other.final_time and
+            result.n_steps == other.n_steps and
+            result.switches == other.switches)
+
+
+def test_result_key():
+
+    parameters = Parameters(treatment_type="Classic")
+    assert result_key(parameters) == result_key(parameters.copy())
+    assert result_key(parameters) != result_key(
+        parameters.copy(classic_delay=4.0))
+    assert result_key(parameters) != result_key(parameters, "rk45")
+    assert result_key(parameters, "rk45") != result_key(
+        parameters, "rk45", {"rtol": 1e-8})
+
+
+def test_hit_and_miss(tmp_path):
+
+    cache = ResultCache(str(tmp_path))
+    parameters = Parameters(treatment_type="User", user_supp=True)
+
+    assert cache.get(parameters, max_time=20.0) is None
+    result = simulation.run(parameters, max_time=20.0, cache=cache)
+    assert same_result(cache.get(parameters, max_time=20.0), result)
+
+    # a fixed-step run answers every shorter one, not a longer one
+    shorter = simulation.run(parameters, max_time=10.0)
+    assert same_result(cache.get(parameters, max_time=10.0), shorter)
+    assert cache.get(parameters, max_time=30.0) is None
+    assert cache.get(parameters.copy(user_supp=False), max_time=20.0) is None
+    assert cache.get(parameters, "rk45", max_time=20.0) is None
+
+
+def test_finished_runs_answer_longer_ones(tmp_path):
+
+    cache = ResultCache(str(tmp_path))
+    parameters = Parameters(treatment_type="Classic")
+    result = simulation.run(parameters, "rk45", max_time=100.0, cache=cache)
+
+    assert result.outcome == simulation.CLEARANCE
+    assert same_result(cache.get(parameters, "rk45", max_time=1000.0), result)
+
+
+def test_eviction(tmp_path):
+
+    cache = ResultCache(str(tmp_path))
+    for delay in (1.0, 2.0, 3.0):
+        simulation.run(Parameters(treatment_type="Classic",
+                                  classic_delay=delay),
+                       max_time=5.0,
+                       cache=cache)
+    assert len(cache.entries()) == 3
+
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert len(cache.entries()) == 2
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_cached_trajectory_records_and_replays(tmp_path):
+
+    cache = ResultCache(str(tmp_path))
+    parameters = Parameters(treatment_type="Adaptive")
+
+    recorded = list(
+        itertools.islice(
+            simulation.cached_trajectory(SimulationState(parameters.copy()),
+                                         cache, max_time=5.0), 700))
+    stored = cache.get(parameters)
+    assert stored is not None and stored.final_time == 5.0
+
+    replayed = list(
+        itertools.islice(
+            simulation.cached_trajectory(SimulationState(parameters.copy()),
+                                         cache, max_time=5.0), 700))
+    for (time, state), (replayed_time, replayed_state) in zip(
+            recorded, replayed):
+        assert time == replayed_time
+        assert np.array_equal(state, replayed_state)
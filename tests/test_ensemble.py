@@ -0,0 +1,56 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import ensemble, simulation
+from bin.engine.parameters import Parameters
+
+
+def test_rows_match_run(parameters):
+
+    result = simulation.run(parameters, max_time=100.0)
+    rows = ensemble.run_ensemble(np.tile(parameters.model_parameters(),
+                                         (2, 1)),
+                                 parameters.initial_state(),
+                                 parameters.host_death_density,
+                                 parameters.treatment_schedule(),
+                                 time_step=parameters.time_step,
+                                 max_time=100.0,
+                                 record_every=1)
+
+    for row in range(2):
+        assert simulation.outcome_of(
+            rows.final_state[row],
+            parameters.host_death_density) == result.outcome
+        assert rows.final_time[row] == result.final_time
+        assert np.array_equal(rows.final_state[row], result.states[-1])
+    assert np.array_equal(rows.times, result.times[:len(rows.times)])
+    assert np.array_equal(rows.states[:, 0], result.states[:len(rows.times)])
+
+
+def test_time_is_counted_in_steps():
+
+    # summed, 1200 steps of 1 / 120 end past 10 days. without immune cells
+    # or host death the run lasts until max_time
+    parameters = Parameters(treatment_type="User",
+                            time_step=1 / 120,
+                            host_death_density=1e30,
+                            initial_precursor_cell_density=0.0)
+    rows = ensemble.run_ensemble(parameters.model_parameters(),
+                                 parameters.initial_state(),
+                                 parameters.host_death_density,
+                                 parameters.treatment_schedule(),
+                                 time_step=parameters.time_step,
+                                 max_time=10.0,
+                                 record_every=1)
+
+    assert rows.outcome[0] == ensemble.RUNNING
+    assert rows.final_time[0] == 10.0
+    assert len(rows.times) == 1201
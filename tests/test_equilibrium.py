@@ -0,0 +1,70 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import equilibrium, model
+from bin.engine.parameters import Parameters
+
+
+def test_equilibria_are_fixed_points():
+
+    parameters = Parameters()
+    coeffs = model.coefficients(parameters.model_parameters())
+    found = equilibrium.equilibria(parameters)
+
+    assert len(found) > 1
+    for candidate in found:
+        derivative = model.derivative(candidate.state, coeffs, 0.0)
+        assert candidate.converged
+        assert np.all(
+            np.abs(derivative) <= 1e-8 *
+            (model.EXTINCTION_DENSITY + np.abs(candidate.state)))
+
+
+def test_continuation_follows_the_logistic_branch():
+
+    # without immune cells or exchanges between the compartments each
+    # sensitive population is logistic, at K (1 - (death + inhibition *
+    # concentration) / growth) until the drug drives it extinct
+    parameters = Parameters(initial_precursor_cell_density=0.0,
+                            sensitive_attachment_rate=0.0,
+                            sensitive_detachment_rate=0.0,
+                            sensitive_mutation_rate=0.0,
+                            sensitive_mutation_rate_BF=0.0,
+                            antimicrobial_mean_concentration=0.0)
+    branch = equilibrium.continue_equilibrium(
+        parameters, "antimicrobial_mean_concentration", 4.0,
+        equilibrium.guesses(parameters)["sensitive"], uptake=1.0)
+
+    p = parameters
+    for compartment, growth, inhibition in (
+        (model.PS, p.sensitive_growth_rate,
+         p.sensitive_antimicrobial_inhibition),
+        (model.BS, p.sensitive_growth_rate_BF,
+         p.sensitive_antimicrobial_inhibition_BF)):
+        expected = p.growth_limitation_density * np.maximum(
+            1 - (p.natural_death + inhibition * branch.values) / growth, 0.0)
+        assert np.allclose(branch.states[:, compartment],
+                           expected,
+                           rtol=0,
+                           atol=1e-8 * p.growth_limitation_density)
+
+    # biofilm first, then planktonic, reported at the first point past them
+    extinctions = [
+        tipping_point.value for tipping_point in branch.tipping_points
+        if tipping_point.kind == equilibrium.EXTINCTION
+    ]
+    biofilm = (p.sensitive_growth_rate_BF -
+               p.natural_death) / p.sensitive_antimicrobial_inhibition_BF
+    planktonic = (p.sensitive_growth_rate -
+                  p.natural_death) / p.sensitive_antimicrobial_inhibition
+    assert len(extinctions) == 2
+    assert biofilm < extinctions[0] < planktonic < extinctions[1]
+    assert branch.values[-1] >= 4.0
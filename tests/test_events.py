@@ -0,0 +1,60 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+import pytest
+
+from bin.engine import events, model
+from bin.engine.parameters import Parameters
+
+
+def solve(parameters, solver, max_time=30.0):
+
+    return events.solve_with_events(
+        model.coefficients(parameters.model_parameters()),
+        parameters.treatment_schedule(), parameters.initial_state(),
+        max_time, parameters.host_death_density, solver=solver)
+
+
+@pytest.mark.parametrize("solver", ["rk45", "rosenbrock"])
+def test_classic_switches_on_the_schedule(solver):
+
+    parameters = Parameters(treatment_type="Classic", classic_delay=3.5,
+                            classic_duration=2.0)
+    solution, history = solve(parameters, solver)
+
+    assert history[:2] == [(3.5, events.TREATMENT_START, 1.0),
+                           (5.5, events.TREATMENT_END, 0.0)]
+    assert 3.5 in solution.get_times().tolist()
+
+
+@pytest.mark.parametrize("solver", ["rk45", "rosenbrock"])
+def test_adaptive_switches_on_the_threshold(solver):
+
+    parameters = Parameters(treatment_type="Adaptive")
+    threshold = parameters.adaptive_symptoms_at_microbes_density
+    solution, history = solve(parameters, solver)
+
+    switches = [entry for entry in history if entry[2] is not None]
+    assert switches[0][1:] == (events.SYMPTOMS, 1.0)
+    time = switches[0][0]
+    total = model.total_microbes(solution.sample(np.array([time]))[0])
+    assert total == pytest.approx(threshold, rel=1e-6)
+
+
+def test_clearance_ends_the_run():
+
+    parameters = Parameters(treatment_type="Classic")
+    solution, history = solve(parameters, "rk45", max_time=100.0)
+
+    assert solution.get_status() == events.CLEARANCE
+    assert history[-1][1:] == (events.CLEARANCE, None)
+    assert solution.get_final_time() < 100.0
+    assert np.max(solution.get_final_state()[model.MICROBES]) == pytest.approx(
+        model.EXTINCTION_DENSITY, rel=1e-6)
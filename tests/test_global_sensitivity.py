@@ -0,0 +1,44 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import global_sensitivity
+from bin.engine.parameters import Parameters
+
+
+def test_cleared_hosts_have_no_resistant_fraction():
+
+    # the default classic treatment clears the infection after about 24 days
+    base = Parameters(treatment_type="Classic")
+    values = global_sensitivity.evaluate([[3.5], [4.0]], ["classic_delay"],
+                                         base=base,
+                                         at_time=30.0,
+                                         max_time=60.0)
+
+    assert np.all(values[global_sensitivity.TIME_TO_CLEARANCE] < 30.0)
+    assert np.all(values[global_sensitivity.RESISTANT_FRACTION] == 0.0)
+
+
+def test_schedule_treatments_are_evaluated():
+
+    # an interval schedule is the classic treatment it spells out
+    classic = global_sensitivity.evaluate([[3.0], [3.3]],
+                                          ["sensitive_growth_rate"],
+                                          base=Parameters(
+                                              treatment_type="Classic"),
+                                          max_time=60.0)
+    schedule = global_sensitivity.evaluate(
+        [[3.0], [3.3]], ["sensitive_growth_rate"],
+        base=Parameters(treatment_type="Schedule",
+                        treatment_intervals=[(3.5, 3.5 + 7.0, 1.0)]),
+        max_time=60.0)
+
+    for output in global_sensitivity.OUTPUTS:
+        assert np.array_equal(classic[output], schedule[output])
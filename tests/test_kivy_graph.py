@@ -0,0 +1,170 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+import pytest
+
+pytest.importorskip("kivy")
+
+from bin.deps.kivy_graph import LineChunks, PointBuffer
+
+
+def test_point_buffer_behaves_like_a_list_of_tuples():
+
+    points = PointBuffer([(0, 1), (2, 3)])
+    points.append((4, 5))
+    points.extend([(6, 7), (8, 9)])
+
+    assert len(points) == 5
+    assert list(points) == [(0, 1), (2, 3), (4, 5), (6, 7), (8, 9)]
+    assert points[0] == (0, 1)
+    assert points[-1] == (8, 9)
+    assert points[1:5:2] == [(2, 3), (6, 7)]
+    assert points[10:] == []
+
+
+def test_point_buffer_grows_and_keeps_its_points():
+
+    points = PointBuffer()
+    expected = []
+    for i in range(1000):
+        points.append((i, -i))
+        expected.append((i, -i))
+    points.extend(np.arange(200.0).reshape(100, 2))
+    expected.extend((2.0 * i, 2.0 * i + 1) for i in range(100))
+
+    assert list(points) == expected
+    assert np.array_equal(points.data, np.array(expected))
+
+
+def test_point_buffer_data_is_a_snapshot():
+
+    points = PointBuffer([(0, 0)])
+    data = points.data
+    for i in range(100):
+        points.append((i, i))
+
+    assert data.shape == (1, 2)
+    assert len(points.data) == 101
+
+
+def test_point_buffer_notifies_once_per_call():
+
+    calls = []
+    points = PointBuffer(on_change=lambda: calls.append(len(points)))
+    points.append((0, 0))
+    points.extend([(1, 1), (2, 2), (3, 3)])
+    points.extend([])
+
+    assert calls == [1, 4, 4]
+
+
+def test_point_buffer_set_replaces_the_points():
+
+    points = PointBuffer([(0, 0), (1, 1)])
+    generation = points.generation
+    calls = []
+    points.on_change = lambda: calls.append(True)
+    points.set([(5, 5)])
+
+    assert list(points) == [(5, 5)]
+    assert points.generation != generation
+    assert calls == []
+
+    copy = PointBuffer(points)
+    points.append((6, 6))
+    assert list(copy) == [(5, 5)]
+
+
+class _Line(object):
+
+    # records how many vertices are set, like kivy tessellates them
+    def __init__(self):
+        self._points = []
+        self.vertices_set = 0
+
+    @property
+    def points(self):
+        return self._points
+
+    @points.setter
+    def points(self, points):
+        self.vertices_set += len(points)
+        self._points = list(points)
+
+
+class _Canvas(object):
+
+    def __init__(self):
+        self.children = []
+
+    def add(self, instruction):
+        self.children.append(instruction)
+
+    def remove(self, instruction):
+        self.children.remove(instruction)
+
+
+class _Plot(object):
+
+    # the identity projection
+    def __init__(self):
+        self.points = PointBuffer()
+        self.params = dict(xlog=False, xmin=0, xmax=1, ylog=False, ymin=0,
+                           ymax=1, size=(0, 0, 1, 1))
+
+    def project(self, points):
+        return points
+
+
+def _drawn(chunks):
+
+    vertices = list(chunks.lines[0].points)
+    for line in chunks.lines[1:]:
+        assert line.points[:2] == vertices[-2:]
+        vertices.extend(line.points[2:])
+    return vertices
+
+
+def test_line_chunks_only_set_the_last_chunk():
+
+    canvas = _Canvas()
+    chunks = LineChunks(canvas, _Line, size=10)
+    plot = _Plot()
+    for i in range(100):
+        plot.points.extend([(i, 2 * i), (i + 0.5, 2 * i + 1)])
+        set_before = [line.vertices_set for line in chunks.lines]
+        chunks.draw(plot)
+
+        assert _drawn(chunks) == plot.points.data.ravel().tolist()
+        assert all(len(line.points) <= 20 for line in chunks.lines)
+        # the chunks full before this draw are left alone
+        full = len(set_before) - 1
+        assert [line.vertices_set
+                for line in chunks.lines[:full]] == set_before[:full]
+    assert canvas.children == chunks.lines
+
+
+def test_line_chunks_redraw_after_a_rescale_or_set():
+
+    canvas = _Canvas()
+    chunks = LineChunks(canvas, _Line, size=10)
+    plot = _Plot()
+    plot.points.extend([(i, i) for i in range(50)])
+    chunks.draw(plot)
+
+    plot.params["ymax"] = 2
+    chunks.draw(plot)
+    assert _drawn(chunks) == plot.points.data.ravel().tolist()
+    assert canvas.children == chunks.lines
+
+    plot.points.set([(0, 1), (1, 0)])
+    chunks.draw(plot)
+    assert _drawn(chunks) == [0, 1, 1, 0]
+    assert canvas.children == chunks.lines
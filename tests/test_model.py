@@ -0,0 +1,83 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import timeit
+
+import numpy as np
+
+from bin.engine import model
+from conftest import baseline_steps
+
+N_STEPS = 3000
+
+
+def uptakes(parameters, times, states):
+
+    schedule = parameters.treatment_schedule()
+    return [
+        float(schedule.uptake(time, np.array(state)))
+        for time, state in zip(times, states)
+    ]
+
+
+def test_rk4_step_matches_calculate_next_time_step(parameters):
+
+    times, states = baseline_steps(parameters, N_STEPS)
+    coeffs = model.coefficients(parameters.model_parameters())
+
+    state = parameters.initial_state()
+    for time, uptake, expected in zip(times, uptakes(parameters, times, states),
+                                      states[1:]):
+        state = model.rk4_step(state, coeffs, uptake, parameters.time_step)
+        assert state.tolist() == expected, time
+
+
+def test_rk4_step_scalar_matches_calculate_next_time_step(parameters):
+
+    times, states = baseline_steps(parameters, N_STEPS)
+    coeffs = model.scalar_coefficients(parameters.model_parameters())
+
+    state = parameters.initial_state().tolist()
+    for time, uptake, expected in zip(times, uptakes(parameters, times, states),
+                                      states[1:]):
+        state = model.rk4_step_scalar(state, coeffs, uptake,
+                                      parameters.time_step)
+        assert state == expected, time
+
+
+def test_rk4_step_of_rows_matches_single_hosts(parameters):
+
+    coeffs = model.coefficients(parameters.model_parameters())
+    states = np.outer(np.linspace(0.5, 2.0, 5), parameters.initial_state())
+    uptake = np.array([0.0, 1.0, 0.0, 1.0, 0.5])
+
+    stepped = model.rk4_step(states, coeffs, uptake, parameters.time_step)
+    for row in range(len(states)):
+        assert np.array_equal(
+            stepped[row],
+            model.rk4_step(states[row], coeffs, uptake[row],
+                           parameters.time_step))
+
+
+def test_rk4_step_scalar_is_as_fast_as_calculate_next_time_step(parameters):
+
+    # the step of the animated simulation must not be slower than the
+    # equations it replaced, with a wide margin for noisy machines
+    coeffs = model.scalar_coefficients(parameters.model_parameters())
+    state = parameters.initial_state().tolist()
+
+    def scalar_step():
+        model.rk4_step_scalar(state, coeffs, 1.0, parameters.time_step)
+
+    def baseline_step():
+        baseline_steps(parameters, 1)
+
+    scalar = min(timeit.repeat(scalar_step, number=2000, repeat=5))
+    baseline = min(timeit.repeat(baseline_step, number=2000, repeat=5))
+    assert scalar < 2 * baseline
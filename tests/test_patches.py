@@ -0,0 +1,73 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import model, patches
+from bin.engine.parameters import Parameters
+
+
+def test_single_patch_is_the_host_model(parameters):
+
+    patch_model = patches.PatchModel(parameters, 1)
+    schedule = parameters.treatment_schedule()
+    coeffs = model.coefficients(parameters.model_parameters())
+    state = parameters.initial_state()
+    patch_state = patch_model.initial_state()
+
+    assert np.array_equal(patch_state[0], state)
+    for step in range(2000):
+        uptake = schedule.uptake(step * parameters.time_step, state)
+        state = model.rk4_step(state, coeffs, uptake, parameters.time_step)
+        patch_state = patch_model.rk4_step(patch_state, uptake,
+                                           parameters.time_step)
+        assert np.array_equal(patch_state[0], state), step
+
+
+def test_migration_conserves_microbes():
+
+    # without growth, death, drug or any other exchange between the
+    # compartments, microbes only move between the patches
+    parameters = Parameters(treatment_type="User",
+                            sensitive_growth_rate=0.0,
+                            sensitive_growth_rate_BF=0.0,
+                            resistant_growth_rate=0.0,
+                            resistant_growth_rate_BF=0.0,
+                            sensitive_attachment_rate=0.0,
+                            resistant_attachment_rate=0.0,
+                            sensitive_detachment_rate=0.0,
+                            resistant_detachment_rate=0.0,
+                            sensitive_mutation_rate=0.0,
+                            sensitive_mutation_rate_BF=0.0,
+                            natural_death=0.0,
+                            lymphocyte_inhibition=0.0,
+                            antimicrobial_mean_concentration=0.0)
+    patch_model = patches.PatchModel(parameters,
+                                     4,
+                                     patches.chain(4, 0.5, 0.1),
+                                     migrating=(model.PS, model.PR, model.BS,
+                                                model.BR))
+    state = patch_model.initial_state(seeded=(0, 3))
+    total = np.sum(state[:, model.MICROBES])
+
+    for _ in range(1200):
+        state = patch_model.rk4_step(state, 0.0, parameters.time_step)
+
+    assert np.isclose(np.sum(state[:, model.MICROBES]), total, rtol=1e-12)
+    # the flow towards the last patch has moved microbes along the chain
+    assert np.all(state[1:3, model.PS] > 0)
+
+
+def test_patches_share_the_precursors_of_one_host():
+
+    parameters = Parameters()
+    patch_model = patches.PatchModel(parameters, 5)
+    host = patch_model.host_state(patch_model.initial_state(seeded=(2, )))
+
+    assert np.allclose(host, parameters.initial_state(), rtol=1e-12)
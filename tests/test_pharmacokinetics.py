@@ -0,0 +1,156 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import ensemble, model, pharmacokinetics, treatment
+from bin.engine.parameters import Parameters
+from bin.engine.pharmacokinetics import Drug, DrugPanel
+
+INHIBITION = (1.0, 0.1, 0.5, 0.05)
+
+
+def concentrations(panel, time_step, n_steps):
+
+    # (concentrations, step averages) of panel.advance from no drug
+    current = panel.initial_concentrations()
+    values = [current]
+    averages = []
+    for step in range(n_steps):
+        current, average = panel.advance(current, step * time_step, time_step)
+        values.append(current)
+        averages.append(average)
+    return np.array(values), np.array(averages)
+
+
+def test_bolus_is_eliminated_exponentially():
+
+    panel = DrugPanel([Drug("a", 2.0, INHIBITION, doses=[(0.0, 8.0)])])
+    rate = np.log(2) / 2.0
+    time_step = 0.1
+    values, averages = concentrations(panel, time_step, 100)
+    times = np.arange(101) * time_step
+
+    # after the bolus at the start of the first step
+    assert np.allclose(values[1:, 0], 8.0 * np.exp(-rate * times[1:]),
+                       rtol=1e-12)
+    assert np.isclose(values[20, 0], 8.0 / 2, rtol=1e-12)
+    # averages of the exponential over each step
+    assert np.allclose(averages[:, 0],
+                       8.0 * np.exp(-rate * times[:-1]) *
+                       -np.expm1(-rate * time_step) / (rate * time_step),
+                       rtol=1e-12)
+
+
+def test_repeated_doses_accumulate():
+
+    half_life, interval, amount = 1.5, 1.0, 3.0
+    panel = DrugPanel([
+        Drug("a", half_life, INHIBITION,
+             doses=pharmacokinetics.repeated_doses(0.0, interval, 6, amount))
+    ])
+    ratio = np.exp(-np.log(2) / half_life * interval)
+    values, _ = concentrations(panel, 0.25, 24)
+
+    # just before dose n + 1 the n doses add up as a geometric series
+    for n in range(1, 7):
+        assert np.isclose(values[4 * n, 0],
+                          amount * ratio * (1 - ratio**n) / (1 - ratio),
+                          rtol=1e-12)
+
+
+def test_infusion_approaches_its_steady_state():
+
+    rate = np.log(2) / 0.5
+    panel = DrugPanel([
+        Drug("a", 0.5, INHIBITION,
+             infusion=treatment.IntervalSchedule([(0.0, 20.0, 2.0)]))
+    ])
+    time_step = 0.05
+    values, averages = concentrations(panel, time_step, 100)
+    times = np.arange(101) * time_step
+
+    assert np.allclose(values[:, 0], 2.0 / rate * -np.expm1(-rate * times),
+                       rtol=1e-12)
+    # average of the step from t to t + h: 2 / k (1 - e^(-kt) (1 - e^(-kh)) /
+    # kh)
+    assert np.allclose(
+        averages[:, 0],
+        2.0 / rate * (1 - np.exp(-rate * times[:-1]) *
+                      -np.expm1(-rate * time_step) / (rate * time_step)),
+        rtol=1e-12)
+
+
+def test_kill_rates_of_combined_drugs_add_up():
+
+    second = (0.0, 2.0, 0.0, 1.0)
+    panel = DrugPanel([
+        Drug("a", 1.0, INHIBITION, doses=[(0.0, 2.0)]),
+        Drug("b", 4.0, second, doses=[(0.0, 1.0), (0.5, 1.0)])
+    ])
+    time_step = 0.05
+    _, averages = concentrations(panel, time_step, 40)
+
+    first_rate, second_rate = np.log(2) / 1.0, np.log(2) / 4.0
+    times = np.arange(40) * time_step
+    first_average = (2.0 * np.exp(-first_rate * times) *
+                     -np.expm1(-first_rate * time_step) /
+                     (first_rate * time_step))
+    # the second dose of b counts from day 0.5
+    second_amount = 1.0 + np.where(times >= 0.5, np.exp(second_rate * 0.5),
+                                   0.0)
+    second_average = (second_amount * np.exp(-second_rate * times) *
+                      -np.expm1(-second_rate * time_step) /
+                      (second_rate * time_step))
+
+    assert np.allclose(averages, np.column_stack(
+        (first_average, second_average)), rtol=1e-12)
+    assert np.allclose(
+        panel.kill(averages),
+        first_average[:, None] * np.array(INHIBITION) +
+        second_average[:, None] * np.array(second),
+        rtol=1e-12)
+
+
+def test_panel_step_kills_with_the_step_average():
+
+    parameters = Parameters()
+    panel = DrugPanel([
+        Drug("a", 1.0, INHIBITION, doses=[(0.0, 2.0)]),
+        Drug("b", 4.0, (0.0, 2.0, 0.0, 1.0), doses=[(0.0, 1.0)])
+    ])
+    coeffs = model.coefficients(parameters.model_parameters())
+    state = panel.initial_state(parameters)
+    time_step = parameters.time_step
+
+    stepped = panel.rk4_step(state, coeffs, 0.0, time_step)
+    new, average = panel.advance(state[model.N_COMPARTMENTS:], 0.0,
+                                 time_step)
+    host = model.rk4_step(state[:model.N_COMPARTMENTS], coeffs, 0.0,
+                          time_step, drug=panel.kill(average))
+
+    assert np.array_equal(stepped, np.concatenate((host, new)))
+
+
+def test_undosed_drug_leaves_the_host_untreated():
+
+    parameters = Parameters(treatment_type="User", user_supp=False)
+    panel = DrugPanel([pharmacokinetics.drug_from_parameters(parameters, 1.0)])
+    result = pharmacokinetics.run(parameters, panel, max_time=20.0)
+    untreated = ensemble.run_ensemble(parameters.model_parameters(),
+                                      parameters.initial_state(),
+                                      parameters.host_death_density,
+                                      parameters.treatment_schedule(),
+                                      time_step=parameters.time_step,
+                                      max_time=20.0,
+                                      record_every=1)
+
+    assert result.outcome == untreated.outcome[0]
+    assert np.array_equal(result.states, untreated.states[:, 0])
+    assert np.all(result.concentrations == 0.0)
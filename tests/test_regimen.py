@@ -0,0 +1,102 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+import pytest
+
+from bin.engine import ensemble, regimen, simulation
+from bin.engine.parameters import Parameters
+
+# a coarser time step than the scenario screen's keeps the runs short
+TIME_STEP = 1 / 24.0
+CANDIDATES = [[delay, duration] for delay in (0.0, 2.0, 5.0)
+              for duration in (1.0, 4.0, 8.0, 14.0)]
+
+
+def test_evaluate_matches_single_runs():
+
+    # one candidate per chunk, nothing is stopped early
+    parameters = Parameters(treatment_type="Classic", time_step=TIME_STEP)
+    result = regimen.evaluate(parameters, ["classic_delay", "classic_duration"],
+                              CANDIDATES[::3],
+                              max_time=40.0,
+                              chunk_size=1)
+
+    for (delay, duration), outcome, final_time, exposure in zip(
+            CANDIDATES[::3], result.outcome, result.final_time,
+            result.exposure):
+        run = simulation.run(parameters.copy(classic_delay=delay,
+                                             classic_duration=duration),
+                             max_time=40.0)
+        assert ensemble.OUTCOME_NAMES[outcome] == run.outcome
+        assert final_time == run.final_time
+        assert np.isclose(
+            exposure, parameters.antimicrobial_mean_concentration *
+            parameters.time_step * np.count_nonzero(run.uptake[:-1]))
+
+
+def test_unknown_treatment_parameters_are_rejected():
+
+    with pytest.raises(ValueError):
+        regimen.evaluate(Parameters(treatment_type="Classic"),
+                         ["sensitive_growth_rate"], [[1.0]])
+    with pytest.raises(ValueError):
+        regimen.evaluate(Parameters(treatment_type="User"), ["classic_delay"],
+                         [[1.0]])
+
+
+def test_pareto_front():
+
+    result = regimen.RegimenResult(
+        ["classic_delay"], np.arange(6.0)[:, None],
+        np.array([1.0, 2.0, 3.0, 0.5, 2.5, 0.1]),
+        np.array([5.0, 1.0, 0.0, 9.0, 0.5, 0.0]),
+        np.array([
+            ensemble.RUNNING, ensemble.CLEARED, ensemble.CLEARED,
+            ensemble.RUNNING, ensemble.DOMINATED, ensemble.HOST_DEATH
+        ]), np.zeros(6))
+
+    # by increasing exposure, host death and dominated candidates excluded
+    assert np.array_equal(regimen.pareto_front(result), [3, 0, 1, 2])
+
+
+def test_early_stopping_keeps_the_pareto_front():
+
+    parameters = Parameters(treatment_type="Classic", time_step=TIME_STEP)
+    names = ["classic_delay", "classic_duration"]
+    stopped = regimen.evaluate(parameters, names, CANDIDATES, max_time=40.0)
+    complete = regimen.evaluate(parameters,
+                                names,
+                                CANDIDATES,
+                                max_time=40.0,
+                                chunk_size=1)
+
+    assert np.any(stopped.outcome == ensemble.DOMINATED)
+    assert not np.any(complete.outcome == ensemble.DOMINATED)
+    assert np.array_equal(regimen.pareto_front(stopped),
+                          regimen.pareto_front(complete))
+    front = regimen.pareto_front(stopped)
+    assert np.array_equal(stopped.exposure[front], complete.exposure[front])
+    assert np.array_equal(stopped.resistant[front], complete.resistant[front])
+
+
+def test_optimise_refines_around_the_front():
+
+    parameters = Parameters(treatment_type="Classic", time_step=TIME_STEP)
+    result = regimen.optimise(parameters, points=3, levels=2, max_time=40.0)
+    front = regimen.pareto_front(result)
+
+    assert len(result.values) > 9
+    assert front.size
+    for i, (low, high) in enumerate(regimen.CLASSIC_BOUNDS.values()):
+        assert np.all((low <= result.values[:, i]) &
+                      (result.values[:, i] <= high))
+    # no candidate is evaluated twice
+    assert len(np.unique(np.round(result.values, 9), axis=0)) == len(
+        result.values)
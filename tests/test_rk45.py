@@ -0,0 +1,52 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import rk45
+from bin.engine.rk45 import solve_rk45
+
+
+def test_dormand_prince_tableau_is_consistent():
+
+    # every stage is consistent with its node, both solutions are of order 5
+    # and 4 and the dense output ends on the 5th order solution
+    for c, a in zip(rk45.C, rk45.A):
+        assert np.isclose(np.sum(a), c)
+    assert np.isclose(np.sum(rk45.B), 1.0)
+    assert np.isclose(np.sum(rk45.B * rk45.C), 1 / 2)
+    assert np.isclose(np.sum(rk45.B * rk45.C**2), 1 / 3)
+    assert np.isclose(np.sum(rk45.E), 0.0)
+    assert np.allclose(np.sum(rk45.P, axis=1)[:6], rk45.B)
+
+
+def test_solve_rk45_exponential():
+
+    solution = solve_rk45(lambda t, y: -y, 0.0, [1.0, 2.0], 5.0)
+
+    assert solution.get_status() == "finished"
+    assert solution.get_final_time() == 5.0
+    assert np.allclose(solution.get_final_state(),
+                       [np.exp(-5.0), 2 * np.exp(-5.0)],
+                       rtol=0,
+                       atol=1e-6)
+    times = np.linspace(0.0, 5.0, 11)
+    assert np.allclose(solution.sample(times)[:, 0],
+                       np.exp(-times),
+                       rtol=0,
+                       atol=1e-6)
+
+
+def test_solve_rk45_stops():
+
+    solution = solve_rk45(lambda t, y: np.ones_like(y), 0.0, [0.0], 10.0,
+                          stop=lambda t, y: y[0] > 3.0)
+
+    assert solution.get_status() == "stopped"
+    assert 3.0 < solution.get_final_state()[0] < 10.0
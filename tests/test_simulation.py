@@ -0,0 +1,45 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import simulation
+from bin.engine.simulation_state import SimulationState
+from conftest import baseline_steps
+
+
+def test_run_matches_calculate_next_time_step(parameters):
+
+    result = simulation.run(parameters, max_time=20.0)
+    times, states = baseline_steps(parameters, result.n_steps, on_grid=True)
+
+    assert np.array_equal(result.states, np.array(states))
+    assert np.allclose(result.times, times, rtol=0, atol=1e-9)
+
+
+def test_run_ends_on_max_time(parameters):
+
+    # summed, the time of 1200 steps of 1 / 120 ends past 10 days
+    parameters.time_step = 1 / 120
+    result = simulation.run(parameters, max_time=10.0)
+
+    assert result.final_time == 10.0
+    assert result.n_steps == 1200
+
+
+def test_resume_continues_a_run(parameters):
+
+    state = SimulationState(parameters)
+    for _ in range(500):
+        state.step()
+    resumed = simulation.resume(state, max_time=20.0)
+    whole = simulation.run(parameters, max_time=20.0)
+
+    assert np.array_equal(resumed.states, whole.states[500:])
+    assert np.array_equal(resumed.times, whole.times[500:])
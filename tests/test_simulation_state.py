@@ -0,0 +1,102 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import os
+import pickle
+
+import numpy as np
+
+from bin.engine import simulation
+from bin.engine.simulation_state import (SimulationState, checkpoints,
+                                         latest_checkpoint, steps_to)
+
+
+def test_pickle_round_trip(parameters):
+
+    state = SimulationState(parameters)
+    for _ in range(100):
+        state.step()
+    copy = pickle.loads(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+    assert copy.time == state.time
+    assert copy.n_steps == state.n_steps
+    assert np.array_equal(copy.state, state.state)
+    assert copy.parameters == state.parameters
+
+    # the cached coefficients are rebuilt, the steps stay the same
+    for _ in range(100):
+        state.step()
+        copy.step()
+    assert copy.time == state.time
+    assert np.array_equal(copy.state, state.state)
+
+
+def test_save_and_load(parameters, tmp_path):
+
+    state = SimulationState(parameters)
+    for _ in range(10):
+        state.step()
+    path = str(tmp_path / "state.pkl")
+    state.save(path)
+    loaded = SimulationState.load(path)
+
+    assert not os.path.exists(path + ".tmp")
+    assert loaded.time == state.time
+    assert loaded.n_steps == state.n_steps
+    assert np.array_equal(loaded.state, state.state)
+
+
+def test_fork_is_independent(parameters):
+
+    state = SimulationState(parameters)
+    for _ in range(10):
+        state.step()
+    forked = state.fork()
+    changed = state.fork(time_step=parameters.time_step / 2)
+    for _ in range(10):
+        forked.step()
+
+    assert state.n_steps == 10
+    assert forked.n_steps == 20
+    assert changed.parameters.time_step == parameters.time_step / 2
+    assert state.parameters.time_step == parameters.time_step
+
+
+def test_resumed_checkpoint_matches_an_uninterrupted_run(
+        parameters, tmp_path):
+
+    whole = simulation.run(parameters, max_time=20.0)
+    directory = str(tmp_path)
+    interrupted = simulation.resume(SimulationState(parameters),
+                                    max_time=5.0,
+                                    checkpoint_directory=directory,
+                                    checkpoint_every=100)
+    latest = latest_checkpoint(directory)
+    resumed = simulation.resume(latest, max_time=20.0)
+
+    assert latest.n_steps == interrupted.n_steps
+    assert np.array_equal(resumed.states, whole.states[latest.n_steps:])
+    assert np.array_equal(resumed.times, whole.times[latest.n_steps:])
+    assert resumed.outcome == whole.outcome
+
+
+def test_checkpoints_are_saved_in_step_order(parameters, tmp_path):
+
+    directory = str(tmp_path / "run")
+    simulation.resume(SimulationState(parameters),
+                      max_time=5.0,
+                      checkpoint_directory=directory,
+                      checkpoint_every=100)
+    steps = [
+        SimulationState.load(path).n_steps for path in checkpoints(directory)
+    ]
+
+    assert steps == sorted(steps)
+    assert steps[-1] == steps_to(5.0, parameters.time_step)
+    assert latest_checkpoint(str(tmp_path)) is None
@@ -0,0 +1,33 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import simulation
+from bin.engine.stiff import solve_rosenbrock
+
+
+def test_solve_rosenbrock_decay():
+
+    # y' = -1e5 (y - cos t), stiff with a slow solution close to cos t
+    fun = lambda t, y: -1e5 * (y - np.cos(t))
+    jac = lambda t, y: np.array([[-1e5]])
+    solution = solve_rosenbrock(fun, jac, 0.0, [0.0], 2.0)
+
+    assert solution.get_status() == "finished"
+    assert solution.get_final_time() == 2.0
+    assert abs(solution.get_final_state()[0] - np.cos(2.0)) < 1e-3
+    # the stability limit of the explicit solvers is about 60000 steps here
+    assert solution.get_number_of_steps() < 20000
+
+
+def test_rosenbrock_densities_stay_non_negative(parameters):
+
+    result = simulation.run(parameters, backend="rosenbrock", max_time=60.0)
+    assert result.states.min() >= 0.0
@@ -0,0 +1,67 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import ensemble, stochastic
+from bin.engine.parameters import Parameters
+
+
+def assert_same_results(first, second):
+
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+
+
+def test_seed_reproduces_its_run():
+
+    parameters = Parameters(treatment_type="Classic")
+    first = stochastic.run_replicates(parameters, 20, seed=5, max_time=2.0)
+    second = stochastic.run_replicates(parameters, 20, seed=5, max_time=2.0)
+    other = stochastic.run_replicates(parameters, 20, seed=6, max_time=2.0)
+
+    assert_same_results(first, second)
+    assert not np.array_equal(first.final_state, other.final_state)
+
+
+def test_replicates_do_not_depend_on_jobs_or_later_blocks():
+
+    # a replicate depends on the seed, its index and the block size only
+    parameters = Parameters(treatment_type="Adaptive")
+    options = dict(seed=11, max_time=2.0, block_size=8)
+    serial = stochastic.run_replicates(parameters, 24, jobs=1, **options)
+    parallel = stochastic.run_replicates(parameters, 24, jobs=2, **options)
+    fewer = stochastic.run_replicates(parameters, 16, **options)
+
+    assert_same_results(serial, parallel)
+    assert_same_results(fewer, (array[:16] for array in serial))
+
+
+def test_mean_follows_the_deterministic_model():
+
+    # with many cells the noise averages out, what remains is the first
+    # order error of the leaps, about 1% a day at a tenth of the time step
+    parameters = Parameters(treatment_type="Classic")
+    tau = parameters.time_step / 10
+    result = stochastic.run_replicates(parameters,
+                                       100,
+                                       seed=3,
+                                       max_time=1.0,
+                                       tau=tau)
+    deterministic = ensemble.run_ensemble(parameters.model_parameters(),
+                                          parameters.initial_state(),
+                                          parameters.host_death_density,
+                                          parameters.treatment_schedule(),
+                                          time_step=tau,
+                                          max_time=1.0)
+
+    assert np.all(result.outcome == ensemble.RUNNING)
+    assert np.allclose(np.mean(result.final_state, axis=0),
+                       deterministic.final_state[0],
+                       rtol=0.03)
@@ -0,0 +1,55 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import simulation, strains
+from bin.engine.parameters import Parameters
+
+
+def test_from_parameters_matches_model(parameters):
+
+    strain_model = strains.from_parameters(parameters)
+    result = strains.run(strain_model, max_time=10.0)
+    expected = simulation.run(parameters, max_time=10.0)
+
+    # populations are stored strain by strain, model.py is habitat by habitat
+    order = [0, 2, 1, 3, 4, 5, 6]
+    assert np.allclose(result.states[:, order],
+                       expected.states,
+                       rtol=1e-9,
+                       atol=1e-9)
+
+
+def test_adaptive_treatment_of_a_resistance_ladder():
+
+    # six populations and only the last strain, the columns after the first
+    # four, is present, so the threshold has to count all of them
+    only_resistant = dict(sensitive_initial_density=0.0,
+                          sensitive_initial_density_BF=0.0,
+                          resistant_initial_density=10.0,
+                          adaptive_symptoms_at_microbes_density=1e5)
+    strain_model = strains.resistance_ladder(
+        Parameters(treatment_type="Adaptive", **only_resistant), 3)
+    untreated = strains.resistance_ladder(
+        Parameters(treatment_type="User", user_supp=False, **only_resistant),
+        3)
+    adaptive_result = strains.run(strain_model, max_time=10.0)
+    untreated_result = strains.run(untreated, max_time=10.0)
+
+    totals = strain_model.total_microbes(untreated_result.states)
+    threshold = strain_model.parameters.adaptive_symptoms_at_microbes_density
+    switch = np.argmax(totals >= threshold)
+    assert switch > 0
+
+    # the same run up to the first step at the threshold, treated after it
+    assert np.array_equal(adaptive_result.states[:switch + 1],
+                          untreated_result.states[:switch + 1])
+    assert adaptive_result.states[switch + 1][:6].sum() < (
+        untreated_result.states[switch + 1][:6].sum())
@@ -0,0 +1,68 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import os
+
+from bin.engine import sweep
+
+AXES = {
+    "treatment_type": ["Classic", "Adaptive"],
+    "classic_delay": {
+        "start": 1.0,
+        "stop": 4.0,
+        "num": 3
+    },
+}
+
+
+def test_grid_varies_the_first_axis_slowest():
+
+    points = sweep.grid(AXES)
+
+    assert len(points) == 6
+    assert [point["treatment_type"] for point in points[:3]] == ["Classic"] * 3
+    assert [point["classic_delay"] for point in points[:3]] == [1.0, 2.5, 4.0]
+
+
+def test_parallel_sweep_matches_serial_sweep(tmp_path):
+
+    points = sweep.grid(AXES)
+    serial = sweep.read_results(
+        sweep.run_sweep(points, str(tmp_path / "serial"), max_time=5.0,
+                        jobs=1))
+    parallel = sweep.read_results(
+        sweep.run_sweep(points, str(tmp_path / "parallel"), max_time=5.0,
+                        jobs=2))
+
+    assert serial == parallel
+    assert [row["index"] for row in serial] == list(range(len(points)))
+    assert [row["classic_delay"] for row in serial
+           ] == [point["classic_delay"] for point in points]
+
+
+def test_restarted_sweep_only_runs_missing_points(tmp_path):
+
+    points = sweep.grid(AXES)
+    directory = str(tmp_path)
+    finished = []
+    sweep.run_sweep(points[:2], directory, max_time=5.0, jobs=1)
+    os.rename(os.path.join(directory, sweep.RESULTS_FILE),
+              os.path.join(directory, sweep.PARTIAL_FILE))
+
+    results = sweep.read_results(
+        sweep.run_sweep(points,
+                        directory,
+                        max_time=5.0,
+                        jobs=1,
+                        progress=lambda done, total, row: finished.append(
+                            int(row["index"]))))
+
+    assert finished == list(range(2, len(points)))
+    assert len(results) == len(points)
+    assert not os.path.exists(os.path.join(directory, sweep.PARTIAL_FILE))
@@ -0,0 +1,102 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import model, transmission
+from bin.engine.parameters import Parameters
+
+
+def steps_until(population, time, rng):
+
+    while population.time < time - population.base.time_step / 2:
+        population.step(rng)
+
+
+def test_random_contacts_are_symmetric():
+
+    contacts = transmission.random_contacts(100, 4, 0.5, seed=1)
+    pairs = set(zip(contacts.sources.tolist(), contacts.targets.tolist()))
+
+    assert all((target, source) in pairs for source, target in pairs)
+    assert np.all(contacts.sources != contacts.targets)
+    assert np.all(contacts.rates == 0.5)
+
+
+def test_mixing_contacts_stay_in_separated_groups():
+
+    groups = np.repeat([0, 1, 2], 10)
+    contacts = transmission.mixing_contacts(groups, np.eye(3), 5, 1.0, seed=2)
+
+    assert contacts.sources.size > 0
+    assert np.array_equal(groups[contacts.sources], groups[contacts.targets])
+
+
+def test_zero_contact_rates_transmit_nothing():
+
+    population = transmission.Population(
+        Parameters(treatment_type="User"), 50,
+        transmission.random_contacts(50, 10, 0.0, seed=3))
+    population.infect([0, 1])
+    result = transmission.run_population(population, max_time=10.0, seed=4)
+
+    assert np.all(result.transmissions == 0)
+    assert np.array_equal(np.flatnonzero(result.infections), [0, 1])
+
+
+def test_inoculum_carries_the_resistant_fraction_of_its_source():
+
+    # a contact rate this high always transmits within a step
+    population = transmission.Population(
+        Parameters(), 2, transmission.Contacts([0], [1], [1e9]), inoculum=2.0)
+    population.infect([0], sensitive=3000.0, resistant=1000.0)
+
+    assert population.transmit(population.base.time_step,
+                               np.random.default_rng(5)) == 1
+    assert population.state[1, model.PS] == 2.0 * 0.75
+    assert population.state[1, model.PR] == 2.0 * 0.25
+    assert population.infected()[1]
+
+
+def test_classic_delay_counts_from_each_infection():
+
+    population = transmission.Population(
+        Parameters(treatment_type="Classic",
+                   classic_delay=1.0,
+                   classic_duration=7.0), 2,
+        transmission.Contacts([], [], []))
+    rng = np.random.default_rng(6)
+    population.infect([0])
+    steps_until(population, 2.0, rng)
+    population.infect([1])
+
+    steps_until(population, 2.5, rng)
+    assert np.array_equal(population.uptake(np.array([0, 1])), [1.0, 0.0])
+    steps_until(population, 3.5, rng)
+    assert np.array_equal(population.uptake(np.array([0, 1])), [1.0, 1.0])
+
+
+def test_cleared_hosts_are_susceptible_again():
+
+    # the default classic treatment clears the infection after about 24 days
+    population = transmission.Population(Parameters(treatment_type="Classic"),
+                                         1, transmission.Contacts([], [], []))
+    population.infect([0])
+    result = transmission.run_population(population, max_time=60.0, seed=7)
+
+    assert result.times[-1] < 30.0
+    assert not population.infected()[0]
+    assert not population.dead[0]
+    assert np.all(population.state[0, model.MICROBES] == 0.0)
+    assert population.state[0, model.MEMORY] > 0.0
+
+    population.infect([0])
+    assert population.infected()[0]
+    assert population.infections[0] == 2
+    assert population.infection_time[0] == population.time
@@ -0,0 +1,67 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import numpy as np
+
+from bin.engine import treatment
+
+
+def test_host_uptake_matches_uptake():
+
+    state = np.array([4e5, 3e5, 2e5, 1e5, 200.0, 0.0, 0.0])
+    times = np.concatenate((np.linspace(-1.0, 30.0, 311), [2.0, 5.0, 9.0]))
+    schedules = (
+        treatment.courses(2.0, 3.0, 4.0, 3),
+        treatment.taper(1.0, [3, 2, 2], [1, 0.5, 0.25]),
+        treatment.ConstantSchedule(1.0),
+        treatment.ConstantSchedule(0.0),
+        treatment.ThresholdSchedule(1e6),
+        treatment.ThresholdSchedule(1e7),
+    )
+    for schedule in schedules:
+        for time in times:
+            assert schedule.host_uptake(float(time), state) == float(
+                schedule.uptake(time, state)), (schedule, time)
+
+
+def test_row_schedules_match_their_schedules():
+
+    states = np.array([[4e5, 3e5, 2e5, 1e5, 200.0, 0.0, 0.0],
+                       [4e6, 3e6, 2e6, 1e6, 200.0, 0.0, 0.0]])
+    schedules = (
+        treatment.courses(2.0, 3.0, 4.0, 3),
+        treatment.taper(1.0, [3, 2, 2], [1, 0.5, 0.25]),
+        treatment.classic(2.0, 3.0),
+        treatment.ConstantSchedule(1.0),
+        treatment.ConstantSchedule(0.0),
+        treatment.ThresholdSchedule(1e6),
+        treatment.ThresholdSchedule(1e7),
+    )
+    rows = treatment.RowSchedules([
+        schedule for schedule in schedules for _ in range(len(states))
+    ])
+    tiled = np.tile(states, (len(schedules), 1))
+    selected = np.arange(0, len(tiled), 3)
+
+    for time in np.concatenate((np.linspace(-1.0, 30.0, 311), [3.0, 5.0])):
+        expected = np.concatenate(
+            [schedule.uptake(time, states) for schedule in schedules])
+        assert np.array_equal(rows.uptake(time, tiled), expected), time
+        assert np.array_equal(
+            rows.select_rows(selected).uptake(time, tiled[selected]),
+            expected[selected]), time
+
+    # one time per row
+    times = np.linspace(0.0, 10.0, len(tiled))
+    assert np.array_equal(rows.uptake(times, tiled), [
+        float(schedule.uptake(time, state))
+        for schedule, time, state in zip(
+            [schedule for schedule in schedules for _ in range(len(states))],
+            times, tiled)
+    ])
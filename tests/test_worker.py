@@ -0,0 +1,72 @@
+# Modelling the dynamics of different microbial populations in various environmental conditions: implications for the emergence and spread of antimicrobial resistance
+#
+# Copyright 2018-2019 Pedro HC David <https://github.com/Kronopt> and SimulATe contributors
+# Copyright 2019-2023 Luka Svet <luka.svet@kuleuven.be>
+#
+# The following code is a derivative work of the code from the Mercurial project,
+# which is licensed under GPLv3. This code therefore is also licensed under the terms
+# of the GNU General Public License, version 3.
+
+import time
+
+import numpy as np
+
+from bin.engine import simulation
+from bin.engine.parameters import Parameters
+from bin.engine.simulation_state import SimulationState
+from bin.engine.worker import RingBuffer, SimulationWorker, TIME
+
+
+def wait_for(condition, timeout=5.0):
+
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+def test_ring_buffer_wraps_around():
+
+    buffer = RingBuffer(capacity=4, n_columns=1)
+    for value in range(4):
+        assert buffer.push([value])
+    assert not buffer.push([4])
+    assert buffer.pop(2)[:, 0].tolist() == [0, 1]
+    assert buffer.push([4]) and buffer.push([5])
+    assert buffer.pop()[:, 0].tolist() == [2, 3, 4, 5]
+    assert len(buffer) == 0
+
+
+def test_worker_waits_for_room_and_follows_the_run():
+
+    parameters = Parameters(treatment_type="Classic")
+    worker = SimulationWorker(SimulationState(parameters.copy()), lead=100)
+    worker.start()
+    try:
+        wait_for(lambda: len(worker.buffer) == 100)
+        time.sleep(0.05)
+        assert len(worker.buffer) == 100
+        assert worker.is_alive()
+
+        rows = [worker.buffer.pop()]
+        worker.lead = 400
+        wait_for(lambda: len(worker.buffer) == 400)
+        rows.append(worker.buffer.pop())
+    finally:
+        worker.stop()
+        worker.join(5.0)
+    assert not worker.is_alive()
+
+    times = np.concatenate(rows)[:, TIME]
+    expected = simulation.run(parameters, max_time=times[-1])
+    assert np.array_equal(times, expected.times)
+
+
+def test_stop_wakes_a_full_worker():
+
+    worker = SimulationWorker(SimulationState(Parameters()), lead=10)
+    worker.start()
+    wait_for(lambda: len(worker.buffer) == 10)
+    worker.stop()
+    worker.join(5.0)
+    assert not worker.is_alive()